@@ -1,20 +1,27 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.db.session import get_db
 from app.core import security
+from app.core.principal_cache import Principal, PRINCIPAL_COLUMNS, principal_cache
 from app.models.models import User
 from app.schemas.auth import TokenData
+from uuid import UUID
+import hmac
 import os
 
 SECRET_KEY = os.getenv("SECRET_KEY", "super-secret-key-change-this")
 ALGORITHM = "HS256"
+# Shared secret for /internal endpoints and /metrics; when unset they answer 404
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+# Local development only: serve them without a token when INTERNAL_API_TOKEN is unset
+INTERNAL_ENDPOINTS_OPEN = os.getenv("INTERNAL_ENDPOINTS_OPEN", "false").lower() == "true"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -26,12 +33,30 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
         if user_id is None:
             raise credentials_exception
         token_data = TokenData(user_id=user_id)
-    except JWTError:
+        user_uuid = UUID(token_data.user_id)
+    except (JWTError, ValueError):
         raise credentials_exception
-    
-    result = await db.execute(select(User).where(User.id == token_data.user_id))
-    user = result.scalar_one_or_none()
-    
-    if user is None:
+
+    principal = await principal_cache.get(user_uuid)
+    if principal is not None:
+        return principal
+
+    # Only the auth columns; the full row carries the avatar
+    result = await db.execute(select(*PRINCIPAL_COLUMNS).where(User.id == user_uuid))
+    row = result.one_or_none()
+
+    if row is None:
         raise credentials_exception
-    return user
+    principal = Principal(**row._mapping)
+    await principal_cache.set(principal)
+    return principal
+
+
+def require_internal_token(x_internal_token: str = Header(None)):
+    if not INTERNAL_API_TOKEN:
+        if INTERNAL_ENDPOINTS_OPEN:
+            return
+        # Fail closed, without revealing that the endpoint exists
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_internal_token or not hmac.compare_digest(x_internal_token, INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
+from app.services.assets import ASSET_CACHE_CONTROL, ASSET_HASH_RE, asset_etag, get_asset
+
+router = APIRouter()
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+@router.get("/{asset_hash}", name="get_asset")
+async def read_asset(asset_hash: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Serves a stored asset. Public on purpose: <img> tags cannot send the bearer token,
+    and the SHA-256 in the URL is only known to clients that were given it.
+    """
+    if not ASSET_HASH_RE.match(asset_hash):
+        raise HTTPException(status_code=404, detail="Asset not found")
+
+    etag = asset_etag(asset_hash)
+    headers = {"ETag": etag, "Cache-Control": ASSET_CACHE_CONTROL}
+
+    # The hash is the content, so a matching validator never needs the database
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    asset = await get_asset(db, asset_hash)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+
+    return Response(content=asset.data, media_type=asset.content_type, headers=headers)
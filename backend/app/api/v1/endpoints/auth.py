@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import Any
 
@@ -25,7 +25,7 @@ async def create_user(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
     # Create User
     new_user = User(
         email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=await security.aget_password_hash(user_in.password),
         full_name=user_in.full_name,
         academic_level=AcademicLevel(user_in.academic_level) if user_in.academic_level in AcademicLevel.__members__.values() else AcademicLevel.OTHER
     )
@@ -43,16 +43,22 @@ async def create_user(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
 
 @router.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
-    # Try to fetch user
-    result = await db.execute(select(User).where(User.email == form_data.username))
-    user = result.scalar_one_or_none()
+    # Try to fetch user (only what login needs)
+    result = await db.execute(select(User.id, User.hashed_password).where(User.email == form_data.username))
+    user = result.one_or_none()
     
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    if not user or not await security.averify_password(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Upgrade hashes created with a different BCRYPT_ROUNDS while we have the plain password
+    if security.needs_rehash(user.hashed_password):
+        new_hash = await security.aget_password_hash(form_data.password)
+        await db.execute(update(User).where(User.id == user.id).values(hashed_password=new_hash))
+        await db.commit()
             
     access_token = security.create_access_token(subject=user.id)
     return {"access_token": access_token, "token_type": "bearer"}
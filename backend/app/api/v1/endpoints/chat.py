@@ -1,39 +1,92 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+import time
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.orm import defer
 from app.db.session import get_db
-from app.services.ai_service import process_transcript, query_vector_db
+from app.services.ai_service import query_vector_db, retrieve_context, serialize_context, stream_chat_completion
+from app.services.ingest_jobs import ingest_queue
+from app.schemas.ingest import IngestJobAccepted, IngestJobResponse
+from app.core.sse import format_sse
+from app.core.logger import get_logger, LOG_LLM_PAYLOADS
 from pydantic import BaseModel
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 class ChatRequest(BaseModel):
     query: str
 
 from app.api.deps import get_current_user
-from app.models.models import User
+from app.core.principal_cache import Principal
+from app.models.models import User, IngestJob, IngestJobStatus
 
-@router.post("/upload-transcript")
+@router.post("/upload-transcript", status_code=202, response_model=IngestJobAccepted)
 async def upload_transcript(
     file: UploadFile = File(...), 
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
+    """
+    Accepts a transcript PDF and queues it for ingestion. Poll /ingest-jobs/{job_id} for progress.
+    """
+    if file.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="File must be a PDF")
+
     try:
-        print(f"Receiving upload: {file.filename}, content_type: {file.content_type}")
-        return await process_transcript(current_user.id, file, db)
+        logger.info(f"Receiving upload: {file.filename}, content_type: {file.content_type}")
+        content = await file.read()
+
+        job = IngestJob(user_id=current_user.id, filename=file.filename, payload=content, status=IngestJobStatus.QUEUED)
+        db.add(job)
+        await db.commit()
+
+        try:
+            await ingest_queue.enqueue(job.id)
+        except HTTPException as e:
+            job.status = IngestJobStatus.FAILED
+            job.error = e.detail
+            job.payload = None
+            await db.commit()
+            raise
+
+        return {
+            "job_id": job.id,
+            "status": job.status.value,
+            "status_url": f"/api/v1/ingest-jobs/{job.id}"
+        }
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"CRITICAL ERROR in /upload-transcript: {e}")
+        logger.exception(f"CRITICAL ERROR in /upload-transcript: {e}")
         from fastapi.responses import JSONResponse
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
+@router.get("/ingest-jobs/{job_id}", response_model=IngestJobResponse)
+async def get_ingest_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    result = await db.execute(
+        select(IngestJob)
+        .options(defer(IngestJob.payload))
+        .where(IngestJob.id == job_id, IngestJob.user_id == current_user.id)
+    )
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return job
+
 @router.post("/chat")
-async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     try:
         # RAG: Retrieve context + LLM Response
-        result = await query_vector_db(request.query, db)
-        # Debug: Print the LLM response
-        print(f"LLM Response: {result}")
+        result = await query_vector_db(request.query, db, current_user.id)
+        if LOG_LLM_PAYLOADS:
+            logger.debug(f"LLM Response: {result}")
         
         # Map 'reply' to 'response' for frontend standardization
         return {
@@ -41,6 +94,49 @@ async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db), current
             "context": result.get("context", [])
         }
     except Exception as e:
-        print(f"CRITICAL ERROR in /chat: {e}")
+        logger.exception(f"CRITICAL ERROR in /chat: {e}")
         from fastapi.responses import JSONResponse
         return JSONResponse(status_code=500, content={"detail": str(e)})
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    http_request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Server-Sent Events variant of /chat.
+    Emits a `context` event with the retrieved chunks, `token` events with answer deltas,
+    then a `done` event with token usage and timing (or an `error` event).
+    """
+    start = time.perf_counter()
+    # Retrieval runs before streaming starts so the DB session is not held open while tokens flow
+    matches = await retrieve_context(request.query, db, current_user.id)
+    retrieve_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    async def event_stream():
+        yield format_sse("context", {"context": serialize_context(matches)})
+
+        events = stream_chat_completion(request.query, matches)
+        try:
+            async for event, data in events:
+                if await http_request.is_disconnected():
+                    logger.info(f"Client disconnected from /chat/stream, stopping generation for user {current_user.id}")
+                    break
+                if event == "done":
+                    data["timing"]["retrieve_ms"] = retrieve_ms
+                    data["timing"]["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error(f"Error in /chat/stream: {e}")
+            yield format_sse("error", {"detail": str(e)})
+        finally:
+            # Also runs when Starlette cancels the response on disconnect; closes the upstream LLM stream
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
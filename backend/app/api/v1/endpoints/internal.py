@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from app.api import deps
+from app.api.deps import require_internal_token
+from app.core.debug_capture import debug_capture
+from app.db.session import pool_stats
+
+router = APIRouter(dependencies=[Depends(require_internal_token)])
+
+@router.get("/db-pool")
+def db_pool():
+    """
+    Live connection pool state and the checkout wait-time histogram.
+    """
+    return pool_stats()
+
+def debug_captures_available() -> bool:
+    """
+    Captures hold raw LLM output with student data: they are only served when capturing is enabled
+    and a real INTERNAL_API_TOKEN guards them (never through INTERNAL_ENDPOINTS_OPEN).
+    """
+    return debug_capture.enabled and bool(deps.INTERNAL_API_TOKEN)
+
+def require_debug_captures():
+    if not debug_captures_available():
+        raise HTTPException(status_code=404, detail="Not Found")
+
+# Registered by main.py only when debug_captures_available()
+debug_router = APIRouter(dependencies=[Depends(require_internal_token), Depends(require_debug_captures)])
+
+@debug_router.get("/debug-captures")
+def list_debug_captures(limit: int = Query(20, ge=1, le=200), kind: Optional[str] = None):
+    """
+    Most recent raw LLM output captures, newest first (DEBUG_CAPTURE_ENABLED must be set).
+    """
+    return {**debug_capture.stats(), "captures": debug_capture.recent(limit, kind)}
+
+@debug_router.get("/debug-captures/{capture_id}")
+def get_debug_capture(capture_id: str):
+    entry = debug_capture.get(capture_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Capture not found")
+    return entry
@@ -1,17 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from app.api.deps import get_db, get_current_user
+from app.core.principal_cache import Principal, principal_cache
 from app.models.models import User, Profile
 from app.schemas.profile import ProfileUpdate, ProfileResponse
+from app.services.assets import store_avatar
 
 router = APIRouter()
 
+def asset_url(request: Request, asset_hash):
+    return str(request.url_for("get_asset", asset_hash=asset_hash)) if asset_hash else None
+
+async def load_identity(db: AsyncSession, request: Request, user_id) -> dict:
+    """
+    Loads the user identity fields shown on the profile; avatars are returned as asset URLs.
+    """
+    result = await db.execute(
+        select(User.display_name, User.avatar_hash, User.avatar_thumbnail_hash).where(User.id == user_id)
+    )
+    row = result.one()
+    return {
+        "display_name": row.display_name,
+        "avatar_url": asset_url(request, row.avatar_hash),
+        "avatar_thumbnail_url": asset_url(request, row.avatar_thumbnail_hash),
+    }
+
 @router.put("/", response_model=ProfileResponse)
 async def update_profile(
     profile_in: ProfileUpdate,
+    request: Request,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     # Fetch profile
     result = await db.execute(select(Profile).where(Profile.id == current_user.id))
@@ -35,27 +55,35 @@ async def update_profile(
         profile.manual_major = profile_in.manual_major
         
     # Update User Identity fields
+    identity = {}
     if profile_in.display_name is not None:
-        current_user.display_name = profile_in.display_name
+        identity["display_name"] = profile_in.display_name
     if profile_in.avatar_base64 is not None:
-        current_user.avatar_base64 = profile_in.avatar_base64
-        
-    db.add(current_user) # Mark user for update
+        if profile_in.avatar_base64:
+            identity["avatar_hash"], identity["avatar_thumbnail_hash"] = await store_avatar(db, profile_in.avatar_base64)
+        else:
+            # An empty upload removes the avatar
+            identity["avatar_hash"] = identity["avatar_thumbnail_hash"] = None
+    if identity:
+        await db.execute(update(User).where(User.id == current_user.id).values(**identity))
+
     await db.commit()
+    if identity:
+        # The cached principal carries display_name; drop it so the next request reloads it
+        await principal_cache.invalidate(current_user.id)
     await db.refresh(profile)
-    await db.refresh(current_user)
-    
+
     # Merge response
     return {
         **profile.__dict__,
-        "display_name": current_user.display_name,
-        "avatar_base64": current_user.avatar_base64
+        **(await load_identity(db, request, current_user.id))
     }
 
 @router.get("/", response_model=ProfileResponse)
 async def get_profile(
+    request: Request,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     result = await db.execute(select(Profile).where(Profile.id == current_user.id))
     profile = result.scalar_one_or_none()
@@ -70,6 +98,5 @@ async def get_profile(
     # Merge response
     return {
         **profile.__dict__,
-        "display_name": current_user.display_name,
-        "avatar_base64": current_user.avatar_base64
+        **(await load_identity(db, request, current_user.id))
     }
@@ -1,47 +1,66 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import select, delete
+from typing import List, Optional
 from pydantic import BaseModel
 import uuid
 
-from app.db.session import get_db
-from app.models.models import User, Roadmap, RoadmapMilestone, MilestoneStatus, Profile
-from app.services.roadmap_engine import generate_career_roadmap
+from app.db.session import get_db, AsyncSessionLocal
+from app.models.models import User, Roadmap, RoadmapMilestone, MilestoneStatus, Profile, IdempotencyStatus
+from app.services.roadmap_engine import generate_career_roadmap, stream_career_roadmap, roadmap_flights
+from app.services.roadmap_cache import normalize_inputs, fingerprint
+from app.services.single_flight import Flight
+from app.db.idempotency_repository import claim_key, complete_keys, release_keys
+from app.db.roadmap_repository import insert_roadmap, milestone_row
+from app.services.transcript_parser import format_compact, transcript_notes
+from app.db.transcript_repository import fetch_user_courses
 from app.core.logger import get_logger
+from app.core.sse import format_sse
 
 router = APIRouter()
-logger = get_logger()
+logger = get_logger(__name__)
 
 class GenerateRoadmapRequest(BaseModel):
     user_id: uuid.UUID
     interests: List[str]
     transcript_summary: str = "No transcript provided"
+    bypass_cache: bool = False # Force a fresh generation instead of a cached roadmap
 
 from app.api.deps import get_current_user
+from app.core.principal_cache import Principal
 
-@router.post("/generate")
-async def generate_roadmap(request: GenerateRoadmapRequest, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def load_generation_inputs(request: GenerateRoadmapRequest, user_id: uuid.UUID, db: AsyncSession):
     """
-    Generates a career roadmap for the given user.
+    Resolves the transcript text and manual profile data for a generation request of the authenticated
+    user `user_id`. Raises 403 when the request names another user.
+    Stored transcripts are sent in the compact parsed-course form (plus standing/honors/GPA lines) when
+    courses were reliably parsed at ingest, else as raw text.
+    Raises 400 when no transcript is available.
     """
-    logger.info(f"Received generation request for user {current_user.id}")
-    
-    # Verify user exists (from token)
-    user = current_user
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    if request.user_id != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot generate a roadmap for another user")
 
     # Fetch Profile for Transcript if not provided in request
     # Also fetch manual data
     manual_data = {}
     
-    profile_result = await db.execute(select(Profile).where(Profile.id == request.user_id))
+    profile_result = await db.execute(select(Profile).where(Profile.id == user_id))
     profile = profile_result.scalar_one_or_none()
     
     transcript_text = request.transcript_summary
     if not transcript_text or transcript_text == "No transcript provided":
-        if profile and profile.transcript_summary:
+        # Parsed courses are a fraction of the raw text; fall back to it for transcripts we could not parse
+        courses = await fetch_user_courses(db, user_id)
+        if courses:
+            transcript_text = format_compact(
+                courses,
+                profile and profile.derived_gpa,
+                profile and profile.derived_major,
+                notes=transcript_notes(profile.transcript_summary) if profile else (),
+            )
+        elif profile and profile.transcript_summary:
             transcript_text = profile.transcript_summary
             
     if profile:
@@ -60,61 +79,208 @@ async def generate_roadmap(request: GenerateRoadmapRequest, db: AsyncSession = D
              detail="Please upload a transcript first so we can generate a personalized roadmap."
          )
 
-    try:
-         # Call AI Engine with manual data
-        roadmap_json = await generate_career_roadmap(transcript_text, request.interests, manual_data)
-        
-        # Save to DB
-        new_roadmap = Roadmap(
-            user_id=user.id,
-            title=roadmap_json.get("title", "Generated Career Roadmap"),
-            description=roadmap_json.get("summary", ""),
-            content=roadmap_json
-        )
-        db.add(new_roadmap)
-        await db.flush()  # to get new_roadmap.id
-        
-        for ms in roadmap_json.get("milestones", []):
-            milestone = RoadmapMilestone(
-                roadmap_id=new_roadmap.id,
-                title=ms.get("title"),
-                description=ms.get("description"),
-                status=MilestoneStatus.PENDING,
-                info={
-                    "projects": ms.get("projects", []),
-                    "skills": ms.get("skills", []),
-                    "semester": ms.get("semester", "")
-                }
-            )
-            db.add(milestone)
-            
-        await db.commit()
-        await db.refresh(new_roadmap)
-        
-        # Fetch created milestones with IDs
-        milestones_result = await db.execute(
-            select(RoadmapMilestone).where(RoadmapMilestone.roadmap_id == new_roadmap.id)
+    return transcript_text, manual_data
+
+def build_milestone(roadmap_id: uuid.UUID, ms: dict) -> RoadmapMilestone:
+    return RoadmapMilestone(**milestone_row(roadmap_id, ms))
+
+async def persist_roadmap(db: AsyncSession, user_id: uuid.UUID, roadmap_json: dict) -> dict:
+    """
+    Saves a generated roadmap with its milestones and commits. Returns the /generate response.
+    """
+    roadmap_id, roadmap_with_ids = await insert_roadmap(db, user_id, roadmap_json)
+    await db.commit()
+
+    return {
+        "message": "Roadmap generated successfully",
+        "roadmap_id": roadmap_id,
+        "roadmap": roadmap_with_ids
+    }
+
+def generation_key(user_id: uuid.UUID, request: GenerateRoadmapRequest, transcript_text: str, manual_data: dict) -> tuple:
+    """
+    Identical generations for a user share this key (the normalized inputs cover every prompt input).
+    """
+    inputs = normalize_inputs(transcript_text, request.interests, manual_data, user_id)
+    return user_id, fingerprint({**inputs, "bypass_cache": request.bypass_cache})
+
+async def claim_idempotency_key(db: AsyncSession, user_id: uuid.UUID, key: str, request: GenerateRoadmapRequest):
+    """
+    Claims the Idempotency-Key for this request. Returns ("claimed", None), ("replay", stored response)
+    or ("join", in-flight generation of the same key in this process).
+    Raises 422 when the key was used with a different request and 409 while another worker processes it.
+    """
+    request_hash = fingerprint(request.model_dump(mode="json"))
+    claimed, existing = await claim_key(db, user_id, key, request_hash)
+    await db.commit()
+    if claimed:
+        return "claimed", None
+    if existing.request_hash != request_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    if existing.status == IdempotencyStatus.COMPLETED:
+        logger.info(f"Replaying stored roadmap response for idempotency key of user {user_id}")
+        return "replay", existing.response
+    flight = roadmap_flights.tagged((user_id, key))
+    if flight is None:
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this Idempotency-Key is still being processed, please retry shortly",
+            headers={"Retry-After": "5"},
         )
-        created_milestones = milestones_result.scalars().all()
-        
-        # Add IDs to the roadmap JSON
-        roadmap_with_ids = roadmap_json.copy()
-        if "milestones" in roadmap_with_ids and created_milestones:
-            for i, milestone_db in enumerate(created_milestones):
-                if i < len(roadmap_with_ids["milestones"]):
-                    roadmap_with_ids["milestones"][i]["id"] = str(milestone_db.id)
-        
-        return {
-            "message": "Roadmap generated successfully", 
-            "roadmap_id": new_roadmap.id,
-            "roadmap": roadmap_with_ids
-        }
+    return "join", flight
+
+@router.post("/generate")
+async def generate_roadmap(
+    request: GenerateRoadmapRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, max_length=255)
+):
+    """
+    Generates a career roadmap for the given user.
+    Concurrent identical requests of a user share one generation and receive the same roadmap.
+    With an Idempotency-Key header, retries of a completed request return the stored response.
+    """
+    logger.info(f"Received generation request for user {current_user.id}")
+    
+    # Verify user exists (from token)
+    user = current_user
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    tag = None
+    if idempotency_key:
+        outcome, value = await claim_idempotency_key(db, user.id, idempotency_key, request)
+        if outcome == "replay":
+            return value
+        if outcome == "join":
+            try:
+                return await roadmap_flights.wait(value)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+        tag = (user.id, idempotency_key)
+
+    try:
+        transcript_text, manual_data = await load_generation_inputs(request, user.id, db)
+    except Exception:
+        if tag is not None:
+            await release_keys(db, user.id, [idempotency_key])
+            await db.commit()
+        raise
 
+    user_id = user.id
+
+    async def run_generation(flight: Flight) -> dict:
+        # Own session: the generation outlives any single caller's request
+        async with AsyncSessionLocal() as flight_db:
+            try:
+                roadmap_json = await generate_career_roadmap(
+                    transcript_text, request.interests, manual_data, use_cache=not request.bypass_cache,
+                    user_id=user_id
+                )
+                response = await persist_roadmap(flight_db, user_id, roadmap_json)
+            except Exception:
+                await flight_db.rollback()
+                await release_keys(flight_db, user_id, [key for _, key in roadmap_flights.seal(flight)])
+                await flight_db.commit()
+                raise
+            # Callers joining from now on start a new generation; the ones so far get this response
+            keys = [key for _, key in roadmap_flights.seal(flight)]
+            if keys:
+                try:
+                    await complete_keys(flight_db, user_id, keys, jsonable_encoder(response))
+                    await flight_db.commit()
+                except Exception as e:
+                    # The roadmap is saved; retries see the key in progress until IDEMPOTENCY_LOCK_SECONDS
+                    logger.error(f"Could not store idempotent roadmap response: {e}")
+            return response
+
+    try:
+        return await roadmap_flights.do(
+            generation_key(user_id, request, transcript_text, manual_data), run_generation, tag=tag
+        )
     except Exception as e:
         logger.error(f"Failed to generate roadmap: {e}")
-        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/generate/stream")
+async def generate_roadmap_stream(request: GenerateRoadmapRequest, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    """
+    Streams roadmap generation over Server-Sent Events.
+    Emits `started` (roadmap_id), one `milestone` per milestone as soon as it is generated and saved,
+    then `done` with the full roadmap, or `error` (the partial roadmap is removed).
+    """
+    logger.info(f"Received streaming generation request for user {current_user.id}")
+
+    user_id = current_user.id
+    transcript_text, manual_data = await load_generation_inputs(request, user_id, db)
+
+    async def event_stream():
+        # Own session: the stream outlives the request-scoped dependency
+        async with AsyncSessionLocal() as stream_db:
+            roadmap = Roadmap(user_id=user_id, title="Generating roadmap...", description="", content={})
+            stream_db.add(roadmap)
+            await stream_db.commit()
+            yield format_sse("started", {"roadmap_id": roadmap.id})
+
+            events = stream_career_roadmap(
+                transcript_text, request.interests, manual_data, use_cache=not request.bypass_cache,
+                user_id=user_id
+            )
+            saved_ids = []
+            completed = False
+            try:
+                async for event, data in events:
+                    if event == "milestone":
+                        milestone = build_milestone(roadmap.id, data)
+                        stream_db.add(milestone)
+                        await stream_db.commit()
+                        saved_ids.append(str(milestone.id))
+                        yield format_sse("milestone", {**data, "id": saved_ids[-1], "index": len(saved_ids) - 1})
+                        continue
+
+                    # Final document: save milestones the incremental parser could not emit
+                    roadmap_json = data
+                    milestones = roadmap_json.get("milestones", [])
+                    for index, ms in enumerate(milestones):
+                        if index >= len(saved_ids):
+                            milestone = build_milestone(roadmap.id, ms)
+                            stream_db.add(milestone)
+                            await stream_db.flush()
+                            saved_ids.append(str(milestone.id))
+                            yield format_sse("milestone", {**ms, "id": saved_ids[-1], "index": index})
+                        ms["id"] = saved_ids[index]
+
+                    roadmap.title = roadmap_json.get("title", "Generated Career Roadmap")
+                    roadmap.description = roadmap_json.get("summary", "")
+                    roadmap.content = roadmap_json
+                    await stream_db.commit()
+                    completed = True
+                    yield format_sse("done", {
+                        "message": "Roadmap generated successfully",
+                        "roadmap_id": roadmap.id,
+                        "roadmap": roadmap_json
+                    })
+            except BaseException as e:
+                # Also covers client disconnects (task cancellation / generator close)
+                if not completed:
+                    logger.error(f"Failed to stream roadmap {roadmap.id}: {e!r}")
+                    await stream_db.rollback()
+                    await stream_db.execute(delete(RoadmapMilestone).where(RoadmapMilestone.roadmap_id == roadmap.id))
+                    await stream_db.execute(delete(Roadmap).where(Roadmap.id == roadmap.id))
+                    await stream_db.commit()
+                if not isinstance(e, Exception):
+                    raise
+                yield format_sse("error", {"detail": str(e)})
+            finally:
+                await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 class UpdateMilestoneRequest(BaseModel):
     status: MilestoneStatus
 
@@ -123,7 +289,7 @@ async def update_milestone_status(
     milestone_id: uuid.UUID,
     request: UpdateMilestoneRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Updates the status of a milestone.
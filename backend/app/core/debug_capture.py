@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+import random
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Off by default; call sites check `debug_capture.enabled` before building anything
+DEBUG_CAPTURE_ENABLED = os.getenv("DEBUG_CAPTURE_ENABLED", "false").lower() == "true"
+DEBUG_CAPTURE_SAMPLE_RATE = float(os.getenv("DEBUG_CAPTURE_SAMPLE_RATE", "1.0"))
+DEBUG_CAPTURE_MAX_ENTRIES = int(os.getenv("DEBUG_CAPTURE_MAX_ENTRIES", "50"))
+DEBUG_CAPTURE_MAX_CHARS = int(os.getenv("DEBUG_CAPTURE_MAX_CHARS", "200000"))
+# Optional directory for one JSON file per capture (written off the event loop)
+DEBUG_CAPTURE_DIR = os.getenv("DEBUG_CAPTURE_DIR")
+
+
+class DebugCapture:
+    """
+    Sampled capture of raw LLM outputs into a bounded in-memory ring buffer,
+    optionally mirrored to per-capture files.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = DEBUG_CAPTURE_ENABLED,
+        sample_rate: float = DEBUG_CAPTURE_SAMPLE_RATE,
+        max_entries: int = DEBUG_CAPTURE_MAX_ENTRIES,
+        max_chars: int = DEBUG_CAPTURE_MAX_CHARS,
+        directory: Optional[str] = DEBUG_CAPTURE_DIR,
+    ):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.max_chars = max_chars
+        self.directory = directory
+        self._entries: deque = deque(maxlen=max_entries)
+        self._pending_writes = set()
+        self.captured = 0
+        self.skipped = 0
+        self.write_errors = 0
+
+    def capture(self, kind: str, raw: str, **context: Any) -> Optional[str]:
+        """
+        Records `raw` if enabled and sampled in. Never blocks: file writes run in a worker thread.
+        Returns the capture id, or None when nothing was recorded.
+        """
+        if not self.enabled:
+            return None
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            self.skipped += 1
+            return None
+
+        entry = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "captured_at": datetime.now(timezone.utc).isoformat(),
+            "truncated": len(raw) > self.max_chars,
+            "raw": raw[:self.max_chars],
+            "context": context,
+        }
+        self._entries.append(entry)
+        self.captured += 1
+        if self.directory:
+            self._write_in_background(entry)
+        return entry["id"]
+
+    def _write_in_background(self, entry: Dict[str, Any]):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            self._write(entry)
+            return
+        task = loop.create_task(asyncio.to_thread(self._write, entry))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    def _write(self, entry: Dict[str, Any]):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{entry['captured_at'][:19].replace(':', '')}-{entry['kind']}-{entry['id']}.json")
+            with open(path, "w") as f:
+                json.dump(entry, f, default=str)
+        except OSError as e:
+            self.write_errors += 1
+            logger.warning(f"Could not write debug capture {entry['id']}: {e}")
+
+    def recent(self, limit: int = 20, kind: str = None) -> List[Dict[str, Any]]:
+        entries = [e for e in reversed(self._entries) if kind is None or e["kind"] == kind]
+        return entries[:limit]
+
+    def get(self, capture_id: str) -> Optional[Dict[str, Any]]:
+        return next((e for e in self._entries if e["id"] == capture_id), None)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "captured": self.captured,
+            "skipped": self.skipped,
+            "write_errors": self.write_errors,
+        }
+
+
+debug_capture = DebugCapture()
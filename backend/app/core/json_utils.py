@@ -1,17 +1,265 @@
 import re
 import json
 
+# Characters that matter outside strings; everything else (whitespace, digits, signs) is copied in bulk
+_STRUCTURAL = re.compile(r"[{}\[\]\"',:A-Za-z_]")
+# Inside strings only the closing quote and escapes matter
+_DOUBLE_QUOTED = re.compile(r'["\\]')
+_SINGLE_QUOTED = re.compile(r"['\"\\]")
+_BAREWORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+class JsonScanner:
+    """
+    Single-pass, incremental scanner for the first balanced {...} object in LLM output.
+    Text around the object (prose, code fences) is skipped, and Python-style output is normalized
+    on the fly: single-quoted strings, True/False/None and trailing commas become valid JSON.
+    Feed chunks with feed(), call close() at the end, then read text().
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.done = False
+        self._out = []
+        self._quote = None
+        self._string_parts = []
+        self._comma = False
+        self._carry = ""
+
+    # --- hooks for subclasses ---
+
+    def _on_open(self, ch):
+        pass
+
+    def _on_close(self, ch):
+        pass
+
+    def _on_string(self, value):
+        pass
+
+    def _on_colon(self):
+        pass
+
+    def _on_comma(self):
+        pass
+
+    # --- output ---
+
+    def _emit(self, piece):
+        self._out.append(piece)
+
+    def _flush_comma(self):
+        if self._comma:
+            self._comma = False
+            self._emit(",")
+
+    def _string_piece(self, piece):
+        self._string_parts.append(piece)
+        self._emit(piece)
+
+    def text(self) -> str:
+        return "".join(self._out)
+
+    # --- scanning ---
+
+    def feed(self, chunk: str):
+        if self._carry:
+            chunk, self._carry = self._carry + chunk, ""
+        self._scan(chunk, final=False)
+
+    def close(self):
+        if self._carry:
+            chunk, self._carry = self._carry, ""
+            self._scan(chunk, final=True)
+
+    def _scan(self, chunk: str, final: bool):
+        i, n = 0, len(chunk)
+        while i < n and not self.done:
+            if self._quote is not None:
+                i = self._scan_string(chunk, i, n, final)
+                continue
+
+            if self.depth == 0:
+                i = chunk.find("{", i)
+                if i < 0:
+                    return
+
+            match = _STRUCTURAL.search(chunk, i)
+            end = match.start() if match else n
+            if end > i:
+                text = chunk[i:end]
+                if not text.isspace():
+                    self._flush_comma()
+                self._emit(text)
+            if match is None:
+                return
+            i = end
+            ch = chunk[i]
+
+            if ch in "{[":
+                self._flush_comma()
+                self.depth += 1
+                self.started = True
+                self._on_open(ch)
+                self._emit(ch)
+                i += 1
+            elif ch in "}]":
+                # A comma right before a closing bracket is dropped
+                self._comma = False
+                self._emit(ch)
+                self._on_close(ch)
+                self.depth -= 1
+                if self.depth == 0:
+                    self.done = True
+                i += 1
+            elif ch == '"' or ch == "'":
+                self._flush_comma()
+                self._quote = ch
+                self._string_parts = []
+                self._emit('"')
+                i += 1
+            elif ch == ":":
+                self._emit(ch)
+                self._on_colon()
+                i += 1
+            elif ch == ",":
+                self._comma = True
+                self._on_comma()
+                i += 1
+            else:
+                word = _BAREWORD.match(chunk, i)
+                if word.end() == n and not final:
+                    # The word may continue in the next chunk
+                    self._carry = word.group()
+                    return
+                self._flush_comma()
+                self._emit(_PYTHON_LITERALS.get(word.group(), word.group()))
+                i = word.end()
+
+    def _scan_string(self, chunk: str, i: int, n: int, final: bool) -> int:
+        if chunk[i] == "\\":
+            if i + 1 == n:
+                if not final:
+                    self._carry = "\\"
+                return n
+            escaped = chunk[i + 1]
+            # JSON has no \' escape; inside a single-quoted string it is just a quote
+            self._string_piece("'" if escaped == "'" else "\\" + escaped)
+            return i + 2
+
+        pattern = _SINGLE_QUOTED if self._quote == "'" else _DOUBLE_QUOTED
+        match = pattern.search(chunk, i)
+        end = match.start() if match else n
+        if end > i:
+            self._string_piece(chunk[i:end])
+        if match is None:
+            return n
+
+        ch = match.group()
+        if ch == "\\":
+            return end
+        if ch == self._quote:
+            self._quote = None
+            self._emit('"')
+            self._on_string("".join(self._string_parts))
+        else:
+            # A double quote inside a single-quoted string
+            self._string_piece('\\"')
+        return end + 1
+
+
+_DECODER = json.JSONDecoder(strict=False)
+
 def extract_json(text):
     """
-    Extracts JSON object from a string using regex.
-    Matches everything between the first { and the last }.
-    """
-    # Remove markdown code blocks if present
-    text = re.sub(r'```json\s*', '', text)
-    text = re.sub(r'```', '', text)
-    
-    # regex to find the outer-most braces
-    match = re.search(r'\{.*\}', text, re.DOTALL)
-    if match:
-        return match.group(0)
+    Extracts the first JSON object from LLM output in a single pass (see JsonScanner).
+    Returns the stripped input unchanged if it contains no object.
+    """
+    scanner = JsonScanner()
+    scanner.feed(text)
+    scanner.close()
+    if scanner.started:
+        return scanner.text()
     return text.strip()
+
+def load_json(text):
+    """
+    Parses the first JSON object in LLM output.
+    Well-formed output is decoded in place by the C decoder; anything else (Python-style quoting,
+    trailing commas) goes through the normalizing scanner. Raises json.JSONDecodeError if neither works.
+    """
+    start = text.find("{")
+    if start >= 0:
+        try:
+            return _DECODER.raw_decode(text, start)[0]
+        except json.JSONDecodeError:
+            pass
+    return _DECODER.decode(extract_json(text))
+
+class StreamingArrayParser(JsonScanner):
+    """
+    Incrementally scans streamed JSON text and returns each object of the array stored under `key`
+    of the top-level object as soon as its closing brace arrives, e.g. every milestone of
+    {"milestones": [{...}, {...}]}. Arrays under the same key in nested objects are ignored.
+    """
+
+    def __init__(self, key):
+        super().__init__()
+        self.key = key
+        self.failed = False
+        self._last_string = None
+        self._current_key = None
+        self._array_depth = None
+        self._item_parts = None
+        self._items = []
+
+    def _emit(self, piece):
+        self._out.append(piece)
+        if self._item_parts is not None:
+            self._item_parts.append(piece)
+
+    def _on_string(self, value):
+        self._last_string = value
+
+    def _on_colon(self):
+        # Only keys of the top-level object can hold the array
+        self._current_key = self._last_string if self.depth == 1 else None
+
+    def _on_comma(self):
+        self._current_key = None
+
+    def _on_open(self, ch):
+        if ch == "[" and self._array_depth is None and self._current_key == self.key:
+            self._array_depth = self.depth
+        elif ch == "{" and self._array_depth is not None and self.depth == self._array_depth + 1:
+            self._item_parts = []
+        self._current_key = None
+
+    def _on_close(self, ch):
+        if ch == "}" and self._item_parts is not None and self.depth == self._array_depth + 1:
+            item = self._parse_item("".join(self._item_parts))
+            if item is not None:
+                self._items.append(item)
+            self._item_parts = None
+        elif ch == "]" and self._array_depth is not None and self.depth == self._array_depth:
+            self._array_depth = None
+
+    def feed(self, chunk):
+        """
+        Consumes the next piece of text and returns the list of objects completed by it.
+        """
+        self._items = []
+        super().feed(chunk)
+        return self._items
+
+    def _parse_item(self, text):
+        if self.failed:
+            return None
+        try:
+            return json.loads(text, strict=False)
+        except json.JSONDecodeError:
+            # Stop emitting so callers can fall back to the fully parsed document for the rest
+            self.failed = True
+            return None
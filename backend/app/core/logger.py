@@ -1,28 +1,135 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import sys
-from logging.handlers import RotatingFileHandler
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Root level for the app logger; LOG_LEVELS overrides individual loggers,
+# e.g. "career_compass.services.ai_service=DEBUG,sqlalchemy.engine=INFO"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+# "json" for one structured object per line, "text" for the classic human-readable format
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Empty disables the file handler
+LOG_FILE = os.getenv("LOG_FILE", "server.log")
+LOG_FILE_MAX_BYTES = int(os.getenv("LOG_FILE_MAX_BYTES", "10485760"))
+LOG_FILE_BACKUPS = int(os.getenv("LOG_FILE_BACKUPS", "5"))
+# Fraction of DEBUG records kept; sampled before they are queued, so dropped lines cost almost nothing
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+# Records waiting for the writer thread; beyond this new records are dropped instead of blocking callers
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Full LLM inputs/outputs are only logged (at DEBUG) when explicitly enabled
+LOG_LLM_PAYLOADS = os.getenv("LOG_LLM_PAYLOADS", "false").lower() == "true"
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else came in through `extra=` and goes into the JSON output
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DebugSampler(logging.Filter):
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1 or random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without ever blocking the caller (the event loop).
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now (args may be mutated later), but keep the
+        # record's structure for the formatter on the other side of the queue
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _build_handlers():
+    formatter = JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if LOG_FILE:
+        handlers.append(RotatingFileHandler(LOG_FILE, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def _apply_levels(spec: str):
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
 
 # Create a custom logger
 logger = logging.getLogger("career_compass")
-logger.setLevel(logging.DEBUG)
-
-# Create handlers
-c_handler = logging.StreamHandler(sys.stdout)
-f_handler = RotatingFileHandler('server.log', maxBytes=10485760, backupCount=5)
+logger.setLevel(LOG_LEVEL)
+logger.propagate = False
 
-c_handler.setLevel(logging.DEBUG)
-f_handler.setLevel(logging.DEBUG)
+queue_handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+queue_handler.addFilter(DebugSampler(LOG_DEBUG_SAMPLE_RATE))
+logger.addHandler(queue_handler)
 
-# Create formatters and add it to handlers
-c_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# File and console I/O happen on the listener's thread, never in the caller's
+listener = QueueListener(queue_handler.queue, *_build_handlers(), respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
 
-c_handler.setFormatter(c_format)
-f_handler.setFormatter(f_format)
+_apply_levels(LOG_LEVELS)
 
-# Add handlers to the logger
-logger.addHandler(c_handler)
-logger.addHandler(f_handler)
+def get_logger(name: str = None):
+    """
+    Returns the app logger, or a child of it ("career_compass.<module>") whose level LOG_LEVELS can set.
+    """
+    if not name:
+        return logger
+    if name.startswith("app."):
+        name = name[len("app."):]
+    return logger.getChild(name)
 
-def get_logger():
-    return logger
+def logging_stats() -> dict:
+    return {
+        "queue_depth": queue_handler.queue.qsize(),
+        "dropped": queue_handler.dropped,
+    }
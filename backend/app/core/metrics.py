@@ -0,0 +1,261 @@
+import bisect
+from abc import ABC, abstractmethod
+import math
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; fine-grained at the low end where pool waits and DB calls live
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Registry:
+    """
+    Holds metrics and stats collectors and renders them in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._collectors: List[Tuple[str, Callable[[], dict]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric"):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def register_collector(self, prefix: str, collect: Callable[[], dict]):
+        """
+        Exports the numeric values of a subsystem's stats() dict as gauges named <prefix>_<key>.
+        """
+        self._collectors.append((prefix, collect))
+
+    def _collector_lines(self) -> List[str]:
+        lines = []
+        for prefix, collect in self._collectors:
+            try:
+                stats = collect()
+            except Exception:
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                name = _INVALID_NAME_CHARS.sub("_", f"{prefix}_{key}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return lines
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        lines.extend(self._collector_lines())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, description: str = "", labelnames: Sequence[str] = (), registry: Optional[Registry] = REGISTRY):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    @property
+    def exposed_name(self) -> str:
+        return self.name
+
+    @abstractmethod
+    def _new_child(self):
+        """
+        Creates the value holder for one label combination.
+        """
+
+    @abstractmethod
+    def _render_child(self, labels: List[Tuple[str, str]], child) -> List[str]:
+        """
+        Exposition lines for one label combination.
+        """
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(v) for v in values)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+        return child
+
+    def _unlabeled(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use .labels()")
+        return self.labels()
+
+    def _samples(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def render(self) -> List[str]:
+        lines = []
+        if self.description:
+            lines.append(f"# HELP {self.exposed_name} {self.description}")
+        lines.append(f"# TYPE {self.exposed_name} {self.type_name}")
+        for key, child in self._samples():
+            lines.extend(self._render_child(list(zip(self.labelnames, key)), child))
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter; rendered with the conventional _total suffix.
+    """
+    type_name = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self._unlabeled().inc(amount)
+
+    @property
+    def exposed_name(self) -> str:
+        return self.name if self.name.endswith("_total") else f"{self.name}_total"
+
+    def _render_child(self, labels, child) -> List[str]:
+        return [f"{self.exposed_name}{_format_labels(labels)} {_format_value(child.value)}"]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float):
+        self._unlabeled().set(value)
+
+    def inc(self, amount: float = 1):
+        self._unlabeled().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._unlabeled().dec(amount)
+
+    def _render_child(self, labels, child) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(child.value)}"]
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = count
+        return {"count": count, "sum": round(total, 6), "buckets": buckets}
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram (Prometheus semantics). Thread-safe, since pool checkouts
+    and executor callbacks observe from outside the event loop.
+    """
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str = "",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = REGISTRY,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, description, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._unlabeled().observe(value)
+
+    def snapshot(self) -> Dict:
+        return self._unlabeled().snapshot()
+
+    def _render_child(self, labels, child) -> List[str]:
+        snapshot = child.snapshot()
+        lines = [
+            f"{self.name}_bucket{_format_labels(labels + [('le', le)])} {count}"
+            for le, count in snapshot["buckets"].items()
+        ]
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {snapshot['count']}")
+        return lines
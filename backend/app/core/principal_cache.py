@@ -0,0 +1,147 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Optional
+from uuid import UUID
+from app.core.logger import get_logger
+from app.models.models import AcademicLevel, User
+
+logger = get_logger(__name__)
+
+PRINCIPAL_CACHE_ENABLED = os.getenv("PRINCIPAL_CACHE_ENABLED", "true").lower() == "true"
+# Upper bound on how long another process may serve a principal after it changed
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+# Optional shared backing store (requires the `redis` package)
+PRINCIPAL_CACHE_REDIS_URL = os.getenv("PRINCIPAL_CACHE_REDIS_URL")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated user as seen by request handlers: only the columns auth and endpoints need,
+    without heavy fields such as the avatar.
+    """
+    id: UUID
+    email: str
+    full_name: Optional[str] = None
+    academic_level: Optional[AcademicLevel] = None
+    display_name: Optional[str] = None
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["id"] = str(self.id)
+        data["academic_level"] = self.academic_level.value if self.academic_level else None
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw) -> "Principal":
+        data = json.loads(raw)
+        data["id"] = UUID(data["id"])
+        data["academic_level"] = AcademicLevel(data["academic_level"]) if data["academic_level"] else None
+        return cls(**data)
+
+
+PRINCIPAL_COLUMNS = (User.id, User.email, User.full_name, User.academic_level, User.display_name)
+
+
+class PrincipalCache:
+    """
+    Process-local TTL/LRU cache of principals, optionally backed by Redis so all workers share entries.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS,
+        max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES,
+        enabled: bool = PRINCIPAL_CACHE_ENABLED,
+        redis_url: Optional[str] = PRINCIPAL_CACHE_REDIS_URL,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._local: "OrderedDict[UUID, tuple]" = OrderedDict()
+        self._redis = None
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        if enabled and redis_url:
+            try:
+                import redis.asyncio as redis
+                self._redis = redis.from_url(redis_url)
+            except ImportError:
+                logger.warning("PRINCIPAL_CACHE_REDIS_URL is set but the redis package is not installed; using local cache only")
+
+    @staticmethod
+    def _key(user_id: UUID) -> str:
+        return f"principal:{user_id}"
+
+    def _put_local(self, principal: Principal):
+        self._local[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+        self._local.move_to_end(principal.id)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, user_id: UUID) -> Optional[Principal]:
+        if not self.enabled:
+            return None
+
+        entry = self._local.get(user_id)
+        if entry is not None:
+            expires_at, principal = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(user_id)
+                self.local_hits += 1
+                return principal
+            del self._local[user_id]
+
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(self._key(user_id))
+                if raw is not None:
+                    principal = Principal.from_json(raw)
+                    self._put_local(principal)
+                    self.shared_hits += 1
+                    return principal
+            except Exception as e:
+                logger.warning(f"Principal cache shared lookup failed: {e}")
+
+        self.misses += 1
+        return None
+
+    async def set(self, principal: Principal):
+        if not self.enabled:
+            return
+        self._put_local(principal)
+        if self._redis is not None:
+            try:
+                await self._redis.set(self._key(principal.id), principal.to_json(), ex=max(1, int(self.ttl_seconds)))
+            except Exception as e:
+                logger.warning(f"Principal cache shared write failed: {e}")
+
+    async def invalidate(self, user_id: UUID):
+        self.invalidations += 1
+        self._local.pop(user_id, None)
+        if self._redis is not None:
+            try:
+                await self._redis.delete(self._key(user_id))
+            except Exception as e:
+                logger.warning(f"Principal cache shared invalidation failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "shared": self._redis is not None,
+            "entries": len(self._local),
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+principal_cache = PrincipalCache()
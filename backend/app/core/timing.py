@@ -0,0 +1,61 @@
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+from app.core.metrics import Histogram
+
+STAGE_SECONDS = Histogram(
+    "stage_duration_seconds", "Duration of pipeline stages", labelnames=("operation", "stage")
+)
+
+T = TypeVar("T")
+
+
+class StageTimer:
+    """
+    Records how long each named stage of a pipeline takes, in seconds.
+    An optional async callback is awaited when a stage starts (e.g. to persist progress).
+    When `operation` is set, every stage is also observed in the stage_duration_seconds histogram.
+    """
+
+    def __init__(self, on_stage_start: Optional[Callable[[str], Awaitable[None]]] = None, operation: str = None):
+        self.timings: Dict[str, float] = {}
+        self.on_stage_start = on_stage_start
+        self.operation = operation
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        if self.on_stage_start is not None:
+            await self.on_stage_start(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    async def iterate(self, name: str, iterator: AsyncIterator[T]) -> AsyncIterator[T]:
+        """
+        Yields from `iterator`, timing under `name` only the waits for its items, not the consumer's work
+        between them (a stage wrapped around a `yield` would time the SSE writes too). Recorded when the
+        iteration ends, however it ends; callers aclose() the returned generator when they stop early.
+        """
+        if self.on_stage_start is not None:
+            await self.on_stage_start(name)
+        elapsed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield item
+        finally:
+            self.record(name, elapsed)
+
+    def record(self, name: str, elapsed: float):
+        # A stage that runs more than once (e.g. a retried round) reports its total time
+        self.timings[name] = round(self.timings.get(name, 0.0) + elapsed, 4)
+        if self.operation is not None:
+            STAGE_SECONDS.labels(self.operation, name).observe(elapsed)
@@ -0,0 +1,89 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import and_, delete, null, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import IdempotencyKey, IdempotencyStatus
+
+# Completed keys replay their response for this long, then can be reused
+IDEMPOTENCY_KEY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+# An in-progress key older than this belongs to a request that died with its process and can be reclaimed
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "300"))
+
+
+async def claim_key(db: AsyncSession, user_id: UUID, key: str, request_hash: str) -> Tuple[bool, Optional[IdempotencyKey]]:
+    """
+    Marks the key in progress for this request in the session's transaction (the caller commits).
+    Returns (True, None) when claimed, else (False, existing row). Expired and abandoned keys are reclaimed.
+    """
+    now = datetime.utcnow()
+    stmt = pg_insert(IdempotencyKey).values(
+        user_id=user_id,
+        key=key,
+        request_hash=request_hash,
+        status=IdempotencyStatus.IN_PROGRESS,
+        created_at=now,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "key"],
+        set_={
+            "request_hash": stmt.excluded.request_hash,
+            "status": stmt.excluded.status,
+            "response": null(),
+            "created_at": stmt.excluded.created_at,
+            "completed_at": null(),
+        },
+        where=or_(
+            IdempotencyKey.created_at < now - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS),
+            and_(
+                IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS,
+                IdempotencyKey.created_at < now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+            ),
+        ),
+    ).returning(IdempotencyKey.key)
+
+    if (await db.execute(stmt)).scalar_one_or_none() is not None:
+        return True, None
+    result = await db.execute(
+        select(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+    )
+    return False, result.scalar_one_or_none()
+
+
+async def complete_keys(db: AsyncSession, user_id: UUID, keys: Sequence[str], response: Dict[str, Any]):
+    """
+    Stores the (JSON-compatible) response for every key in the session's transaction.
+    """
+    if not keys:
+        return
+    await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key.in_(keys))
+        .values(status=IdempotencyStatus.COMPLETED, response=response, completed_at=datetime.utcnow())
+    )
+
+
+async def release_keys(db: AsyncSession, user_id: UUID, keys: Sequence[str]):
+    """
+    Forgets in-progress keys whose request failed, so a retry runs it again.
+    """
+    if not keys:
+        return
+    await db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key.in_(keys),
+            IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS,
+        )
+    )
+
+
+async def purge_expired_keys(db: AsyncSession) -> int:
+    result = await db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.created_at < datetime.utcnow() - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+        )
+    )
+    return result.rowcount
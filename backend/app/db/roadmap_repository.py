@@ -0,0 +1,56 @@
+import uuid
+from typing import Any, Dict, Tuple
+from uuid import UUID
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import MilestoneStatus, Roadmap, RoadmapMilestone
+
+
+def milestone_row(roadmap_id: UUID, ms: Dict[str, Any], milestone_id: UUID = None) -> Dict[str, Any]:
+    """
+    Column values of a milestone generated for `roadmap_id`.
+    """
+    row = {
+        "roadmap_id": roadmap_id,
+        "title": ms.get("title"),
+        "description": ms.get("description"),
+        "status": MilestoneStatus.PENDING,
+        "info": {
+            "projects": ms.get("projects", []),
+            "skills": ms.get("skills", []),
+            "semester": ms.get("semester", "")
+        },
+    }
+    if milestone_id is not None:
+        row["id"] = milestone_id
+    return row
+
+
+async def insert_roadmap(db: AsyncSession, user_id: UUID, roadmap_json: Dict[str, Any]) -> Tuple[UUID, Dict[str, Any]]:
+    """
+    Inserts a generated roadmap and its milestones in the session's transaction (the caller commits).
+    Ids are generated client-side, so the write is two statements: the roadmap row, then one multi-row
+    INSERT ... RETURNING for the milestones, with no flush, refresh or re-SELECT.
+    Returns (roadmap id, copy of `roadmap_json` with milestone ids); the stored content carries the ids too.
+    """
+    roadmap_id = uuid.uuid4()
+    milestones = [{**ms, "id": str(uuid.uuid4())} for ms in roadmap_json.get("milestones", [])]
+    content = {**roadmap_json, "milestones": milestones} if "milestones" in roadmap_json else dict(roadmap_json)
+
+    await db.execute(insert(Roadmap).values(
+        id=roadmap_id,
+        user_id=user_id,
+        title=roadmap_json.get("title", "Generated Career Roadmap"),
+        description=roadmap_json.get("summary", ""),
+        content=content,
+    ))
+    if milestones:
+        # One INSERT ... VALUES (...), (...) RETURNING batch; RETURNING rows follow the parameter order
+        result = await db.execute(
+            insert(RoadmapMilestone).returning(RoadmapMilestone.id, sort_by_parameter_order=True),
+            [milestone_row(roadmap_id, ms, UUID(ms["id"])) for ms in milestones],
+        )
+        inserted = [str(milestone_id) for milestone_id in result.scalars().all()]
+        if inserted != [ms["id"] for ms in milestones]:
+            raise RuntimeError(f"Inserted {len(inserted)} of {len(milestones)} milestones for roadmap {roadmap_id}")
+    return roadmap_id, content
@@ -0,0 +1,47 @@
+from typing import List, Sequence
+from uuid import UUID
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import TranscriptCourse
+from app.services.transcript_parser import ParsedCourse
+
+
+async def replace_user_courses(db: AsyncSession, user_id: UUID, courses: Sequence[ParsedCourse]) -> int:
+    """
+    Replaces the user's parsed courses in the session's transaction (one DELETE, one multi-row INSERT).
+    """
+    await db.execute(delete(TranscriptCourse).where(TranscriptCourse.user_id == user_id))
+    if not courses:
+        return 0
+    await db.execute(insert(TranscriptCourse), [
+        {
+            "user_id": user_id,
+            "position": position,
+            "term": course.term or None,
+            "course_code": course.code,
+            "title": course.title or None,
+            "credits": course.credits,
+            "grade": course.grade or None,
+            "grade_points": course.grade_points,
+        }
+        for position, course in enumerate(courses)
+    ])
+    return len(courses)
+
+
+async def fetch_user_courses(db: AsyncSession, user_id: UUID) -> List[ParsedCourse]:
+    """
+    Returns the user's courses in transcript order.
+    """
+    result = await db.execute(
+        select(
+            TranscriptCourse.course_code, TranscriptCourse.title, TranscriptCourse.term,
+            TranscriptCourse.credits, TranscriptCourse.grade,
+        )
+        .where(TranscriptCourse.user_id == user_id)
+        .order_by(TranscriptCourse.position)
+    )
+    return [
+        ParsedCourse(code=code, title=title or "", term=term or "", credits=credits, grade=grade or "")
+        for code, title, term, credits, grade in result.all()
+    ]
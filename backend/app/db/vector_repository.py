@@ -0,0 +1,115 @@
+import json
+import os
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+from pgvector import Vector
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from app.models.models import VectorStore
+
+# "executemany": multi-row INSERT batches through SQLAlchemy (works everywhere).
+# "copy": asyncpg COPY ... FROM STDIN in binary format (needs register_vector_codec on the engine).
+VECTOR_BULK_INSERT_METHOD = os.getenv("VECTOR_BULK_INSERT_METHOD", "executemany")
+
+COPY_COLUMNS = ["id", "user_id", "content", "content_hash", "metadata", "embedding"]
+
+
+def _encode_vector(value) -> bytes:
+    # SQLAlchemy's Vector type binds text ("[1.0,2.0]"); COPY records pass plain lists
+    if isinstance(value, str):
+        value = Vector.from_text(value)
+    elif not isinstance(value, Vector):
+        value = Vector(list(value))
+    return value.to_binary()
+
+
+async def _set_vector_codec(conn):
+    await conn.set_type_codec("vector", encoder=_encode_vector, decoder=Vector.from_binary, format="binary")
+
+
+def register_vector_codec(engine: AsyncEngine):
+    """
+    Installs a binary pgvector codec on every new asyncpg connection of `engine`.
+    The codec accepts the text form SQLAlchemy binds, so regular ORM queries keep working.
+    """
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.run_async(_set_vector_codec)
+
+
+async def lock_user_chunks(db: AsyncSession, user_id: UUID):
+    """
+    Takes a transaction-scoped advisory lock on the user's chunks (released on commit/rollback).
+    Unlike a profile row lock it also serializes users without a Profile row yet.
+    """
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtextextended(f"vector_store:{user_id}", 0))))
+
+
+async def fetch_user_chunk_hashes(db: AsyncSession, user_id: UUID) -> List[Tuple[UUID, Optional[str]]]:
+    """
+    Returns (id, content_hash) for every chunk stored for the user.
+    """
+    result = await db.execute(
+        select(VectorStore.id, VectorStore.content_hash).where(VectorStore.user_id == user_id)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def delete_chunks(db: AsyncSession, ids: Sequence[UUID]) -> int:
+    if not ids:
+        return 0
+    await db.execute(delete(VectorStore).where(VectorStore.id.in_(ids)))
+    return len(ids)
+
+
+async def bulk_insert_chunks(db: AsyncSession, rows: Sequence[Dict[str, Any]], method: str = None) -> int:
+    """
+    Inserts chunk rows (keys: user_id, content, content_hash, embedding, metadata) in the session's transaction.
+    Bypasses ORM unit-of-work bookkeeping; the caller commits.
+    """
+    if not rows:
+        return 0
+    method = method or VECTOR_BULK_INSERT_METHOD
+    if method == "copy":
+        return await _copy_chunks(db, rows)
+
+    await db.execute(
+        insert(VectorStore),
+        [
+            {
+                "id": uuid.uuid4(),
+                "user_id": row["user_id"],
+                "content": row["content"],
+                "content_hash": row.get("content_hash"),
+                "metadata_": row.get("metadata", {}),
+                "embedding": row["embedding"],
+            }
+            for row in rows
+        ],
+    )
+    return len(rows)
+
+
+async def _copy_chunks(db: AsyncSession, rows: Sequence[Dict[str, Any]]) -> int:
+    conn = await db.connection()
+    # The asyncpg adapter opens its transaction lazily on the first statement;
+    # make sure COPY runs inside the session's transaction instead of autocommitting.
+    await conn.exec_driver_sql("SELECT 1")
+    raw = await conn.get_raw_connection()
+
+    records = [
+        (
+            uuid.uuid4(),
+            row["user_id"],
+            row["content"],
+            row.get("content_hash"),
+            json.dumps(row.get("metadata", {})),
+            row["embedding"],
+        )
+        for row in rows
+    ]
+    await raw.driver_connection.copy_records_to_table(
+        VectorStore.__tablename__, records=records, columns=COPY_COLUMNS
+    )
+    return len(records)
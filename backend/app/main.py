@@ -1,13 +1,28 @@
-from fastapi import FastAPI, Request
+import time
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.models import models
-from app.api.v1.endpoints import chat, roadmaps, auth
-from app.core.logger import get_logger
+from app.api.v1.endpoints import chat, roadmaps, auth, assets, internal
+from app.core.logger import get_logger, logging_stats
+from app.services.pdf_extraction import pdf_extractor
+from app.services.ingest_jobs import ingest_queue
+from app.services.embedding_cache import embedding_cache
+from app.services.roadmap_cache import roadmap_cache
+from app.services.roadmap_engine import roadmap_flights
+from app.services.model_registry import model_registry
+from app.services.prompt_assembly import start_encoding
+from app.core.principal_cache import principal_cache
+from app.core.security import password_hasher
+from app.core.debug_capture import debug_capture
+from app.core.metrics import REGISTRY, Gauge, Histogram
+from app.api.deps import require_internal_token
+from app.db.session import pool_stats
 from dotenv import load_dotenv
 
 load_dotenv()
 
-logger = get_logger()
+logger = get_logger(__name__)
 
 app = FastAPI(title="Student Career Counselor AI")
 
@@ -25,18 +40,97 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response starts (streaming bodies are not included)",
+    labelnames=("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled (including streaming bodies)")
+
+for prefix, collect in (
+    ("pdf_extraction", pdf_extractor.stats),
+    ("ingest_queue", ingest_queue.stats),
+    ("embedding_cache", embedding_cache.stats),
+    ("roadmap_cache", roadmap_cache.stats),
+    ("principal_cache", principal_cache.stats),
+    ("password_hasher", password_hasher.stats),
+    ("db_pool", pool_stats),
+    ("logging", logging_stats),
+    ("debug_capture", debug_capture.stats),
+    ("model_registry", model_registry.stats),
+    ("roadmap_flights", roadmap_flights.stats),
+):
+    REGISTRY.register_collector(prefix, collect)
+
+def _route_template(scope) -> str:
+    # Label by route template, never the raw path, to keep label cardinality bounded
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    route = scope.get("route")
+    return getattr(context, "path_format", None) or getattr(route, "path_format", None) or "unmatched"
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware: BaseHTTPMiddleware would wrap the SSE bodies and get in the way of
+    streaming and disconnect propagation. Times requests until the response starts.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        recorded = False
+
+        def record(status: int):
+            nonlocal recorded
+            if not recorded:
+                recorded = True
+                HTTP_REQUEST_SECONDS.labels(scope["method"], _route_template(scope), status).observe(time.perf_counter() - start)
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                record(message["status"])
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # No response started: the app raised
+            record(500)
+
+app.add_middleware(RequestMetricsMiddleware)
+
 @app.on_event("startup")
 async def startup_event():
     logger.info("Application starting up...")
+    pdf_extractor.start()
+    password_hasher.start()
+    await start_encoding()
+    await model_registry.start()
+    await ingest_queue.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Application shutting down...")
+    await ingest_queue.stop()
+    pdf_extractor.shutdown()
+    password_hasher.shutdown()
+    await model_registry.shutdown()
 
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(chat.router, prefix="/api/v1")
 app.include_router(roadmaps.router, prefix="/api/v1/roadmaps")
+app.include_router(assets.router, prefix="/api/v1/assets", tags=["assets"])
+app.include_router(internal.router, prefix="/internal", tags=["internal"], include_in_schema=False)
+if internal.debug_captures_available():
+    app.include_router(internal.debug_router, prefix="/internal", tags=["internal"], include_in_schema=False)
 from app.api.v1.endpoints import profile
 app.include_router(profile.router, prefix="/api/v1/users/profile", tags=["profile"])
 
@@ -44,6 +138,20 @@ app.include_router(profile.router, prefix="/api/v1/users/profile", tags=["profil
 def read_root():
     return {"message": "Welcome to Career Compass API"}
 
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_internal_token)])
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "pdf_extraction": pdf_extractor.stats(),
+        "ingest_queue": ingest_queue.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "roadmap_cache": roadmap_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "model_registry": model_registry.stats(),
+        "roadmap_flights": roadmap_flights.stats()
+    }
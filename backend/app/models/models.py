@@ -1,12 +1,15 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, Enum, JSON, Float
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, Enum, JSON, Float, LargeBinary, Index, Integer, Computed
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from pgvector.sqlalchemy import Vector
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.db.base import Base
 import enum
 
+# Text search configuration of vector_store.content_tsv; queries must use the same one
+CONTENT_TSV_CONFIG = "english"
+
 class AcademicLevel(str, enum.Enum):
     HIGH_SCHOOL = "HighSchool"
     UNDERGRADUATE = "Undergraduate"
@@ -27,6 +30,16 @@ class ChatRole(str, enum.Enum):
     USER = "user"
     ASSISTANT = "assistant"
 
+class IngestJobStatus(str, enum.Enum):
+    QUEUED = "Queued"
+    RUNNING = "Running"
+    SUCCEEDED = "Succeeded"
+    FAILED = "Failed"
+
+class IdempotencyStatus(str, enum.Enum):
+    IN_PROGRESS = "In_Progress"
+    COMPLETED = "Completed"
+
 class User(Base):
     __tablename__ = "users"
 
@@ -39,7 +52,9 @@ class User(Base):
     
     # Identity Management
     display_name = Column(String, nullable=True)
-    avatar_base64 = Column(Text, nullable=True) # Storing base64 string directly
+    # Content hashes into the assets table (see scripts/migrate_avatars.py)
+    avatar_hash = Column(String(64), ForeignKey("assets.hash"), nullable=True)
+    avatar_thumbnail_hash = Column(String(64), ForeignKey("assets.hash"), nullable=True)
 
     profile = relationship("Profile", back_populates="user", uselist=False)
     roadmaps = relationship("Roadmap", back_populates="user")
@@ -59,9 +74,30 @@ class Profile(Base):
     extracurriculars = Column(JSONB, default=list)
     manual_gpa = Column(Float, nullable=True)
     manual_major = Column(String, nullable=True)
+    # Computed from transcript_courses at ingest; manual values take precedence
+    derived_gpa = Column(Float, nullable=True)
+    derived_major = Column(String, nullable=True)
 
     user = relationship("User", back_populates="profile")
 
+class TranscriptCourse(Base):
+    __tablename__ = "transcript_courses"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    position = Column(Integer, nullable=False) # Order on the transcript
+    term = Column(String, nullable=True)
+    course_code = Column(String(32), nullable=False)
+    title = Column(String, nullable=True)
+    credits = Column(Float, nullable=True)
+    grade = Column(String(8), nullable=True)
+    grade_points = Column(Float, nullable=True) # 4.0 scale, NULL for P/W/I style grades
+
+    __table_args__ = (
+        Index("ix_transcript_courses_user_id_position", "user_id", "position"),
+        Index("ix_transcript_courses_user_id_course_code", "user_id", "course_code"),
+    )
+
 class Roadmap(Base):
     __tablename__ = "roadmaps"
 
@@ -115,6 +151,65 @@ class VectorStore(Base):
     __tablename__ = "vector_store"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Promoted from metadata->>'user_id' so retrieval can filter through a B-tree index
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True, index=True)
     content = Column(Text, nullable=False)
+    content_hash = Column(String(64), nullable=True) # SHA-256 of the normalized chunk, used to diff re-uploads
     metadata_ = Column("metadata", JSONB, default={}) # metadata is a reserved word in some contexts, but valid column name
     embedding = Column(Vector(768)) # Gemini Embeddings dimension
+    # Maintained by Postgres for the lexical half of hybrid retrieval; never loaded with the row
+    content_tsv = deferred(Column(TSVECTOR, Computed(f"to_tsvector('{CONTENT_TSV_CONFIG}'::regconfig, content)", persisted=True)))
+
+    __table_args__ = (
+        Index("ix_vector_store_user_id_content_hash", "user_id", "content_hash"),
+        Index("ix_vector_store_content_tsv", "content_tsv", postgresql_using="gin"),
+    )
+
+class Asset(Base):
+    __tablename__ = "assets"
+
+    # SHA-256 of the stored bytes; identical images are stored once and never change
+    hash = Column(String(64), primary_key=True)
+    content_type = Column(String, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class EmbeddingCache(Base):
+    __tablename__ = "embedding_cache"
+
+    # Keyed by model + SHA-256 of the normalized chunk text, so identical chunks are embedded once
+    model = Column(String, primary_key=True)
+    content_hash = Column(String(64), primary_key=True)
+    embedding = Column(Vector(768), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    filename = Column(String, nullable=True)
+    status = Column(Enum(IngestJobStatus), default=IngestJobStatus.QUEUED, nullable=False, index=True)
+    stage = Column(String, nullable=True) # Stage currently running (extract, chunk, embed, ...)
+    timings = Column(JSONB, default=dict) # Seconds spent per stage
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+    payload = Column(LargeBinary, nullable=True) # Uploaded PDF, cleared once the job finishes
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # Idempotency-Key header values are only unique per client, so keys are scoped to the user
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False) # Fingerprint of the request body the key was first used with
+    status = Column(Enum(IdempotencyStatus), default=IdempotencyStatus.IN_PROGRESS, nullable=False)
+    response = Column(JSONB, nullable=True) # Replayed for retries once completed
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from uuid import UUID
+from datetime import datetime
+
+class IngestJobAccepted(BaseModel):
+    job_id: UUID
+    status: str
+    status_url: str
+
+class IngestJobResponse(BaseModel):
+    id: UUID
+    filename: Optional[str] = None
+    status: str
+    stage: Optional[str] = None
+    timings: Dict[str, float] = {}
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
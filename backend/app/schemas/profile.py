@@ -11,6 +11,7 @@ class ProfileUpdate(BaseModel):
     
     # Identity
     display_name: Optional[str] = None
+    # Image upload as a data URL; stored as an asset and returned as avatar_url
     avatar_base64: Optional[str] = None
 
 class ProfileResponse(BaseModel):
@@ -21,10 +22,14 @@ class ProfileResponse(BaseModel):
     manual_gpa: Optional[float] = None
     manual_major: Optional[str] = None
     transcript_summary: Optional[str] = None
+    # Parsed from the uploaded transcript
+    derived_gpa: Optional[float] = None
+    derived_major: Optional[str] = None
     
     # Identity
     display_name: Optional[str] = None
-    avatar_base64: Optional[str] = None
+    avatar_url: Optional[str] = None
+    avatar_thumbnail_url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class MilestoneSchema(BaseModel):
+    semester: str = Field(description="When this happens, e.g. 'Semester 1'")
+    title: str
+    description: str
+    status: str = "Upcoming"
+    projects: List[str] = []
+    skills: List[str] = []
+
+class RoadmapHeaderSchema(BaseModel):
+    title: str
+    summary: str = Field(description="Brief summary of the roadmap")
+
+class RoadmapSchema(RoadmapHeaderSchema):
+    """
+    Response schema for roadmap generation; also sent to the model in structured output mode.
+    """
+    milestones: List[MilestoneSchema] = Field(min_length=1)
@@ -1,5 +1,10 @@
 import os
-from typing import List
+import asyncio
+import hashlib
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from fastapi import UploadFile, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -9,30 +14,249 @@ from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGener
 from app.models.models import VectorStore
 import io
 from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages.ai import add_usage
+from app.core.logger import get_logger
+from app.core.metrics import Counter
+from app.services.model_registry import model_registry
+from app.services.prompt_assembly import PromptAssembler
 
 # Configure Google AI
 import google.generativeai as genai
 
+logger = get_logger(__name__)
+
+LLM_TOKENS = Counter("llm_tokens", "LLM tokens consumed", labelnames=("operation", "kind"))
+LLM_REQUESTS = Counter("llm_requests", "LLM calls", labelnames=("operation", "outcome"))
+
+def record_llm_usage(operation: str, usage) -> None:
+    """
+    Adds a LangChain usage_metadata dict (input_tokens/output_tokens) to the token counters.
+    """
+    if not usage:
+        return
+    LLM_TOKENS.labels(operation, "input").inc(usage.get("input_tokens", 0) or 0)
+    LLM_TOKENS.labels(operation, "output").inc(usage.get("output_tokens", 0) or 0)
+
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
 if not GOOGLE_API_KEY:
-    print("CRITICAL WARNING: GOOGLE_API_KEY is missing from environment variables! AI features will fail.")
+    logger.critical("GOOGLE_API_KEY is missing from environment variables! AI features will fail.")
 else:
     genai.configure(api_key=GOOGLE_API_KEY)
 
-def get_embeddings_model():
-    if not GOOGLE_API_KEY:
-        raise ValueError("GOOGLE_API_KEY not found in environment")
-    return GoogleGenerativeAIEmbeddings(model="models/text-embedding-004", google_api_key=GOOGLE_API_KEY)
+def get_embeddings_model() -> GoogleGenerativeAIEmbeddings:
+    # Shared instance: the client and its keep-alive connections live for the whole process
+    return model_registry.embeddings_model()
+
+def get_llm() -> ChatGoogleGenerativeAI:
+    return model_registry.chat_model()
+
+
+# --- Embedding client: batching, bounded concurrency, rate limiting and retries ---
+
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "google")  # "fake" for offline runs/benchmarks
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))  # Gemini batch endpoint accepts up to 100 texts
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+EMBED_RATE_PER_SECOND = float(os.getenv("EMBED_RATE_PER_SECOND", "5"))  # Batch requests per second
+EMBED_RATE_BURST = int(os.getenv("EMBED_RATE_BURST", "10"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+EMBED_BACKOFF_BASE = float(os.getenv("EMBED_BACKOFF_BASE_SECONDS", "0.5"))
+EMBED_BACKOFF_MAX = float(os.getenv("EMBED_BACKOFF_MAX_SECONDS", "20"))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class EmbeddingProviderError(Exception):
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class EmbeddingProvider(ABC):
+    model_name: str
+
+    @abstractmethod
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        ...
+
+    async def embed_query(self, text: str) -> List[float]:
+        return (await self.embed_batch([text]))[0]
+
+class GoogleEmbeddingProvider(EmbeddingProvider):
+    def __init__(self, model: GoogleGenerativeAIEmbeddings = None):
+        self._model = model or get_embeddings_model()
+        self.model_name = self._model.model
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return await self._model.aembed_documents(texts)
+
+    async def embed_query(self, text: str) -> List[float]:
+        return await self._model.aembed_query(text)
+
+class FakeEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic offline provider: vectors are derived from a hash of the text.
+    Simulates per-request latency and an optional rate of retryable failures.
+    """
+    model_name = "fake-embedding"
+
+    def __init__(self, dimensions: int = 768, latency: float = 0.05, failure_rate: float = 0.0):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+        return [rng.uniform(-1, 1) for _ in range(self.dimensions)]
 
-def get_llm():
-    if not GOOGLE_API_KEY:
-        raise ValueError("GOOGLE_API_KEY not found in environment")
-    return ChatGoogleGenerativeAI(model="gemini-flash-latest", google_api_key=GOOGLE_API_KEY)
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise EmbeddingProviderError("Simulated rate limit", status_code=429)
+        return [self._vector(t) for t in texts]
+
+class TokenBucket:
+    """
+    Async token bucket: refills `rate` tokens per second up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+def _error_status_code(exc: BaseException):
+    # Provider SDKs expose the HTTP status as `code` or `status_code`; LangChain wraps them via `raise ... from`
+    while exc is not None:
+        for attr in ("status_code", "code"):
+            code = getattr(exc, attr, None)
+            if isinstance(code, int):
+                return code
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+class EmbeddingClient:
+    """
+    Splits texts into batches and embeds them with bounded concurrency,
+    token-bucket rate limiting and jittered exponential backoff on 429/5xx.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        batch_size: int = EMBED_BATCH_SIZE,
+        max_concurrency: int = EMBED_MAX_CONCURRENCY,
+        rate_limiter: TokenBucket = None,
+        max_retries: int = EMBED_MAX_RETRIES,
+        backoff_base: float = EMBED_BACKOFF_BASE,
+        backoff_max: float = EMBED_BACKOFF_MAX,
+    ):
+        self.provider = provider
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_limiter = rate_limiter or TokenBucket(EMBED_RATE_PER_SECOND, EMBED_RATE_BURST)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = None
+        self.batches = 0
+        self.retries = 0
+        self.failures = 0
+
+    @property
+    def model_name(self) -> str:
+        return self.provider.model_name
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so the client can be constructed outside a running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _call_with_retry(self, call):
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire()
+            try:
+                return await call()
+            except Exception as e:
+                status_code = _error_status_code(e)
+                if status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"Embedding request failed with {status_code}, retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        async with self._get_semaphore():
+            self.batches += 1
+            return await self._call_with_retry(lambda: self.provider.embed_batch(batch))
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = await asyncio.gather(*[self._embed_batch(batch) for batch in batches])
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    async def embed_query(self, text: str) -> List[float]:
+        async with self._get_semaphore():
+            return await self._call_with_retry(lambda: self.provider.embed_query(text))
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model_name,
+            "batches": self.batches,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
+
+_embedding_client: EmbeddingClient = None
+
+def get_embedding_client() -> EmbeddingClient:
+    global _embedding_client
+    if _embedding_client is None:
+        if EMBEDDING_PROVIDER == "fake":
+            provider = FakeEmbeddingProvider()
+        else:
+            provider = GoogleEmbeddingProvider()
+        _embedding_client = EmbeddingClient(provider)
+    return _embedding_client
 
 
-import pdfplumber
 from app.models.models import VectorStore, Profile
+from app.services.pdf_extraction import pdf_extractor
+from app.services.embedding_cache import embedding_cache, chunk_hash
+from app.services.vector_search import (
+    HYBRID_CANDIDATES,
+    HYBRID_RETRIEVAL,
+    is_decisive,
+    reciprocal_rank_fusion,
+    search_user_chunks,
+    search_user_chunks_lexical,
+)
+from app.db.vector_repository import fetch_user_chunk_hashes, lock_user_chunks, delete_chunks, bulk_insert_chunks
+from app.db.transcript_repository import replace_user_courses
+from app.services.transcript_parser import parse_transcript, parse_succeeded, compute_gpa, derive_major
+from app.core.timing import StageTimer
 from sqlalchemy import update
 from uuid import UUID
 
@@ -40,100 +264,266 @@ from uuid import UUID
 
 async def process_transcript(user_id: UUID, file: UploadFile, db: AsyncSession):
     """
-    Reads a PDF using pdfplumber, extracts text, saves to Profile, and updates VectorStore.
+    Reads an uploaded PDF and runs the full ingestion pipeline inline.
+    The /upload-transcript endpoint goes through the ingest job queue instead.
     """
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="File must be a PDF")
 
     content = await file.read()
-    
-    # Extract Text with pdfplumber
-    text = ""
-    with pdfplumber.open(io.BytesIO(content)) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
+    return await ingest_transcript(user_id, content, file.filename, db, StageTimer(operation="ingest"))
+
+def _diff_user_chunks(stored: List[Tuple[UUID, Optional[str]]], chunks_by_hash: Dict[str, str]):
+    """
+    Returns (stale row ids, hashes to insert, hashes already stored) for the user's stored (id, hash) rows.
+    """
+    kept_hashes = set()
+    stale_ids = []
+    for row_id, row_hash in stored:
+        # Drop rows whose chunk vanished, duplicates of a kept chunk, and legacy rows without a hash
+        if row_hash in chunks_by_hash and row_hash not in kept_hashes:
+            kept_hashes.add(row_hash)
+        else:
+            stale_ids.append(row_id)
+    return stale_ids, [h for h in chunks_by_hash if h not in kept_hashes], kept_hashes
+
+async def ingest_transcript(user_id: UUID, content: bytes, filename: str, db: AsyncSession, timer: StageTimer = None):
+    """
+    Extracts text from PDF bytes, saves it to Profile, and incrementally updates the user's VectorStore chunks:
+    chunks are diffed by content hash, only new ones are embedded and inserted, vanished ones are deleted.
+    Course rows are parsed into transcript_courses, with the derived GPA and major stored on the Profile,
+    when parsing clearly succeeded; otherwise no rows are stored and the raw text is used for roadmaps.
+    Embedding runs outside any transaction; all writes happen in one transaction under a per-user advisory
+    lock taken afterwards (the diff is redone under it). `db` must have no pending work: it is rolled back. Each stage is timed on `timer` (extract, parse, chunk, diff, embed, db_insert).
+    """
+    if timer is None:
+        timer = StageTimer()
+
+    # Extract Text (and tables) with pdfplumber (off the event loop, in the extraction process pool)
+    async with timer.stage("extract"):
+        extracted = await pdf_extractor.extract(content)
+        text = extracted.text
 
     if not text.strip():
         raise HTTPException(status_code=400, detail="Could not extract text from PDF")
 
-    # Update Profile
-    # Check if profile exists
-    result = await db.execute(select(Profile).where(Profile.id == user_id))
-    profile = result.scalar_one_or_none()
-    
-    if profile:
-        profile.transcript_summary = text
-    else:
-        # Create new profile if it doesn't exist (though usually it should)
-        profile = Profile(id=user_id, transcript_summary=text)
-        db.add(profile)
-    
-    # We commit here to save the transcript text
-    await db.commit()
+    # Course rows for the compact transcript and GPA/major derivation
+    async with timer.stage("parse"):
+        courses = parse_transcript(text, extracted.tables)
+        if not parse_succeeded(courses, text):
+            logger.info(f"Transcript {filename}: {len(courses)} course rows are not a reliable parse, keeping raw text only")
+            courses = []
+        derived_gpa = compute_gpa(courses)
+        derived_major = derive_major(text, courses)
 
     # Chunking for Vector Store (RAG)
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len,
-    )
-    chunks = text_splitter.split_text(text)
-
-    # Embedding
-    embeddings_model = get_embeddings_model()
-    vectors = embeddings_model.embed_documents(chunks)
-
-    # Storage
-    for chunk, vector in zip(chunks, vectors):
-        db_item = VectorStore(
-            content=chunk,
-            embedding=vector,
-            metadata_={"source": file.filename, "type": "transcript", "user_id": str(user_id)}
+    async with timer.stage("chunk"):
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1000,
+            chunk_overlap=200,
+            length_function=len,
         )
-        db.add(db_item)
-    
-    await db.commit()
-    return {"message": f"Processed {len(chunks)} chunks from {file.filename}", "transcript_length": len(text)}
+        chunks_by_hash = {}
+        for chunk in text_splitter.split_text(text):
+            chunks_by_hash.setdefault(chunk_hash(chunk), chunk)
+
+    # Diff against the chunks already stored for this user
+    async with timer.stage("diff"):
+        stale_ids, new_hashes, kept_hashes = _diff_user_chunks(await fetch_user_chunk_hashes(db, user_id), chunks_by_hash)
+        # End the read transaction: no connection sits idle in a transaction while the provider embeds
+        await db.rollback()
+
+    vectors_by_hash = {}
+    while True:
+        # Embedding (outside any transaction; cache rows are written in their own)
+        async with timer.stage("embed"):
+            # Only new chunks missing from the embedding cache reach the provider
+            missing = [h for h in new_hashes if h not in vectors_by_hash]
+            if missing:
+                vectors_by_hash.update(zip(missing, await embedding_cache.embed_documents(
+                    get_embedding_client(), [chunks_by_hash[h] for h in missing]
+                )))
+
+        # Storage
+        async with timer.stage("db_insert"):
+            # Serialize uploads of the same user from here to commit, also when the profile row does not exist yet
+            await lock_user_chunks(db, user_id)
+
+            # Re-diff under the lock: a concurrent upload may have changed the stored chunks meanwhile.
+            # If it removed chunks we meant to keep, release the lock and embed them first (usually cache hits).
+            stale_ids, new_hashes, kept_hashes = _diff_user_chunks(await fetch_user_chunk_hashes(db, user_id), chunks_by_hash)
+            if any(h not in vectors_by_hash for h in new_hashes):
+                await db.rollback()
+                continue
+
+            result = await db.execute(select(Profile).where(Profile.id == user_id))
+            profile = result.scalar_one_or_none()
+            if not profile:
+                # Create new profile if it doesn't exist (though usually it should)
+                profile = Profile(id=user_id)
+                db.add(profile)
+            profile.transcript_summary = text
+            profile.derived_gpa = derived_gpa
+            profile.derived_major = derived_major
+
+            await replace_user_courses(db, user_id, courses)
+
+            await delete_chunks(db, stale_ids)
+            await bulk_insert_chunks(db, [
+                {
+                    "user_id": user_id,
+                    "content": chunks_by_hash[h],
+                    "content_hash": h,
+                    "embedding": vectors_by_hash[h],
+                    "metadata": {"source": filename, "type": "transcript", "user_id": str(user_id)}
+                }
+                for h in new_hashes
+            ])
+
+            await db.commit()
+        break
+
+    return {
+        "message": f"Processed {len(chunks_by_hash)} chunks from {filename}",
+        "transcript_length": len(text),
+        "courses_parsed": len(courses),
+        "derived_gpa": derived_gpa,
+        "derived_major": derived_major,
+        "chunks_inserted": len(new_hashes),
+        "chunks_deleted": len(stale_ids),
+        "chunks_unchanged": len(kept_hashes),
+    }
+
+# Prompt token budgets (tiktoken counts)
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "2000"))
+CHAT_QUERY_TOKENS = int(os.getenv("CHAT_QUERY_TOKENS", "500"))
+
+CHAT_SYSTEM_PROMPT = """You are an expert Student Career Counselor AI. 
+    Use the provided context (student transcripts, career info) to answer variables.
+    If the context doesn't have enough info, say so, but try to be helpful based on general knowledge.
+    """
+
+RETRIEVAL_QUERIES = Counter(
+    "retrieval_queries", "Context retrievals by path (lexical = embedding skipped)", labelnames=("mode",)
+)
 
-async def query_vector_db(query: str, db: AsyncSession, limit: int = 3):
+async def retrieve_context(query: str, db: AsyncSession, user_id: UUID, limit: int = 3, timer: StageTimer = None) -> List[VectorStore]:
+    """
+    Returns the user's most relevant transcript chunks (stages: lexical, embed, retrieve).
+    With HYBRID_RETRIEVAL, full-text hits are fused with ANN hits (reciprocal rank fusion), and a
+    decisive lexical match (e.g. an exact course code) is returned without calling the embedding API.
+    """
+    if timer is None:
+        timer = StageTimer(operation="chat")
+
+    lexical = []
+    if HYBRID_RETRIEVAL:
+        async with timer.stage("lexical"):
+            lexical = await search_user_chunks_lexical(db, user_id, query, limit=max(limit, HYBRID_CANDIDATES))
+        if is_decisive(lexical):
+            RETRIEVAL_QUERIES.labels("lexical").inc()
+            return [hit.chunk for hit in lexical[:limit]]
+
+    async with timer.stage("embed"):
+        query_vector = await get_embedding_client().embed_query(query)
+    async with timer.stage("retrieve"):
+        # Filtered ANN over this user's chunks only
+        nearest = await search_user_chunks(db, user_id, query_vector, limit=max(limit, HYBRID_CANDIDATES) if lexical else limit)
+    if not lexical:
+        RETRIEVAL_QUERIES.labels("vector").inc()
+        return nearest[:limit]
+    RETRIEVAL_QUERIES.labels("hybrid").inc()
+    return reciprocal_rank_fusion([[hit.chunk for hit in lexical], nearest], limit=limit)
+
+def build_chat_messages(query: str, matches: List[VectorStore]) -> list:
+    # Chunks arrive by relevance; overlapping neighbours are merged and the tail is cut to the budget
+    sections = (
+        PromptAssembler("chat")
+        .add("query", query, CHAT_QUERY_TOKENS)
+        .add("context", [m.content for m in matches], CHAT_CONTEXT_TOKENS, dedupe=True)
+        .render()
+    )
+    user_prompt = f"Context:\n{sections['context']}\n\nQuestion: {sections['query']}"
+    return [
+        SystemMessage(content=CHAT_SYSTEM_PROMPT),
+        HumanMessage(content=user_prompt)
+    ]
+
+def serialize_context(matches: List[VectorStore]) -> List[dict]:
+    return [{"content": m.content, "metadata": m.metadata_} for m in matches]
+
+def _message_text(content) -> str:
+    if isinstance(content, list):
+        return "".join([c if isinstance(c, str) else c.get("text", "") for c in content])
+    return content or ""
+
+async def query_vector_db(query: str, db: AsyncSession, user_id: UUID, limit: int = 3):
     """
     1. Embeds query.
-    2. Searches VectorDB.
+    2. Searches the user's chunks in the VectorDB.
     3. Calls LLM with context.
     """
-    # 1. Embed Query
-    embeddings_model = get_embeddings_model()
-    query_vector = embeddings_model.embed_query(query)
-
-    # 2. Search DB
-    stmt = select(VectorStore).order_by(
-        VectorStore.embedding.l2_distance(query_vector)
-    ).limit(limit)
-    
-    result = await db.execute(stmt)
-    matches = result.scalars().all()
-    
-    context_str = "\n\n".join([m.content for m in matches])
-    sources = [m.metadata_ for m in matches]
+    timer = StageTimer(operation="chat")
+
+    # 1 + 2. Embed query and search DB
+    matches = await retrieve_context(query, db, user_id, limit=limit, timer=timer)
 
     # 3. Call LLM
     llm = get_llm()
-    
-    system_prompt = """You are an expert Student Career Counselor AI. 
-    Use the provided context (student transcripts, career info) to answer variables.
-    If the context doesn't have enough info, say so, but try to be helpful based on general knowledge.
-    """
-    
-    user_prompt = f"Context:\n{context_str}\n\nQuestion: {query}"
-    
-    response = llm.invoke([
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=user_prompt)
-    ])
+    async with timer.stage("llm"):
+        try:
+            response = await llm.ainvoke(build_chat_messages(query, matches))
+        except Exception:
+            LLM_REQUESTS.labels("chat", "error").inc()
+            raise
+    LLM_REQUESTS.labels("chat", "ok").inc()
+    record_llm_usage("chat", response.usage_metadata)
 
     return {
         "reply": response.content,
-        "context": [{"content": m.content, "metadata": m.metadata_} for m in matches]
+        "context": serialize_context(matches)
+    }
+
+async def stream_chat_completion(query: str, matches: List[VectorStore]) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Streams the LLM answer as ("token", {"delta": ...}) events, then one ("done", {...}) event with usage.
+    Closing this generator early (client disconnect) closes the upstream stream as well.
+    """
+    llm = get_llm()
+    timer = StageTimer(operation="chat")
+    start = time.perf_counter()
+    first_token_at = None
+    usage = None
+    outcome = "error"
+
+    stream = llm.astream(build_chat_messages(query, matches))
+    # Only the waits on the provider are timed, not the consumer's SSE writes between tokens
+    chunks = timer.iterate("llm", stream)
+    try:
+        async for chunk in chunks:
+            if chunk.usage_metadata:
+                usage = add_usage(usage, chunk.usage_metadata)
+            delta = _message_text(chunk.content)
+            if delta:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield "token", {"delta": delta}
+        outcome = "ok"
+    except (GeneratorExit, asyncio.CancelledError):
+        # The client went away; not a provider error
+        outcome = "disconnected"
+        raise
+    finally:
+        await chunks.aclose()
+        await stream.aclose()
+        LLM_REQUESTS.labels("chat", outcome).inc()
+        record_llm_usage("chat", usage)
+
+    end = time.perf_counter()
+    yield "done", {
+        "usage": usage,
+        "timing": {
+            "time_to_first_token_ms": round((first_token_at - start) * 1000, 1) if first_token_at else None,
+            "generation_ms": round((end - start) * 1000, 1),
+        }
     }
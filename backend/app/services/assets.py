@@ -0,0 +1,110 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.logger import get_logger
+from app.models.models import Asset
+
+logger = get_logger(__name__)
+
+ASSET_MAX_UPLOAD_BYTES = int(os.getenv("ASSET_MAX_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+ASSET_MAX_PIXELS = int(os.getenv("ASSET_MAX_PIXELS", str(40_000_000)))
+AVATAR_MAX_SIZE = int(os.getenv("AVATAR_MAX_SIZE", "512"))
+AVATAR_THUMBNAIL_SIZE = int(os.getenv("AVATAR_THUMBNAIL_SIZE", "96"))
+AVATAR_FORMAT = os.getenv("AVATAR_FORMAT", "WEBP")
+AVATAR_QUALITY = int(os.getenv("AVATAR_QUALITY", "85"))
+# Assets are content-addressed, so a URL always refers to the same bytes
+ASSET_CACHE_CONTROL = os.getenv("ASSET_CACHE_CONTROL", "public, max-age=31536000, immutable")
+
+ASSET_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+_DATA_URL_RE = re.compile(r"^data:[^;,]*(;base64)?,", re.IGNORECASE)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def asset_etag(asset_hash: str) -> str:
+    return f'"{asset_hash}"'
+
+
+def decode_image_upload(value: str) -> bytes:
+    """
+    Accepts a data URL ("data:image/png;base64,...") or bare base64 and returns the raw bytes.
+    """
+    payload = _DATA_URL_RE.sub("", value.strip(), count=1)
+    try:
+        data = base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Avatar is not valid base64 image data")
+    if len(data) > ASSET_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Avatar exceeds {ASSET_MAX_UPLOAD_BYTES} bytes")
+    return data
+
+
+def _encode(image: Image.Image) -> Tuple[bytes, int, int]:
+    buffer = io.BytesIO()
+    image.save(buffer, format=AVATAR_FORMAT, quality=AVATAR_QUALITY)
+    return buffer.getvalue(), image.width, image.height
+
+
+def render_avatar(data: bytes) -> Tuple[Tuple[bytes, int, int], Tuple[bytes, int, int]]:
+    """
+    Decodes an uploaded image and returns (avatar, thumbnail) as (bytes, width, height).
+    The avatar is bounded to AVATAR_MAX_SIZE on its longest side; the thumbnail is a square center crop.
+    CPU-bound: call through asyncio.to_thread.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            if source.width * source.height > ASSET_MAX_PIXELS:
+                raise HTTPException(status_code=413, detail="Avatar dimensions are too large")
+            image = ImageOps.exif_transpose(source)
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise HTTPException(status_code=400, detail="Avatar is not a supported image")
+
+    avatar = image.copy()
+    avatar.thumbnail((AVATAR_MAX_SIZE, AVATAR_MAX_SIZE), Image.LANCZOS)
+    thumbnail = ImageOps.fit(image, (AVATAR_THUMBNAIL_SIZE, AVATAR_THUMBNAIL_SIZE), Image.LANCZOS)
+    return _encode(avatar), _encode(thumbnail)
+
+
+async def put_asset(db: AsyncSession, data: bytes, content_type: str, width: int = None, height: int = None) -> str:
+    """
+    Stores the bytes under their SHA-256 (a no-op if already present) in the session's transaction.
+    """
+    asset_hash = content_hash(data)
+    await db.execute(
+        pg_insert(Asset)
+        .values(hash=asset_hash, content_type=content_type, data=data, size=len(data), width=width, height=height)
+        .on_conflict_do_nothing(index_elements=["hash"])
+    )
+    return asset_hash
+
+
+async def store_avatar(db: AsyncSession, value: str) -> Tuple[str, str]:
+    """
+    Resizes an uploaded avatar and stores it with its thumbnail. Returns (avatar_hash, thumbnail_hash).
+    """
+    data = decode_image_upload(value)
+    (avatar, a_w, a_h), (thumbnail, t_w, t_h) = await asyncio.to_thread(render_avatar, data)
+    content_type = Image.MIME.get(AVATAR_FORMAT.upper(), "application/octet-stream")
+    avatar_hash = await put_asset(db, avatar, content_type, a_w, a_h)
+    thumbnail_hash = await put_asset(db, thumbnail, content_type, t_w, t_h)
+    logger.info(f"Stored avatar {avatar_hash[:12]} ({len(data)} -> {len(avatar)} bytes, thumbnail {len(thumbnail)} bytes)")
+    return avatar_hash, thumbnail_hash
+
+
+async def get_asset(db: AsyncSession, asset_hash: str) -> Optional[Asset]:
+    result = await db.execute(select(Asset).where(Asset.hash == asset_hash))
+    return result.scalar_one_or_none()
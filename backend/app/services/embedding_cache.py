@@ -0,0 +1,150 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Sequence
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.logger import get_logger
+from app.db.session import AsyncSessionLocal
+from app.models.models import EmbeddingCache
+
+logger = get_logger(__name__)
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_LRU_SIZE = int(os.getenv("EMBEDDING_CACHE_LRU_SIZE", "10000"))
+
+
+def normalize_chunk(text: str) -> str:
+    # Whitespace-only differences (re-extracted PDFs, trailing newlines) should hit the same entry
+    return " ".join(text.split())
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(normalize_chunk(text).encode("utf-8")).hexdigest()
+
+
+def _as_list(vector) -> List[float]:
+    # pgvector returns numpy arrays when numpy is available
+    return vector.tolist() if hasattr(vector, "tolist") else list(vector)
+
+
+class EmbeddingDocumentCache:
+    """
+    Two-tier cache for document embeddings: an in-process LRU in front of the embedding_cache table.
+    Only texts missing from both tiers are sent to the embedding client.
+    """
+
+    def __init__(self, max_entries: int = EMBEDDING_CACHE_LRU_SIZE, enabled: bool = EMBEDDING_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lru: "OrderedDict[tuple, List[float]]" = OrderedDict()
+        self.lru_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.chars_saved = 0
+        self._miss_seconds = 0.0
+
+    def _lru_get(self, key):
+        vector = self._lru.get(key)
+        if vector is not None:
+            self._lru.move_to_end(key)
+        return vector
+
+    def _lru_put(self, key, vector: List[float]):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    async def embed_documents(
+        self, client, texts: Sequence[str], session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+    ) -> List[List[float]]:
+        """
+        Returns one vector per text (in order), embedding only cache misses through `client`.
+        The table lookup and the insert of new vectors run in their own short transactions, so no
+        connection or cache row lock is held while the client embeds.
+        """
+        if not self.enabled:
+            return await client.embed_documents(list(texts))
+
+        model = client.model_name
+        hashes = [chunk_hash(t) for t in texts]
+        found: Dict[str, List[float]] = {}
+
+        # 1. In-process LRU
+        for h in set(hashes):
+            vector = self._lru_get((model, h))
+            if vector is not None:
+                found[h] = vector
+        lru_found = set(found)
+
+        # 2. Postgres
+        pending = [h for h in set(hashes) if h not in found]
+        if pending:
+            async with session_factory() as db:
+                result = await db.execute(
+                    select(EmbeddingCache.content_hash, EmbeddingCache.embedding)
+                    .where(EmbeddingCache.model == model, EmbeddingCache.content_hash.in_(pending))
+                )
+                rows = result.all()
+            for h, vector in rows:
+                found[h] = _as_list(vector)
+                self._lru_put((model, h), found[h])
+
+        # 3. Embed the misses (each distinct text once)
+        miss_texts: Dict[str, str] = {}
+        for h, text in zip(hashes, texts):
+            if h not in found and h not in miss_texts:
+                miss_texts[h] = text
+        if miss_texts:
+            start = time.perf_counter()
+            vectors = await client.embed_documents(list(miss_texts.values()))
+            self._miss_seconds += time.perf_counter() - start
+
+            rows = []
+            for h, vector in zip(miss_texts.keys(), vectors):
+                found[h] = _as_list(vector)
+                self._lru_put((model, h), found[h])
+                rows.append({"model": model, "content_hash": h, "embedding": found[h]})
+            async with session_factory() as db:
+                await db.execute(
+                    pg_insert(EmbeddingCache)
+                    .values(rows)
+                    .on_conflict_do_nothing(index_elements=["model", "content_hash"])
+                )
+                await db.commit()
+
+        misses = 0
+        for h, text in zip(hashes, texts):
+            if h in miss_texts:
+                misses += 1
+            elif h in lru_found:
+                self.lru_hits += 1
+                self.chars_saved += len(text)
+            else:
+                self.db_hits += 1
+                self.chars_saved += len(text)
+        self.misses += misses
+
+        logger.info(f"Embedding cache: {len(texts) - misses} hits, {misses} misses ({model})")
+        return [found[h] for h in hashes]
+
+    def stats(self) -> dict:
+        hits = self.lru_hits + self.db_hits
+        total = hits + self.misses
+        seconds_per_miss = self._miss_seconds / self.misses if self.misses else 0.0
+        return {
+            "enabled": self.enabled,
+            "lru_entries": len(self._lru),
+            "lru_hits": self.lru_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "chars_saved": self.chars_saved,
+            "estimated_seconds_saved": round(hits * seconds_per_miss, 3),
+        }
+
+
+embedding_cache = EmbeddingDocumentCache()
@@ -0,0 +1,235 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import List, Optional
+from uuid import UUID
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.logger import get_logger
+from app.core.timing import StageTimer
+from app.db.session import AsyncSessionLocal
+from app.models.models import IngestJob, IngestJobStatus
+from app.services.ai_service import ingest_transcript
+
+logger = get_logger(__name__)
+
+# "inprocess": asyncio workers inside the API process.
+# "database": the API only records the job; scripts/ingest_worker.py claims and runs it.
+INGEST_QUEUE_BACKEND = os.getenv("INGEST_QUEUE_BACKEND", "inprocess")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_QUEUE_MAX_SIZE = int(os.getenv("INGEST_QUEUE_MAX_SIZE", "100"))
+# A job still Running after this long belonged to a process that died; it is queued again.
+# Must exceed the longest ingestion, or a slow job runs twice.
+INGEST_JOB_TIMEOUT_SECONDS = float(os.getenv("INGEST_JOB_TIMEOUT_SECONDS", "1800"))
+
+
+async def claim_job(db: AsyncSession, job_id: UUID) -> bool:
+    """
+    Atomically moves a queued job to Running. False when another worker claimed it first
+    (or it is no longer queued). The caller commits.
+    """
+    result = await db.execute(
+        update(IngestJob)
+        .where(IngestJob.id == job_id, IngestJob.status == IngestJobStatus.QUEUED)
+        .values(status=IngestJobStatus.RUNNING, started_at=datetime.utcnow())
+        .returning(IngestJob.id)
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def requeue_stale_jobs(db: AsyncSession) -> List[UUID]:
+    """
+    Puts jobs Running for longer than INGEST_JOB_TIMEOUT_SECONDS back in the queue. The caller commits.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=INGEST_JOB_TIMEOUT_SECONDS)
+    result = await db.execute(
+        update(IngestJob)
+        .where(IngestJob.status == IngestJobStatus.RUNNING, IngestJob.started_at < cutoff)
+        .values(status=IngestJobStatus.QUEUED, stage=None, started_at=None)
+        .returning(IngestJob.id)
+    )
+    job_ids = list(result.scalars().all())
+    if job_ids:
+        logger.warning(f"Re-queued {len(job_ids)} ingest jobs left running for over {INGEST_JOB_TIMEOUT_SECONDS:g}s")
+    return job_ids
+
+
+async def run_ingest_job(job_id: UUID, claimed: bool = False):
+    """
+    Runs one ingestion job end to end, recording the current stage, per-stage timings and the outcome.
+    Unless the caller already `claimed` it, the job is claimed first and skipped if another worker has it.
+    Job bookkeeping uses its own session so progress is visible while the pipeline transaction runs.
+    """
+    async with AsyncSessionLocal() as job_db, AsyncSessionLocal() as db:
+        if not claimed:
+            claimed = await claim_job(job_db, job_id)
+            await job_db.commit()
+            if not claimed:
+                logger.info(f"Ingest job {job_id} was claimed elsewhere or is not queued, skipping")
+                return
+
+        job = await job_db.get(IngestJob, job_id)
+        if job is None:
+            logger.warning(f"Ingest job {job_id} not found")
+            return
+        if job.status != IngestJobStatus.RUNNING:
+            return
+
+        async def on_stage_start(stage: str):
+            job.stage = stage
+            await job_db.commit()
+
+        timer = StageTimer(on_stage_start=on_stage_start, operation="ingest")
+        try:
+            job.result = await ingest_transcript(job.user_id, job.payload, job.filename, db, timer)
+            job.status = IngestJobStatus.SUCCEEDED
+        except Exception as e:
+            await db.rollback()
+            job.status = IngestJobStatus.FAILED
+            job.error = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error(f"Ingest job {job_id} failed at stage {job.stage}: {job.error}")
+
+        job.finished_at = datetime.utcnow()
+        job.timings = {
+            **timer.timings,
+            "queue_wait": round((job.started_at - job.created_at).total_seconds(), 4),
+            "total": round((job.finished_at - job.started_at).total_seconds(), 4),
+        }
+        job.stage = None
+        job.payload = None
+        await job_db.commit()
+        logger.info(f"Ingest job {job_id} finished with status {job.status.value}: {job.timings}")
+
+
+async def claim_next_job(db: AsyncSession) -> Optional[UUID]:
+    """
+    Returns the oldest queued job id, locking it so concurrent workers skip it.
+    The caller must commit (after marking the job) to release the lock.
+    """
+    result = await db.execute(
+        select(IngestJob.id)
+        .where(IngestJob.status == IngestJobStatus.QUEUED)
+        .order_by(IngestJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    return result.scalar_one_or_none()
+
+
+class IngestQueue(ABC):
+    """
+    Where upload handlers hand off ingestion jobs. Implementations decide who runs them.
+    """
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def enqueue(self, job_id: UUID):
+        ...
+
+    def stats(self) -> dict:
+        return {"backend": INGEST_QUEUE_BACKEND}
+
+
+class InProcessIngestQueue(IngestQueue):
+    """
+    asyncio.Queue drained by a fixed number of worker tasks in this process.
+    """
+
+    def __init__(self, workers: int = INGEST_WORKERS, max_size: int = INGEST_QUEUE_MAX_SIZE):
+        self.workers = workers
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Ingest queue started with {self.workers} in-process workers")
+
+        self._tasks.append(asyncio.create_task(self._requeue_stale()))
+
+        # Re-queue jobs accepted before the last restart (other processes may enqueue them too; claims are atomic)
+        try:
+            async with AsyncSessionLocal() as db:
+                await requeue_stale_jobs(db)
+                await db.commit()
+                result = await db.execute(
+                    select(IngestJob.id)
+                    .where(IngestJob.status == IngestJobStatus.QUEUED)
+                    .order_by(IngestJob.created_at)
+                )
+                for job_id in result.scalars().all():
+                    await self.enqueue(job_id)
+        except Exception as e:
+            logger.error(f"Could not recover queued ingest jobs: {e}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, job_id: UUID):
+        if self._queue is None:
+            await self.start()
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Too many transcripts are being processed, please retry shortly")
+
+    async def _requeue_stale(self):
+        while True:
+            await asyncio.sleep(INGEST_JOB_TIMEOUT_SECONDS / 2)
+            try:
+                async with AsyncSessionLocal() as db:
+                    job_ids = await requeue_stale_jobs(db)
+                    await db.commit()
+                for job_id in job_ids:
+                    await self.enqueue(job_id)
+            except Exception as e:
+                logger.error(f"Could not re-queue stale ingest jobs: {e}")
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await run_ingest_job(job_id)
+            except Exception as e:
+                logger.error(f"Ingest worker {index} crashed on job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "inprocess",
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+class DatabaseIngestQueue(IngestQueue):
+    """
+    Leaves jobs in the ingest_jobs table for a separate worker process (scripts/ingest_worker.py).
+    """
+
+    async def enqueue(self, job_id: UUID):
+        # The job row is already committed with status Queued; the worker polls for it.
+        pass
+
+
+def _create_queue() -> IngestQueue:
+    if INGEST_QUEUE_BACKEND == "database":
+        return DatabaseIngestQueue()
+    return InProcessIngestQueue()
+
+
+ingest_queue = _create_queue()
@@ -0,0 +1,121 @@
+import asyncio
+import os
+import time
+from typing import Optional
+from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-flash-latest")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/text-embedding-004")
+ROADMAP_TEMPERATURE = float(os.getenv("ROADMAP_TEMPERATURE", "0.2"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+# Open the provider connections at startup (a model metadata lookup, no tokens billed)
+LLM_WARMUP = os.getenv("LLM_WARMUP", "false").lower() == "true"
+LLM_WARMUP_TIMEOUT = float(os.getenv("LLM_WARMUP_TIMEOUT_SECONDS", "10"))
+
+
+class ModelRegistry:
+    """
+    Process-wide Gemini chat and embedding clients.
+    Each LangChain model owns a google-genai client whose HTTP session keeps connections alive,
+    so sharing the instances avoids rebuilding clients and TLS handshakes on every request.
+    Models are built lazily (scripts work without start()); the app builds and optionally warms them at startup.
+    """
+
+    def __init__(self):
+        self._chat: Optional[ChatGoogleGenerativeAI] = None
+        self._roadmap: Optional[ChatGoogleGenerativeAI] = None
+        self._embeddings: Optional[GoogleGenerativeAIEmbeddings] = None
+        self._clients_created = 0
+        self._warmup_seconds: Optional[float] = None
+        self._warmup_errors = 0
+
+    @staticmethod
+    def _api_key() -> str:
+        if not GOOGLE_API_KEY:
+            raise ValueError("GOOGLE_API_KEY not found in environment")
+        return GOOGLE_API_KEY
+
+    def chat_model(self) -> ChatGoogleGenerativeAI:
+        if self._chat is None:
+            self._chat = ChatGoogleGenerativeAI(model=LLM_MODEL, google_api_key=self._api_key(), timeout=LLM_TIMEOUT)
+            self._clients_created += 1
+        return self._chat
+
+    def roadmap_model(self) -> ChatGoogleGenerativeAI:
+        if self._roadmap is None:
+            # Using a model capable of reliable JSON generation
+            self._roadmap = ChatGoogleGenerativeAI(
+                model=LLM_MODEL, google_api_key=self._api_key(), temperature=ROADMAP_TEMPERATURE, timeout=LLM_TIMEOUT
+            )
+            self._clients_created += 1
+        return self._roadmap
+
+    def embeddings_model(self) -> GoogleGenerativeAIEmbeddings:
+        if self._embeddings is None:
+            self._embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL, google_api_key=self._api_key())
+            self._clients_created += 1
+        return self._embeddings
+
+    async def start(self, warm_up: bool = LLM_WARMUP):
+        if not GOOGLE_API_KEY:
+            logger.warning("GOOGLE_API_KEY missing, model clients not created")
+            return
+        self.chat_model()
+        self.roadmap_model()
+        self.embeddings_model()
+        logger.info(f"Model clients ready ({LLM_MODEL}, {EMBEDDING_MODEL})")
+        if warm_up:
+            await self.warm_up()
+
+    async def warm_up(self):
+        """
+        Opens the HTTP session of every client on the running loop with a cheap metadata call.
+        Failures are logged, never raised: startup must not depend on the provider.
+        """
+        start = time.perf_counter()
+        models = [(self._chat, LLM_MODEL), (self._roadmap, LLM_MODEL), (self._embeddings, EMBEDDING_MODEL)]
+        results = await asyncio.gather(
+            *[
+                asyncio.wait_for(model.client.aio.models.get(model=name), LLM_WARMUP_TIMEOUT)
+                for model, name in models if model is not None
+            ],
+            return_exceptions=True,
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        self._warmup_errors += len(errors)
+        self._warmup_seconds = round(time.perf_counter() - start, 4)
+        if errors:
+            logger.warning(f"Model warm-up failed for {len(errors)} client(s): {errors[0]!r}")
+        else:
+            logger.info(f"Model clients warmed up in {self._warmup_seconds}s")
+
+    async def shutdown(self):
+        for model in (self._chat, self._roadmap):
+            if model is not None:
+                try:
+                    await model.aclose()
+                except Exception as e:
+                    logger.warning(f"Could not close chat client: {e}")
+        if self._embeddings is not None:
+            try:
+                await self._embeddings.client.aio.aclose()
+                self._embeddings.client.close()
+            except Exception as e:
+                logger.warning(f"Could not close embeddings client: {e}")
+        self._chat = self._roadmap = self._embeddings = None
+        logger.info("Model clients closed")
+
+    def stats(self) -> dict:
+        return {
+            "clients_created": self._clients_created,
+            "active_clients": sum(m is not None for m in (self._chat, self._roadmap, self._embeddings)),
+            "warmup_seconds": self._warmup_seconds,
+            "warmup_errors": self._warmup_errors,
+        }
+
+
+model_registry = ModelRegistry()
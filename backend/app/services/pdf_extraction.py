@@ -0,0 +1,162 @@
+import asyncio
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+import pdfplumber
+from fastapi import HTTPException
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "4"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_EXTRACTION_TIMEOUT = float(os.getenv("PDF_EXTRACTION_TIMEOUT_SECONDS", "60"))
+# Uploads allowed to wait on the pool at once; beyond this we shed load with a 503
+PDF_MAX_PENDING_UPLOADS = int(os.getenv("PDF_MAX_PENDING_UPLOADS", "16"))
+# Also run pdfplumber table detection (used to parse course rows); roughly doubles extraction time
+PDF_EXTRACT_TABLES = os.getenv("PDF_EXTRACT_TABLES", "true").lower() == "true"
+
+Table = List[List[Optional[str]]]
+
+
+@dataclass
+class PdfContent:
+    text: str
+    tables: List[Table] = field(default_factory=list)
+
+
+# --- Worker-side functions (run inside the process pool, must stay top-level/picklable) ---
+
+def _count_pages(content: bytes) -> int:
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_page_range(content: bytes, start: int, end: int, tables: bool = False) -> List[Tuple[str, List[Table]]]:
+    pages = []
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        for page in pdf.pages[start:end]:
+            pages.append((page.extract_text() or "", page.extract_tables() if tables else []))
+    return pages
+
+
+class PdfExtractionService:
+    """
+    Runs pdfplumber in a bounded process pool so text extraction never blocks the event loop.
+    Each upload is split into page ranges that are extracted in parallel.
+    """
+
+    def __init__(
+        self,
+        workers: int = PDF_WORKERS,
+        pages_per_task: int = PDF_PAGES_PER_TASK,
+        max_pages: int = PDF_MAX_PAGES,
+        timeout: float = PDF_EXTRACTION_TIMEOUT,
+        max_pending_uploads: int = PDF_MAX_PENDING_UPLOADS,
+    ):
+        self.workers = workers
+        self.pages_per_task = max(1, pages_per_task)
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.max_pending_uploads = max_pending_uploads
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending_uploads = 0
+        self._queued_tasks = 0
+        self._completed_uploads = 0
+        self._failed_uploads = 0
+
+    def start(self):
+        if self._executor is None:
+            # spawn avoids forking a process that already runs the event loop and DB pool threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"PDF extraction pool started with {self.workers} workers")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("PDF extraction pool stopped")
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending_uploads": self._pending_uploads,
+            "queue_depth": self._queued_tasks,
+            "completed_uploads": self._completed_uploads,
+            "failed_uploads": self._failed_uploads,
+        }
+
+    async def _submit(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        self._queued_tasks += 1
+        try:
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self._queued_tasks -= 1
+
+    async def _extract(self, content: bytes, tables: bool) -> PdfContent:
+        page_count = await self._submit(_count_pages, content)
+        if page_count > self.max_pages:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Transcript has {page_count} pages; the limit is {self.max_pages}",
+            )
+
+        ranges = [
+            (start, min(start + self.pages_per_task, page_count))
+            for start in range(0, page_count, self.pages_per_task)
+        ]
+        results = await asyncio.gather(
+            *[self._submit(_extract_page_range, content, start, end, tables) for start, end in ranges]
+        )
+
+        extracted = PdfContent(text="")
+        for pages in results:
+            for page_text, page_tables in pages:
+                if page_text:
+                    extracted.text += page_text + "\n"
+                extracted.tables.extend(page_tables)
+        return extracted
+
+    async def extract_text(self, content: bytes) -> str:
+        """
+        Extracts the text of every page, preserving page order.
+        Raises HTTPException on overload (503), page limit (413), timeout (504) or unreadable PDFs (400).
+        """
+        return (await self.extract(content, tables=False)).text
+
+    async def extract(self, content: bytes, tables: bool = PDF_EXTRACT_TABLES) -> PdfContent:
+        """
+        Like extract_text, optionally also returning the tables pdfplumber detects on each page.
+        """
+        if self._pending_uploads >= self.max_pending_uploads:
+            raise HTTPException(status_code=503, detail="Transcript processing is busy, please retry shortly")
+
+        self.start()
+        self._pending_uploads += 1
+        try:
+            extracted = await asyncio.wait_for(self._extract(content, tables), timeout=self.timeout)
+            self._completed_uploads += 1
+            return extracted
+        except asyncio.TimeoutError:
+            # Page ranges that have not started yet are dropped; running ones finish in the background
+            self._failed_uploads += 1
+            raise HTTPException(status_code=504, detail="Timed out extracting text from PDF")
+        except HTTPException:
+            self._failed_uploads += 1
+            raise
+        except Exception as e:
+            self._failed_uploads += 1
+            logger.error(f"PDF extraction failed: {e}")
+            raise HTTPException(status_code=400, detail="Could not read PDF")
+        finally:
+            self._pending_uploads -= 1
+
+
+pdf_extractor = PdfExtractionService()
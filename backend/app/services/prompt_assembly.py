@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from app.core.logger import get_logger
+from app.core.metrics import Counter, Histogram
+
+logger = get_logger(__name__)
+
+# Gemini has no offline tokenizer; cl100k_base counts within a few percent for English text
+PROMPT_TOKEN_ENCODING = os.getenv("PROMPT_TOKEN_ENCODING", "cl100k_base")
+# Used until the tiktoken encoding is loaded at startup, or when it cannot be. tiktoken downloads the
+# encoding file unless it is in TIKTOKEN_CACHE_DIR (the Docker image bakes it in)
+CHARS_PER_TOKEN_ESTIMATE = 4
+PROMPT_ENCODING_LOAD_TIMEOUT_SECONDS = float(os.getenv("PROMPT_ENCODING_LOAD_TIMEOUT_SECONDS", "10"))
+TRUNCATION_MARKER = "\n[...]\n"
+# Chunks are split with a 200 character overlap; this much shared text identifies an overlap
+MIN_OVERLAP_CHARS = int(os.getenv("PROMPT_MIN_OVERLAP_CHARS", "40"))
+
+PROMPT_TOKENS = Histogram(
+    "prompt_tokens", "Prompt tokens per section after budgeting (section=total for the whole prompt)",
+    labelnames=("operation", "section"),
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000),
+)
+PROMPT_TRUNCATED_TOKENS = Counter(
+    "prompt_truncated_tokens", "Tokens cut from prompt sections to fit their budget", labelnames=("operation", "section")
+)
+PROMPT_DEDUPLICATED_CHUNKS = Counter(
+    "prompt_deduplicated_chunks", "Context chunks dropped or trimmed as duplicates/overlaps", labelnames=("operation",)
+)
+
+_encoding = None
+
+
+def load_encoding() -> bool:
+    """
+    Loads the tiktoken encoding (blocking: may read or download the encoding file).
+    Called once off the event loop at startup; prompts are never the ones to trigger the download.
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(PROMPT_TOKEN_ENCODING)
+        except Exception as e:
+            logger.warning(f"tiktoken encoding {PROMPT_TOKEN_ENCODING} unavailable, estimating tokens from length: {e}")
+            return False
+    return True
+
+
+async def start_encoding():
+    """
+    Startup hook: loads the encoding in a worker thread. Startup does not wait past the timeout;
+    token counts are estimated from length until the load finishes.
+    """
+    try:
+        await asyncio.wait_for(asyncio.to_thread(load_encoding), PROMPT_ENCODING_LOAD_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"tiktoken encoding {PROMPT_TOKEN_ENCODING} not loaded after {PROMPT_ENCODING_LOAD_TIMEOUT_SECONDS}s, "
+            f"estimating tokens from length meanwhile"
+        )
+
+
+def _get_encoding():
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN_ESTIMATE)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, keep: str = "head") -> str:
+    """
+    Cuts `text` to at most `max_tokens`. keep="head" keeps the beginning, keep="ends" keeps the
+    beginning and the end (e.g. transcript header and the most recent terms) and drops the middle.
+    """
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    tokens = encoding.encode(text, disallowed_special=()) if encoding is not None else None
+    total = len(tokens) if tokens is not None else count_tokens(text)
+    if total <= max_tokens:
+        return text
+
+    marker_tokens = count_tokens(TRUNCATION_MARKER)
+    if max_tokens <= 2 * marker_tokens:
+        # Too small for a marker to be worth it
+        marker_tokens = 0
+    available = max_tokens - marker_tokens
+    head = available if keep == "head" else (available + 1) // 2
+    tail = available - head
+    marker = TRUNCATION_MARKER if marker_tokens else ""
+    if tokens is not None:
+        return (
+            encoding.decode(tokens[:head]) + marker + (encoding.decode(tokens[-tail:]) if tail else "")
+        ).strip()
+    head_chars, tail_chars = head * CHARS_PER_TOKEN_ESTIMATE, tail * CHARS_PER_TOKEN_ESTIMATE
+    return (text[:head_chars] + marker + (text[-tail_chars:] if tail_chars else "")).strip()
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _trim_overlap(kept: str, new: str) -> str:
+    """
+    Removes the part of `new` that repeats the start or end of `kept` (adjacent chunks from the splitter).
+    """
+    probe = new[:MIN_OVERLAP_CHARS]
+    if len(probe) == MIN_OVERLAP_CHARS:
+        position = kept.find(probe)
+        if position >= 0 and new.startswith(kept[position:]):
+            return new[len(kept) - position:]
+    probe = kept[:MIN_OVERLAP_CHARS]
+    if len(probe) == MIN_OVERLAP_CHARS:
+        position = new.find(probe)
+        if position >= 0 and kept.startswith(new[position:]):
+            return new[:position]
+    return new
+
+
+def deduplicate_chunks(chunks: List[str]) -> List[str]:
+    """
+    Drops exact (whitespace-insensitive) duplicates and chunks contained in an earlier one, and trims
+    the text a chunk shares with an earlier, overlapping chunk. Order (relevance) is preserved.
+    """
+    kept: List[str] = []
+    seen = set()
+    for chunk in chunks:
+        digest = hashlib.sha256(_normalize(chunk).encode("utf-8")).digest()
+        if digest in seen or any(chunk in other for other in kept):
+            continue
+        seen.add(digest)
+        for other in kept:
+            chunk = _trim_overlap(other, chunk)
+        if chunk.strip():
+            kept.append(chunk.strip())
+    return kept
+
+
+@dataclass
+class PromptSection:
+    name: str
+    parts: List[str]
+    budget: int
+    priority: int = 0  # Higher priority sections are trimmed last when the total budget is exceeded
+    keep: str = "head"
+    separator: str = "\n\n"
+    tokens: int = 0
+    truncated: int = 0
+    rendered: List[str] = field(default_factory=list)
+
+
+class PromptAssembler:
+    """
+    Builds prompt sections under per-section token budgets and an optional total budget.
+    Parts of a section are ordered by importance: whole parts are kept while they fit, the next one is cut
+    to the remaining budget and the rest is dropped. Over the total budget, the lowest priority sections
+    give up tokens first. render() records per-section and total prompt tokens for `operation`.
+    """
+
+    def __init__(self, operation: str, total_budget: Optional[int] = None):
+        self.operation = operation
+        self.total_budget = total_budget
+        self.sections: Dict[str, PromptSection] = {}
+
+    def add(self, name: str, parts, budget: int, priority: int = 0, keep: str = "head",
+            dedupe: bool = False, separator: str = "\n\n") -> "PromptAssembler":
+        if isinstance(parts, str):
+            parts = [parts]
+        parts = [p for p in parts if p and p.strip()]
+        if dedupe:
+            deduped = deduplicate_chunks(parts)
+            kept = set(deduped)
+            changed = sum(1 for part in parts if part.strip() not in kept)
+            if changed:
+                PROMPT_DEDUPLICATED_CHUNKS.labels(self.operation).inc(changed)
+            parts = deduped
+        self.sections[name] = PromptSection(name, parts, budget, priority, keep, separator)
+        return self
+
+    def _fit(self, section: PromptSection, budget: int):
+        separator_tokens = count_tokens(section.separator)
+        rendered = []
+        used = 0
+        original = 0
+        for index, part in enumerate(section.parts):
+            tokens = count_tokens(part)
+            original += tokens + (separator_tokens if index else 0)
+            gap = separator_tokens if rendered else 0
+            remaining = budget - used - gap
+            if remaining <= 0:
+                continue
+            if tokens > remaining:
+                part = truncate_to_tokens(part, remaining, keep=section.keep)
+                tokens = count_tokens(part)
+            if part:
+                used += gap + tokens
+                rendered.append(part)
+        section.rendered = rendered
+        section.tokens = used
+        section.truncated = max(original - used, 0)
+
+    def render(self) -> Dict[str, str]:
+        for section in self.sections.values():
+            self._fit(section, section.budget)
+
+        if self.total_budget is not None:
+            overflow = sum(s.tokens for s in self.sections.values()) - self.total_budget
+            for section in sorted(self.sections.values(), key=lambda s: s.priority):
+                if overflow <= 0:
+                    break
+                before = section.tokens
+                self._fit(section, max(before - overflow, 0))
+                overflow -= before - section.tokens
+
+        total = 0
+        for section in self.sections.values():
+            total += section.tokens
+            PROMPT_TOKENS.labels(self.operation, section.name).observe(section.tokens)
+            if section.truncated:
+                PROMPT_TRUNCATED_TOKENS.labels(self.operation, section.name).inc(section.truncated)
+        PROMPT_TOKENS.labels(self.operation, "total").observe(total)
+        return {name: section.separator.join(section.rendered) for name, section in self.sections.items()}
@@ -0,0 +1,205 @@
+import copy
+import hashlib
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+ROADMAP_CACHE_ENABLED = os.getenv("ROADMAP_CACHE_ENABLED", "true").lower() == "true"
+ROADMAP_CACHE_TTL_SECONDS = float(os.getenv("ROADMAP_CACHE_TTL_SECONDS", "86400"))
+ROADMAP_CACHE_MAX_ENTRIES = int(os.getenv("ROADMAP_CACHE_MAX_ENTRIES", "500"))
+# Near hits serve a roadmap generated from different inputs of the same user (e.g. before a transcript
+# re-upload), so they are opt-in
+ROADMAP_CACHE_SEMANTIC_ENABLED = os.getenv("ROADMAP_CACHE_SEMANTIC_ENABLED", "false").lower() == "true"
+# Cosine similarity required for a near hit; set above 1 to disable semantic matching
+ROADMAP_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("ROADMAP_CACHE_SIMILARITY_THRESHOLD", "0.97"))
+ROADMAP_CACHE_GPA_BUCKET = float(os.getenv("ROADMAP_CACHE_GPA_BUCKET", "0.5"))
+
+
+def gpa_band(gpa: Optional[float]) -> str:
+    if gpa is None:
+        return "unknown"
+    low = math.floor(gpa / ROADMAP_CACHE_GPA_BUCKET) * ROADMAP_CACHE_GPA_BUCKET
+    return f"{low:.1f}-{low + ROADMAP_CACHE_GPA_BUCKET:.1f}"
+
+
+def _normalize_list(values) -> List[str]:
+    return [" ".join(str(v).split()) for v in values or [] if v and str(v).strip()]
+
+
+def normalize_inputs(
+    transcript_text: str, interests: List[str], manual_profile_data: Dict[str, Any] = None, user_id=None
+) -> Dict[str, Any]:
+    """
+    Reduces generation inputs to a canonical form. Every input of the roadmap prompt is included, so
+    equal fingerprints mean equal prompts; `user_id` scopes cached roadmaps to the user they were made for.
+    """
+    manual_profile_data = manual_profile_data or {}
+    transcript = " ".join((transcript_text or "").split())
+    return {
+        "user_id": str(user_id) if user_id is not None else None,
+        "major": (manual_profile_data.get("manual_major") or "").strip().lower(),
+        "gpa": manual_profile_data.get("manual_gpa"),
+        "gpa_band": gpa_band(manual_profile_data.get("manual_gpa")),
+        "interests": sorted({i.strip().lower() for i in interests if i and i.strip()}),
+        "transcript_hash": hashlib.sha256(transcript.encode("utf-8")).hexdigest(),
+        "bio": " ".join((manual_profile_data.get("bio") or "").split()),
+        "hobbies": _normalize_list(manual_profile_data.get("hobbies")),
+        "extracurriculars": _normalize_list(manual_profile_data.get("extracurriculars")),
+    }
+
+
+def fingerprint(normalized: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def semantic_text(normalized: Dict[str, Any]) -> str:
+    # The transcript and personal fields are left out: near hits are about the same user's major, GPA band and interests
+    return (
+        f"Major: {normalized['major'] or 'unspecified'}. "
+        f"GPA: {normalized['gpa_band']}. "
+        f"Interests: {', '.join(normalized['interests'])}."
+    )
+
+
+def _cosine(a: List[float], a_norm: float, b: List[float], b_norm: float) -> float:
+    if not a_norm or not b_norm:
+        return 0.0
+    return sum(x * y for x, y in zip(a, b)) / (a_norm * b_norm)
+
+
+class _Entry:
+    __slots__ = ("value", "owner", "embedding", "norm", "created_at")
+
+    def __init__(self, value: Dict[str, Any], owner: Optional[str], embedding: Optional[List[float]]):
+        self.value = value
+        self.owner = owner
+        self.embedding = embedding
+        self.norm = math.sqrt(sum(x * x for x in embedding)) if embedding else 0.0
+        self.created_at = time.monotonic()
+
+
+class RoadmapCache:
+    """
+    In-process TTL + LRU cache of generated roadmaps.
+    Exact hits match the fingerprint of the normalized inputs (which include the user); near hits
+    (opt-in) compare embeddings of the inputs' semantic text against the same user's cached entries,
+    so a roadmap never carries another user's transcript or personal data.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ROADMAP_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = ROADMAP_CACHE_TTL_SECONDS,
+        similarity_threshold: float = ROADMAP_CACHE_SIMILARITY_THRESHOLD,
+        enabled: bool = ROADMAP_CACHE_ENABLED,
+        semantic_enabled: bool = ROADMAP_CACHE_SEMANTIC_ENABLED,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.enabled = enabled
+        self.semantic_enabled = semantic_enabled
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def _expired(self, entry: _Entry) -> bool:
+        return time.monotonic() - entry.created_at > self.ttl_seconds
+
+    def _purge_expired(self):
+        for key in [k for k, e in self._entries.items() if self._expired(e)]:
+            del self._entries[key]
+            self.evictions += 1
+
+    async def _embed(self, normalized, embed) -> Optional[List[float]]:
+        if embed is None or not self.semantic_enabled or self.similarity_threshold > 1:
+            return None
+        try:
+            return await embed(semantic_text(normalized))
+        except Exception as e:
+            logger.warning(f"Roadmap cache could not embed inputs, semantic matching skipped: {e}")
+            return None
+
+    async def lookup(
+        self, normalized: Dict[str, Any], embed: Callable[[str], Awaitable[List[float]]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """
+        Returns (roadmap copy or None, embedding of the inputs for a later store()).
+        """
+        if not self.enabled:
+            return None, None
+        self._purge_expired()
+
+        key = fingerprint(normalized)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return copy.deepcopy(entry.value), entry.embedding
+
+        embedding = await self._embed(normalized, embed) if normalized.get("user_id") else None
+        if embedding is not None:
+            norm = math.sqrt(sum(x * x for x in embedding))
+            best_key, best_score = None, -1.0
+            for k, e in self._entries.items():
+                if e.embedding is None or e.owner != normalized["user_id"]:
+                    continue
+                score = _cosine(embedding, norm, e.embedding, e.norm)
+                if score > best_score:
+                    best_key, best_score = k, score
+            if best_key is not None and best_score >= self.similarity_threshold:
+                self._entries.move_to_end(best_key)
+                self.semantic_hits += 1
+                logger.info(f"Roadmap cache near hit (similarity {best_score:.4f})")
+                return copy.deepcopy(self._entries[best_key].value), embedding
+
+        self.misses += 1
+        return None, embedding
+
+    async def store(
+        self,
+        normalized: Dict[str, Any],
+        roadmap: Dict[str, Any],
+        embedding: Optional[List[float]] = None,
+        embed: Callable[[str], Awaitable[List[float]]] = None,
+    ):
+        if not self.enabled:
+            return
+        if embedding is None and normalized.get("user_id"):
+            embedding = await self._embed(normalized, embed)
+        key = fingerprint(normalized)
+        self._entries[key] = _Entry(copy.deepcopy(roadmap), normalized.get("user_id"), embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def record_bypass(self):
+        self.bypassed += 1
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.semantic_hits
+        total = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "semantic_enabled": self.semantic_enabled,
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+
+roadmap_cache = RoadmapCache()
@@ -1,31 +1,65 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple, Type
 import os
 import json
-import ast
-from langchain_google_genai import ChatGoogleGenerativeAI
+import copy
+import asyncio
+from pydantic import BaseModel, ValidationError
 from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages.ai import add_usage
 from app.core.logger import get_logger
-from app.core.json_utils import extract_json
+from app.core.json_utils import load_json, StreamingArrayParser
+from app.core.debug_capture import debug_capture
+from app.core.metrics import Counter
+from app.schemas.roadmap import RoadmapSchema, RoadmapHeaderSchema, MilestoneSchema
+from app.services.model_registry import model_registry
+from app.services.prompt_assembly import PromptAssembler
+from app.services.ai_service import get_embedding_client, record_llm_usage, LLM_REQUESTS
+from app.core.timing import StageTimer
+from app.services.roadmap_cache import roadmap_cache, normalize_inputs
+from app.services.single_flight import SingleFlight
 
-logger = get_logger()
+logger = get_logger(__name__)
 
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+# Ask Gemini for application/json constrained by the RoadmapSchema JSON schema
+ROADMAP_STRUCTURED_OUTPUT = os.getenv("ROADMAP_STRUCTURED_OUTPUT", "true").lower() == "true"
+# Re-request only the invalid title/summary or milestones instead of regenerating the roadmap
+ROADMAP_REPAIR_ENABLED = os.getenv("ROADMAP_REPAIR_ENABLED", "true").lower() == "true"
+ROADMAP_MAX_FULL_RETRIES = int(os.getenv("ROADMAP_MAX_FULL_RETRIES", "1"))
+# Prompt token budgets (tiktoken counts), per context section and for the whole context
+ROADMAP_PROMPT_TOKENS = int(os.getenv("ROADMAP_PROMPT_TOKENS", "6000"))
+ROADMAP_TRANSCRIPT_TOKENS = int(os.getenv("ROADMAP_TRANSCRIPT_TOKENS", "4500"))
+ROADMAP_PERSONAL_TOKENS = int(os.getenv("ROADMAP_PERSONAL_TOKENS", "800"))
+ROADMAP_INTERESTS_TOKENS = int(os.getenv("ROADMAP_INTERESTS_TOKENS", "300"))
+ROADMAP_ACADEMIC_TOKENS = int(os.getenv("ROADMAP_ACADEMIC_TOKENS", "200"))
 
-def get_llm():
-    if not GOOGLE_API_KEY:
-        raise ValueError("GOOGLE_API_KEY not found")
-    # Using a model capable of reliable JSON generation
-    return ChatGoogleGenerativeAI(model="gemini-flash-latest", google_api_key=GOOGLE_API_KEY, temperature=0.2)
+ROADMAP_VALIDATION = Counter(
+    "roadmap_validation", "Roadmap documents by validation outcome (valid, repaired, full_retry, failed)",
+    labelnames=("outcome",),
+)
+ROADMAP_REPAIRS = Counter(
+    "roadmap_repairs", "Roadmap fragments re-requested by the repair pass", labelnames=("fragment", "outcome")
+)
 
-async def generate_career_roadmap(transcript_text: str, interests: List[str], manual_profile_data: Dict[str, Any] = None) -> Dict[str, Any]:
+# Identical concurrent /roadmaps/generate calls share one generation (see endpoints/roadmaps.py)
+roadmap_flights = SingleFlight("roadmap_generate")
+
+def get_roadmap_llm(schema: Type[BaseModel] = RoadmapSchema):
     """
-    Generates a structured career roadmap based on transcript and interests, prioritizing manual profile data.
+    LLM for roadmap generation. In structured output mode the response is constrained to `schema`.
+    """
+    llm = model_registry.roadmap_model()
+    if not ROADMAP_STRUCTURED_OUTPUT:
+        return llm
+    return llm.bind(response_mime_type="application/json", response_json_schema=schema.model_json_schema())
+
+def build_roadmap_messages(transcript_text: str, interests: List[str], manual_profile_data: Dict[str, Any] = None) -> list:
+    """
+    Builds the system + user messages for roadmap generation, prioritizing manual profile data.
+    Each context section has a token budget; the transcript is trimmed first (keeping its start and end).
     """
     if manual_profile_data is None:
         manual_profile_data = {}
 
-    llm = get_llm()
-    
     # Extract manual overrides
     manual_gpa = manual_profile_data.get("manual_gpa")
     manual_major = manual_profile_data.get("manual_major")
@@ -33,32 +67,47 @@ async def generate_career_roadmap(transcript_text: str, interests: List[str], ma
     extracurriculars = manual_profile_data.get("extracurriculars", [])
     bio = manual_profile_data.get("bio", "")
 
+    academic = []
+    if manual_major:
+        academic.append(f"- Major: {manual_major}")
+    if manual_gpa:
+        academic.append(f"- GPA: {manual_gpa}")
+
+    personal = []
+    if bio:
+        personal.append(f"- Bio: {bio}")
+    if hobbies:
+        personal.append(f"- Hobbies: {', '.join(hobbies)}")
+    if extracurriculars:
+        personal.append(f"- Extracurriculars: {', '.join(extracurriculars)}")
+
+    sections = (
+        PromptAssembler("roadmap", total_budget=ROADMAP_PROMPT_TOKENS)
+        .add("academic", academic, ROADMAP_ACADEMIC_TOKENS, priority=3, separator="\n")
+        .add("interests", ", ".join(interests), ROADMAP_INTERESTS_TOKENS, priority=2)
+        .add("personal", personal, ROADMAP_PERSONAL_TOKENS, priority=1, separator="\n")
+        .add("transcript", transcript_text or "", ROADMAP_TRANSCRIPT_TOKENS, priority=0, keep="ends")
+        .render()
+    )
+
     # Construct Context String
     context_parts = []
     
     # 1. Transcript / Academic Context
-    if manual_major or manual_gpa:
+    if sections["academic"]:
         context_parts.append("MANUAL ACADEMIC DATA (PRIORITY):")
-        if manual_major:
-            context_parts.append(f"- Major: {manual_major}")
-        if manual_gpa:
-            context_parts.append(f"- GPA: {manual_gpa}")
+        context_parts.append(sections["academic"])
     
     context_parts.append("\nTRANSCRIPT SUMMARY (Background):")
-    context_parts.append(transcript_text)
+    context_parts.append(sections["transcript"])
 
     # 2. Personal Context
-    if bio or hobbies or extracurriculars:
+    if sections["personal"]:
         context_parts.append("\nPERSONAL PROFILE:")
-        if bio:
-            context_parts.append(f"- Bio: {bio}")
-        if hobbies:
-            context_parts.append(f"- Hobbies: {', '.join(hobbies)}")
-        if extracurriculars:
-            context_parts.append(f"- Extracurriculars: {', '.join(extracurriculars)}")
+        context_parts.append(sections["personal"])
 
     # 3. Interests
-    context_parts.append(f"\nINTERESTS:\n{', '.join(interests)}")
+    context_parts.append(f"\nINTERESTS:\n{sections['interests']}")
 
     system_prompt = """You are an expert Career Counselor AI.
     Your goal is to create a detailed, semester-by-semester career roadmap for a student.
@@ -95,38 +144,289 @@ async def generate_career_roadmap(transcript_text: str, interests: List[str], ma
     
     Generate the roadmap JSON now.
     """
+
+    return [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=user_input)
+    ]
+
+def _content_text(content) -> str:
+    if isinstance(content, list):
+        return "".join([c if isinstance(c, str) else str(c) for c in content])
+    return content
+
+def parse_roadmap_content(content: str) -> Dict[str, Any]:
+    """
+    Parses the raw LLM output into the roadmap dict.
+    The raw output is kept in the debug capture buffer when DEBUG_CAPTURE_ENABLED is set.
+    """
+    try:
+        # Python-style quoting and literals are normalized by the scanner, so no literal_eval fallback
+        result = load_json(content)
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON parse failed: {e}")
+        if debug_capture.enabled:
+            debug_capture.capture("roadmap", content, parsed=False, error=str(e))
+        raise ValueError(f"AI generated invalid format: {content[:100]}...")
+
+    if debug_capture.enabled:
+        debug_capture.capture("roadmap", content, parsed=True)
+    return result
+
+REPAIR_SYSTEM_PROMPT = """You repair one fragment of a career roadmap JSON document that failed validation.
+Return only the corrected fragment as a JSON object matching the given JSON schema.
+Keep every valid field exactly as it is and fill missing fields consistently with the rest of the fragment."""
+
+class RoadmapValidationFailed(ValueError):
+    """
+    Raised when a roadmap cannot be parsed or repaired; generation is retried from scratch if allowed.
+    """
+
+def _repair_plan(data: Any, errors: list) -> Optional[Tuple[bool, List[int]]]:
+    """
+    Maps validation errors to fragments: (header invalid, invalid milestone indexes).
+    Returns None when the document is too broken to repair piecewise (not an object, no milestones list).
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("milestones"), list) or not data["milestones"]:
+        return None
+    header = False
+    milestones = set()
+    for error in errors:
+        loc = error["loc"]
+        if loc and loc[0] in ("title", "summary"):
+            header = True
+        elif len(loc) >= 2 and loc[0] == "milestones" and isinstance(loc[1], int):
+            milestones.add(loc[1])
+        else:
+            return None
+    return header, sorted(milestones)
+
+async def _repair_fragment(fragment_name: str, schema: Type[BaseModel], fragment: Any, errors: list, context: str) -> Dict[str, Any]:
+    """
+    Re-requests a single fragment with its validation errors and returns it validated against `schema`.
+    """
+    messages = [
+        SystemMessage(content=REPAIR_SYSTEM_PROMPT),
+        HumanMessage(content=(
+            f"ROADMAP: {context}\n\n"
+            f"JSON SCHEMA:\n{json.dumps(schema.model_json_schema())}\n\n"
+            f"FRAGMENT:\n{json.dumps(fragment, default=str)}\n\n"
+            f"VALIDATION ERRORS:\n" + "\n".join(f"- {'.'.join(map(str, e['loc'])) or '(root)'}: {e['msg']}" for e in errors)
+        )),
+    ]
+    try:
+        try:
+            response = await get_roadmap_llm(schema).ainvoke(messages)
+        except Exception:
+            LLM_REQUESTS.labels("roadmap_repair", "error").inc()
+            raise
+        LLM_REQUESTS.labels("roadmap_repair", "ok").inc()
+        record_llm_usage("roadmap_repair", response.usage_metadata)
+        repaired = schema.model_validate(load_json(_content_text(response.content))).model_dump()
+    except (json.JSONDecodeError, ValidationError) as e:
+        ROADMAP_REPAIRS.labels(fragment_name, "failed").inc()
+        raise RoadmapValidationFailed(f"Could not repair roadmap {fragment_name}: {e}")
+    except Exception:
+        ROADMAP_REPAIRS.labels(fragment_name, "failed").inc()
+        raise
+    ROADMAP_REPAIRS.labels(fragment_name, "ok").inc()
+    return repaired
+
+async def validate_roadmap(data: Any) -> Dict[str, Any]:
+    """
+    Validates a parsed roadmap against RoadmapSchema. Invalid title/summary or milestones are
+    repaired individually (concurrently) when ROADMAP_REPAIR_ENABLED; valid milestones are kept as-is.
+    Raises RoadmapValidationFailed if the document cannot be repaired piecewise.
+    """
+    try:
+        roadmap = RoadmapSchema.model_validate(data).model_dump()
+    except ValidationError as e:
+        errors = e.errors()
+    else:
+        ROADMAP_VALIDATION.labels("valid").inc()
+        return roadmap
+
+    plan = _repair_plan(data, errors) if ROADMAP_REPAIR_ENABLED else None
+    if plan is None:
+        raise RoadmapValidationFailed(f"Roadmap failed validation: {errors[:3]}")
+    header_invalid, invalid_indexes = plan
+    logger.warning(f"Repairing roadmap fragments: header={header_invalid} milestones={invalid_indexes}")
+
+    context = str(data.get("title") or "")[:200]
+    repairs = []
+    if header_invalid:
+        header = {"title": data.get("title"), "summary": data.get("summary")}
+        header_errors = [e for e in errors if e["loc"][0] in ("title", "summary")]
+        repairs.append(_repair_fragment("header", RoadmapHeaderSchema, header, header_errors, context))
+    for index in invalid_indexes:
+        milestone_errors = [{**e, "loc": e["loc"][2:]} for e in errors if e["loc"][:2] == ("milestones", index)]
+        repairs.append(_repair_fragment("milestone", MilestoneSchema, data["milestones"][index], milestone_errors, context))
+    repaired = await asyncio.gather(*repairs)
+
+    if header_invalid:
+        header, repaired = repaired[0], repaired[1:]
+    else:
+        header = {"title": data["title"], "summary": data["summary"]}
+    milestones = list(data["milestones"])
+    for index, milestone in zip(invalid_indexes, repaired):
+        milestones[index] = milestone
+
+    roadmap = RoadmapSchema.model_validate({**header, "milestones": milestones}).model_dump()
+    ROADMAP_VALIDATION.labels("repaired").inc()
+    return roadmap
+
+async def _parse_and_validate(content: str, timer: StageTimer) -> Dict[str, Any]:
+    async with timer.stage("parse"):
+        try:
+            data = parse_roadmap_content(content)
+        except ValueError as e:
+            raise RoadmapValidationFailed(str(e))
+    async with timer.stage("validate"):
+        return await validate_roadmap(data)
+
+def _should_retry(attempt: int, error: Exception) -> bool:
+    if attempt < ROADMAP_MAX_FULL_RETRIES:
+        logger.warning(f"Regenerating roadmap (attempt {attempt + 2}): {error}")
+        ROADMAP_VALIDATION.labels("full_retry").inc()
+        return True
+    ROADMAP_VALIDATION.labels("failed").inc()
+    return False
+
+async def _embed_cache_text(text: str) -> List[float]:
+    return await get_embedding_client().embed_query(text)
+
+async def _cache_lookup(normalized: Dict[str, Any], use_cache: bool):
+    if not use_cache:
+        roadmap_cache.record_bypass()
+        return None, None
+    cached, embedding = await roadmap_cache.lookup(normalized, embed=_embed_cache_text)
+    if cached is not None:
+        logger.info("Serving roadmap from cache")
+    return cached, embedding
+
+async def generate_career_roadmap(transcript_text: str, interests: List[str], manual_profile_data: Dict[str, Any] = None, use_cache: bool = True, user_id=None) -> Dict[str, Any]:
+    """
+    Generates a structured career roadmap based on transcript and interests, prioritizing manual profile data.
+    Served from the roadmap cache on exact or near hits (cached for `user_id` only) unless `use_cache` is False.
+    The result is validated against RoadmapSchema; invalid fragments are repaired, and only an
+    unrepairable document is regenerated (up to ROADMAP_MAX_FULL_RETRIES times).
+    Stages (cache_lookup, llm, parse, validate) are recorded under the "roadmap" operation.
+    """
+    timer = StageTimer(operation="roadmap")
+    normalized = normalize_inputs(transcript_text, interests, manual_profile_data, user_id)
+    async with timer.stage("cache_lookup"):
+        cached, embedding = await _cache_lookup(normalized, use_cache)
+    if cached is not None:
+        return cached
+
+    llm = get_roadmap_llm()
+    messages = build_roadmap_messages(transcript_text, interests, manual_profile_data)
     
     logger.info("Sending Roadmap Generation Request to Gemini...")
     
+    attempt = 0
     try:
-        response = await llm.ainvoke([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_input)
-        ])
-        
-        content = response.content
-        if isinstance(content, list):
-            content = "".join([c if isinstance(c, str) else str(c) for c in content])
-            
-        content = extract_json(content)
-        
-        # Log content for debug
-        with open("debug_output.txt", "w") as f:
-            f.write(content)
-            
-        try:
-            roadmap_data = json.loads(content)
-        except json.JSONDecodeError:
-            logger.warning("JSON parse failed, attempting AST literal eval fallback...")
+        while True:
+            async with timer.stage("llm"):
+                try:
+                    response = await llm.ainvoke(messages)
+                except Exception:
+                    LLM_REQUESTS.labels("roadmap", "error").inc()
+                    raise
+            LLM_REQUESTS.labels("roadmap", "ok").inc()
+            record_llm_usage("roadmap", response.usage_metadata)
             try:
-                # Fallback for Python-style dicts (single quotes)
-                roadmap_data = ast.literal_eval(content)
-            except Exception as e:
-                logger.error(f"AST eval failed: {e}")
-                raise ValueError(f"AI generated invalid format: {content[:100]}...")
-
-        return roadmap_data
+                roadmap_data = await _parse_and_validate(_content_text(response.content), timer)
+                break
+            except RoadmapValidationFailed as e:
+                if not _should_retry(attempt, e):
+                    raise
+                attempt += 1
         
     except Exception as e:
         logger.error(f"Error generating roadmap: {e}")
         raise e
+
+    await roadmap_cache.store(normalized, roadmap_data, embedding, embed=_embed_cache_text)
+    return roadmap_data
+
+async def stream_career_roadmap(transcript_text: str, interests: List[str], manual_profile_data: Dict[str, Any] = None, use_cache: bool = True, user_id=None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streaming variant of generate_career_roadmap.
+    Yields ("milestone", dict) as soon as each milestone object is complete and valid, then ("roadmap", dict)
+    with the full validated result. Milestones after the first invalid one are only emitted via the final
+    document (after repair). A full retry is only possible while no milestone has been emitted.
+    """
+    timer = StageTimer(operation="roadmap")
+    normalized = normalize_inputs(transcript_text, interests, manual_profile_data, user_id)
+    async with timer.stage("cache_lookup"):
+        cached, embedding = await _cache_lookup(normalized, use_cache)
+    if cached is not None:
+        for milestone in cached.get("milestones", []):
+            yield "milestone", copy.deepcopy(milestone)
+        yield "roadmap", cached
+        return
+
+    llm = get_roadmap_llm()
+    messages = build_roadmap_messages(transcript_text, interests, manual_profile_data)
+    emitted = 0
+    attempt = 0
+
+    logger.info("Streaming Roadmap Generation Request to Gemini...")
+
+    while True:
+        parser = StreamingArrayParser("milestones")
+        parts = []
+        usage = None
+        outcome = "error"
+        # Emitted milestones must stay a prefix of the final document, so stop at the first invalid one
+        emitting = True
+
+        stream = llm.astream(messages)
+        # Only the waits on the provider are timed, not the consumer's milestone writes between chunks
+        chunks = timer.iterate("llm", stream)
+        try:
+            async for chunk in chunks:
+                if chunk.usage_metadata:
+                    usage = add_usage(usage, chunk.usage_metadata)
+                text = _content_text(chunk.content)
+                if not text:
+                    continue
+                parts.append(text)
+                for milestone in parser.feed(text):
+                    if not emitting:
+                        continue
+                    try:
+                        milestone = MilestoneSchema.model_validate(milestone).model_dump()
+                    except ValidationError:
+                        emitting = False
+                        continue
+                    emitted += 1
+                    yield "milestone", milestone
+            outcome = "ok"
+        except (GeneratorExit, asyncio.CancelledError):
+            # The client went away; not a provider error
+            outcome = "disconnected"
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming roadmap: {e}")
+            raise
+        finally:
+            await chunks.aclose()
+            await stream.aclose()
+            LLM_REQUESTS.labels("roadmap", outcome).inc()
+            record_llm_usage("roadmap", usage)
+
+        try:
+            roadmap_data = await _parse_and_validate("".join(parts), timer)
+            break
+        except RoadmapValidationFailed as e:
+            if emitted or not _should_retry(attempt, e):
+                if emitted:
+                    ROADMAP_VALIDATION.labels("failed").inc()
+                logger.error(f"Error streaming roadmap: {e}")
+                raise
+            attempt += 1
+
+    await roadmap_cache.store(normalized, roadmap_data, embedding, embed=_embed_cache_text)
+    yield "roadmap", roadmap_data
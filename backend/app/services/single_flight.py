@@ -0,0 +1,100 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+from app.core.logger import get_logger
+from app.core.metrics import Counter
+
+logger = get_logger(__name__)
+
+SINGLE_FLIGHT_CALLS = Counter(
+    "single_flight_calls", "Calls by role (leader runs the work, follower joins an in-flight call)",
+    labelnames=("name", "role"),
+)
+
+
+class Flight:
+    """
+    One in-flight call: the task running it and the tags (e.g. idempotency keys) of the callers sharing it.
+    """
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.task: Optional[asyncio.Task] = None
+        self.tags: List[Any] = []
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution in this process.
+    The work runs in its own task, so a caller that goes away (is cancelled) does not cancel it for the
+    others. Every caller receives its own deep copy of the result, or the same exception.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, Flight] = {}
+        # Strong references: a flight whose callers all left must still run to completion
+        self._tasks: Set[asyncio.Task] = set()
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable, fn: Callable[[Flight], Awaitable[Any]], tag: Any = None) -> Any:
+        """
+        Runs `fn(flight)` unless a call with `key` is already in flight, in which case this call waits for it.
+        `tag` is attached to the flight for `fn` to collect with seal().
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = Flight(key)
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(flight, fn))
+            self._tasks.add(flight.task)
+            flight.task.add_done_callback(self._on_done)
+            self.leaders += 1
+            SINGLE_FLIGHT_CALLS.labels(self.name, "leader").inc()
+        else:
+            self.followers += 1
+            SINGLE_FLIGHT_CALLS.labels(self.name, "follower").inc()
+            logger.info(f"Joined in-flight {self.name} call")
+        if tag is not None:
+            flight.tags.append(tag)
+        return await self.wait(flight)
+
+    async def wait(self, flight: Flight) -> Any:
+        return copy.deepcopy(await asyncio.shield(flight.task))
+
+    def tagged(self, tag: Any) -> Optional[Flight]:
+        """
+        The in-flight call carrying `tag`, if any.
+        """
+        for flight in self._flights.values():
+            if tag in flight.tags:
+                return flight
+        return None
+
+    def seal(self, flight: Flight) -> List[Any]:
+        """
+        Stops new callers from joining `flight` (they start a new call) and returns the tags collected so far.
+        """
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+        return list(flight.tags)
+
+    async def _run(self, flight: Flight, fn: Callable[[Flight], Awaitable[Any]]) -> Any:
+        try:
+            return await fn(flight)
+        finally:
+            self.seal(flight)
+
+    def _on_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        # Retrieve the exception so a flight nobody waits for anymore does not log "never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._tasks),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
@@ -0,0 +1,338 @@
+import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence
+
+# 4.0 scale; grades missing here (P, W, I, ...) count for credits but not for the GPA
+GRADE_POINTS = {
+    "A+": 4.0, "A": 4.0, "A-": 3.7,
+    "B+": 3.3, "B": 3.0, "B-": 2.7,
+    "C+": 2.3, "C": 2.0, "C-": 1.7,
+    "D+": 1.3, "D": 1.0, "D-": 0.7,
+    "F": 0.0,
+}
+NON_GPA_GRADES = {"P", "NP", "S", "U", "W", "WF", "I", "IP", "CR", "NC", "AU", "TR"}
+GRADES = set(GRADE_POINTS) | NON_GPA_GRADES
+# Grades that earn no credit
+NO_CREDIT_GRADES = {"F", "NP", "U", "W", "WF", "I", "IP", "NC", "AU"}
+# Grades that are also title words ("Calculus I", "Part P"); in text lines they only count in a grade position
+AMBIGUOUS_GRADES = {"I", "P", "W", "S", "U"}
+
+MAX_COURSE_CREDITS = 20.0
+# Parsed rows stand in for the raw transcript only when parsing clearly worked
+MIN_PARSED_COURSES = 3
+MIN_GRADED_SHARE = 0.6  # of parsed courses with a grade
+MIN_LINE_COVERAGE = 0.7  # of text lines with a course code that parsed as a course
+MAX_NOTE_LINES = 20
+MAX_NOTE_CHARS = 200
+
+_COURSE_CODE = re.compile(r"\b([A-Z]{2,5})[ \-]?(\d{2,4}[A-Z]?)\b")
+_TERM = re.compile(
+    r"\b(?:(Fall|Spring|Summer|Winter|Autumn)\s+(\d{4})|(\d{4})\s+(Fall|Spring|Summer|Winter|Autumn)"
+    r"|(Semester|Term|Quarter)\s+(\d{1,2}))\b",
+    re.IGNORECASE,
+)
+_MAJOR = re.compile(r"^\s*(?:Major|Program|Degree Program|Field of Study)\s*[:\-]\s*(.+?)\s*$", re.IGNORECASE | re.MULTILINE)
+_NUMBER = re.compile(r"^\d{1,2}(?:\.\d{1,2})?$")
+# Words that look like a department code next to a number but are not courses
+_NOT_DEPARTMENTS = {
+    "FALL", "SPRING", "SUMMER", "WINTER", "TERM", "YEAR", "PAGE", "GPA", "ID", "SEM", "QTR", "TOTAL", "UNITS",
+    "JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "SEPT", "OCT", "NOV", "DEC",
+}
+_CREDIT_WORDS = {"credits", "credit", "cr", "crs", "units", "hrs", "hours"}
+# Non-course lines worth keeping next to the parsed courses (standing, honors, cumulative GPA, ...)
+_NOTE = re.compile(
+    r"\b(?:gpa|grade point|standing|honou?rs?|dean'?s list|probation|degree|major|minor|concentration"
+    r"|award|distinction|cum laude|credits? (?:earned|attempted)|cumulative)\b",
+    re.IGNORECASE,
+)
+
+_HEADER_ALIASES = {
+    "code": {"course", "course code", "course no", "course no.", "course number", "code", "course id"},
+    "subject": {"subject", "subj", "dept", "department"},
+    "number": {"number", "no", "no.", "num", "catalog", "catalog no", "crs no"},
+    "title": {"title", "course title", "course name", "name", "description"},
+    "credits": {"credits", "credit", "units", "hours", "cr", "crs", "credit hours", "hrs", "earned", "attempted"},
+    "grade": {"grade", "grd", "final grade", "mark"},
+    "term": {"term", "semester", "session", "period"},
+}
+
+
+@dataclass
+class ParsedCourse:
+    code: str
+    title: str = ""
+    term: str = ""
+    credits: Optional[float] = None
+    grade: str = ""
+
+    @property
+    def grade_points(self) -> Optional[float]:
+        return GRADE_POINTS.get(self.grade)
+
+    @property
+    def department(self) -> str:
+        return self.code.split(" ", 1)[0]
+
+
+def _clean(cell) -> str:
+    return " ".join(str(cell).split()) if cell is not None else ""
+
+
+def _find_code(text: str) -> Optional[re.Match]:
+    for match in _COURSE_CODE.finditer(text):
+        if match.group(1) not in _NOT_DEPARTMENTS:
+            return match
+    return None
+
+
+def _normalize_code(text: str) -> Optional[str]:
+    match = _find_code(text.upper())
+    if match is None:
+        return None
+    return f"{match.group(1)} {match.group(2)}"
+
+
+def _normalize_term(text: str) -> Optional[str]:
+    match = _TERM.search(text)
+    if not match:
+        return None
+    season, year, year_first, season_after, unit, number = match.groups()
+    if season:
+        return f"{season.title()} {year}"
+    if year_first:
+        return f"{season_after.title()} {year_first}"
+    return f"{unit.title()} {number}"
+
+
+def _parse_credits(text: str) -> Optional[float]:
+    if not _NUMBER.match(text):
+        return None
+    value = float(text)
+    return value if 0 < value <= MAX_COURSE_CREDITS else None
+
+
+def _parse_grade(text: str) -> str:
+    grade = text.strip().upper()
+    return grade if grade in GRADES else ""
+
+
+# --- Tables (pdfplumber extract_tables output) ---
+
+def _header_columns(row: Sequence[str]) -> dict:
+    columns = {}
+    for index, cell in enumerate(row):
+        label = _clean(cell).lower().rstrip(":")
+        for field, aliases in _HEADER_ALIASES.items():
+            if label in aliases and field not in columns:
+                columns[field] = index
+                break
+    return columns
+
+
+def parse_tables(tables: Iterable[Sequence[Sequence[str]]]) -> List[ParsedCourse]:
+    """
+    Reads course rows from tables whose header names a grade column and a course (code, or subject + number).
+    Rows above the header and rows without a recognizable course code are skipped.
+    """
+    courses = []
+    for table in tables:
+        columns = None
+        term = ""
+        for row in table:
+            cells = [_clean(c) for c in row]
+            if columns is None:
+                header = _header_columns(cells)
+                if "grade" in header and ("code" in header or {"subject", "number"} <= header.keys()):
+                    columns = header
+                continue
+
+            def cell(field):
+                index = columns.get(field)
+                return cells[index] if index is not None and index < len(cells) else ""
+
+            # The term is often only on the first row of a block, or in a heading row spanning the table
+            term = _normalize_term(cell("term") or " ".join(cells)) or term
+            if "code" in columns:
+                code = _normalize_code(cell("code"))
+            else:
+                code = _normalize_code(f"{cell('subject')} {cell('number')}")
+            if code is None:
+                continue
+            courses.append(ParsedCourse(
+                code=code,
+                title=cell("title"),
+                term=term,
+                credits=_parse_credits(cell("credits")),
+                grade=_parse_grade(cell("grade")),
+            ))
+    return courses
+
+
+# --- Plain text lines ---
+
+def _separated(gap: str) -> bool:
+    # Column gaps survive as runs of spaces, tabs or pipes; words of a title are one space apart
+    return "  " in gap or "\t" in gap or "|" in gap
+
+
+def _parse_line(line: str, term: str) -> Optional[ParsedCourse]:
+    match = _find_code(line)
+    if match is None:
+        return None
+
+    rest = line[match.end():]
+    tokens = []  # (token, whitespace before it)
+    position = 0
+    for token in re.finditer(r"\S+", rest):
+        tokens.append((token.group(), rest[position:token.start()]))
+        position = token.end()
+
+    # Trailing tokens hold grade/credit columns; the title is what precedes them
+    grade = ""
+    credits = None
+    end = len(tokens)
+    while end > 0:
+        token, gap = tokens[end - 1]
+        token = token.strip(",;")
+        previous = tokens[end - 2][0].strip(",;") if end > 1 else ""
+        if token.lower() in _CREDIT_WORDS:
+            pass
+        elif _parse_grade(token) and not grade and (
+            token.upper() not in AMBIGUOUS_GRADES or _NUMBER.match(previous) or _separated(gap)
+        ):
+            grade = _parse_grade(token)
+        elif _NUMBER.match(token):
+            credits = _parse_credits(token) or credits
+        else:
+            break
+        end -= 1
+    if not grade and credits is None:
+        return None
+
+    line_term = _normalize_term(line[:match.start()])
+    return ParsedCourse(
+        code=f"{match.group(1)} {match.group(2)}",
+        title=" ".join(token for token, _ in tokens[:end]).strip(" -|"),
+        term=line_term or term,
+        credits=credits,
+        grade=grade,
+    )
+
+
+def parse_text(text: str) -> List[ParsedCourse]:
+    """
+    Line-based fallback: a course line holds a course code followed by a title and trailing grade and/or
+    credit columns. Term headings ("Fall 2023", "Semester 2") apply to the lines below them.
+    """
+    courses = []
+    term = ""
+    for line in text.splitlines():
+        course = _parse_line(line, term)
+        if course is not None:
+            courses.append(course)
+            continue
+        heading = _normalize_term(line)
+        if heading:
+            term = heading
+    return courses
+
+
+def parse_transcript(text: str, tables: Iterable[Sequence[Sequence[str]]] = ()) -> List[ParsedCourse]:
+    """
+    Parses course rows, preferring extracted tables and falling back to text lines when tables yield fewer.
+    Repeated rows (same term and code, e.g. on a page break) are kept once.
+    """
+    from_tables = parse_tables(tables)
+    from_text = parse_text(text)
+    courses = from_tables if len(from_tables) >= len(from_text) else from_text
+    unique = OrderedDict()
+    for course in courses:
+        unique.setdefault((course.term, course.code), course)
+    return list(unique.values())
+
+
+def parse_succeeded(courses: Sequence[ParsedCourse], text: str) -> bool:
+    """
+    Whether the parsed rows can replace the raw transcript: enough courses, most of them graded, and most
+    text lines carrying a course code accounted for. Otherwise callers keep using the raw text.
+    """
+    if len(courses) < MIN_PARSED_COURSES:
+        return False
+    if sum(1 for c in courses if c.grade) / len(courses) < MIN_GRADED_SHARE:
+        return False
+    candidates = sum(1 for line in (text or "").splitlines() if _find_code(line))
+    return not candidates or len(courses) / candidates >= MIN_LINE_COVERAGE
+
+
+def transcript_notes(text: str) -> List[str]:
+    """
+    Non-course lines that carry information the course list does not (standing, honors, cumulative GPA).
+    """
+    notes = []
+    for line in (text or "").splitlines():
+        line = " ".join(line.split())
+        if not line or not _NOTE.search(line) or _parse_line(line, "") is not None:
+            continue
+        line = line[:MAX_NOTE_CHARS]
+        if line not in notes:
+            notes.append(line)
+        if len(notes) >= MAX_NOTE_LINES:
+            break
+    return notes
+
+
+def compute_gpa(courses: Sequence[ParsedCourse]) -> Optional[float]:
+    """
+    Credit-weighted GPA over letter grades (courses without credits count as 1 credit).
+    """
+    points = weight = 0.0
+    for course in courses:
+        if course.grade_points is None:
+            continue
+        credits = course.credits if course.credits is not None else 1.0
+        points += course.grade_points * credits
+        weight += credits
+    return round(points / weight, 2) if weight else None
+
+
+def earned_credits(courses: Sequence[ParsedCourse]) -> float:
+    return sum(c.credits or 0 for c in courses if c.grade not in NO_CREDIT_GRADES)
+
+
+def derive_major(text: str, courses: Sequence[ParsedCourse]) -> Optional[str]:
+    """
+    The major stated on the transcript ("Major: Computer Science"), else the department with the most credits.
+    """
+    match = _MAJOR.search(text or "")
+    if match:
+        return match.group(1)[:120]
+    credits = Counter()
+    for course in courses:
+        credits[course.department] += course.credits or 1.0
+    return credits.most_common(1)[0][0] if credits else None
+
+
+def format_compact(
+    courses: Sequence[ParsedCourse], gpa: Optional[float] = None, major: Optional[str] = None,
+    notes: Sequence[str] = (),
+) -> str:
+    """
+    Compact transcript for LLM context: a summary line, the transcript's notes, then one line per term.
+    e.g. "Fall 2023: CS 201 Data Structures (3, A-); MATH 221 Linear Algebra (4, B+)"
+    """
+    summary = [f"Courses: {len(courses)}", f"Credits earned: {earned_credits(courses):g}"]
+    if gpa is not None:
+        summary.append(f"GPA (from transcript): {gpa:.2f}")
+    if major:
+        summary.append(f"Major: {major}")
+
+    by_term = OrderedDict()
+    for course in courses:
+        details = ", ".join(part for part in (f"{course.credits:g}" if course.credits is not None else "", course.grade) if part)
+        entry = f"{course.code} {course.title}".strip() + (f" ({details})" if details else "")
+        by_term.setdefault(course.term or "Unspecified term", []).append(entry)
+
+    lines = [" | ".join(summary), *notes]
+    lines.extend(f"{term}: {'; '.join(entries)}" for term, entries in by_term.items())
+    return "\n".join(lines)
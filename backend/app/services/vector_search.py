@@ -0,0 +1,240 @@
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import Float, Text, cast, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import TSQUERY
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import VectorStore, CONTENT_TSV_CONFIG
+
+# ANN index settings (used by scripts/init_db.py and scripts/migrate_vector_store.py)
+VECTOR_INDEX_METHOD = os.getenv("VECTOR_INDEX_METHOD", "hnsw")  # "hnsw" or "ivfflat"
+HNSW_M = int(os.getenv("VECTOR_HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("VECTOR_HNSW_EF_CONSTRUCTION", "64"))
+IVFFLAT_LISTS = int(os.getenv("VECTOR_IVFFLAT_LISTS", "100"))
+
+# Query-time knobs: higher values trade latency for recall
+HNSW_EF_SEARCH = int(os.getenv("VECTOR_HNSW_EF_SEARCH", "40"))
+IVFFLAT_PROBES = int(os.getenv("VECTOR_IVFFLAT_PROBES", "10"))
+# pgvector >= 0.8: "relaxed_order" keeps walking the index until enough rows pass the user filter.
+# Without it the index returns ef_search candidates before the user filter applies, so users with
+# few rows can get fewer than `limit` chunks, or none. On older pgvector ef_search/probes are instead
+# raised in proportion to how selective the user filter is (up to the caps below), which narrows
+# but does not close that gap. Set to "off" to disable both.
+ITERATIVE_SCAN = os.getenv("VECTOR_ITERATIVE_SCAN", "relaxed_order")
+HNSW_MAX_EF_SEARCH = 1000  # pgvector's upper bound
+# Row counts behind that scaling are cached for this long, so chat requests do not count the user's
+# rows before every ANN query; a user's new upload is reflected after at most this delay
+FILTER_STATS_TTL_SECONDS = float(os.getenv("VECTOR_FILTER_STATS_TTL_SECONDS", "300"))
+FILTER_STATS_MAX_USERS = int(os.getenv("VECTOR_FILTER_STATS_MAX_USERS", "10000"))
+
+ANN_INDEX_NAME = "ix_vector_store_embedding_ann"
+
+# Hybrid retrieval: full-text search over content_tsv fused with ANN results
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "true").lower() == "true"
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # Rows fetched per ranker before fusion
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+# The lexical result is decisive (no embedding call) when the best chunk contains at least this share
+# of the query terms and beats the runner-up by the margin, e.g. the one chunk mentioning "CS 201"
+HYBRID_LEXICAL_MIN_COVERAGE = float(os.getenv("HYBRID_LEXICAL_MIN_COVERAGE", "0.5"))
+HYBRID_LEXICAL_MARGIN = float(os.getenv("HYBRID_LEXICAL_MARGIN", "0.25"))
+
+
+def ann_index_ddl(table: str = "vector_store", index_name: str = ANN_INDEX_NAME) -> str:
+    """
+    Returns the CREATE INDEX statement for the configured ANN index on the embedding column.
+    """
+    if VECTOR_INDEX_METHOD == "ivfflat":
+        return (
+            f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} "
+            f"USING ivfflat (embedding vector_l2_ops) WITH (lists = {IVFFLAT_LISTS})"
+        )
+    return (
+        f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} "
+        f"USING hnsw (embedding vector_l2_ops) WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})"
+    )
+
+
+_iterative_scan_supported: Optional[bool] = None
+
+
+async def _supports_iterative_scan(db: AsyncSession) -> bool:
+    global _iterative_scan_supported
+    if _iterative_scan_supported is None:
+        version = (await db.execute(
+            text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        )).scalar_one_or_none()
+        try:
+            _iterative_scan_supported = tuple(int(p) for p in version.split(".")[:2]) >= (0, 8)
+        except (AttributeError, ValueError):
+            _iterative_scan_supported = False
+    return _iterative_scan_supported
+
+
+_table_rows: Tuple[float, float] = (0.0, 0.0)  # (expires at, pg_class.reltuples)
+_user_rows: "OrderedDict[UUID, Tuple[float, int]]" = OrderedDict()  # user_id -> (expires at, rows)
+
+
+async def _estimated_rows(db: AsyncSession, user_id: UUID) -> Tuple[float, int]:
+    """
+    (rows in vector_store per the planner statistics, rows of `user_id`), each cached for
+    FILTER_STATS_TTL_SECONDS; the user counts in an LRU of FILTER_STATS_MAX_USERS entries.
+    """
+    global _table_rows
+    now = time.monotonic()
+    if _table_rows[0] <= now:
+        total = (await db.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = 'vector_store'::regclass")
+        )).scalar_one_or_none()
+        _table_rows = (now + FILTER_STATS_TTL_SECONDS, float(total or 0))
+
+    cached = _user_rows.get(user_id)
+    if cached is None or cached[0] <= now:
+        rows = (await db.execute(
+            select(func.count()).select_from(VectorStore).where(VectorStore.user_id == user_id)
+        )).scalar_one()
+        cached = (now + FILTER_STATS_TTL_SECONDS, rows)
+        _user_rows[user_id] = cached
+    _user_rows.move_to_end(user_id)
+    while len(_user_rows) > FILTER_STATS_MAX_USERS:
+        _user_rows.popitem(last=False)
+    return _table_rows[1], cached[1]
+
+
+async def _filter_scaled_params(db: AsyncSession, user_id: UUID, limit: int, ef_search: int, probes: int):
+    """
+    ef_search/probes large enough that about `limit` of the candidates belong to the user.
+    """
+    total, user_rows = await _estimated_rows(db, user_id)
+    if not user_rows or total <= user_rows:
+        return ef_search, probes
+    factor = total / user_rows
+    return (
+        min(max(ef_search, int(limit * factor)), HNSW_MAX_EF_SEARCH),
+        min(max(probes, int(probes * factor)), IVFFLAT_LISTS),
+    )
+
+
+async def configure_ann_session(
+    db: AsyncSession,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    user_id: Optional[UUID] = None,
+    limit: int = 3,
+) -> bool:
+    """
+    Applies the ANN search parameters to the current transaction only (SET LOCAL).
+    With a `user_id` filter, enables iterative index scans (pgvector >= 0.8) or else scales
+    ef_search/probes with the filter's selectivity. Returns True when iterative scans are on,
+    in which case results may come back slightly out of distance order.
+    """
+    ef_search = int(ef_search or HNSW_EF_SEARCH)
+    probes = int(probes or IVFFLAT_PROBES)
+    iterative = ITERATIVE_SCAN in ("strict_order", "relaxed_order") and await _supports_iterative_scan(db)
+    if user_id is not None and not iterative and ITERATIVE_SCAN != "off":
+        ef_search, probes = await _filter_scaled_params(db, user_id, limit, ef_search, probes)
+
+    # SET does not accept bind parameters, so values are coerced to int before formatting
+    await db.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+    await db.execute(text(f"SET LOCAL ivfflat.probes = {probes}"))
+    if iterative:
+        await db.execute(text(f"SET LOCAL hnsw.iterative_scan = {ITERATIVE_SCAN}"))
+        # IVFFlat only supports relaxed ordering
+        await db.execute(text("SET LOCAL ivfflat.iterative_scan = relaxed_order"))
+    return iterative
+
+
+async def search_user_chunks(
+    db: AsyncSession,
+    user_id: UUID,
+    query_vector: Sequence[float],
+    limit: int = 3,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+) -> List[VectorStore]:
+    """
+    Nearest-neighbour search restricted to a single user's transcript chunks.
+    """
+    iterative = await configure_ann_session(db, ef_search=ef_search, probes=probes, user_id=user_id, limit=limit)
+
+    distance = VectorStore.embedding.l2_distance(query_vector)
+    stmt = (
+        select(VectorStore, distance)
+        .where(VectorStore.user_id == user_id)
+        .order_by(distance)
+        .limit(limit)
+    )
+    rows = (await db.execute(stmt)).all()
+    if iterative:
+        # relaxed_order can return neighbours slightly out of order
+        rows = sorted(rows, key=lambda row: row[1])
+    return [row[0] for row in rows]
+
+
+@dataclass
+class LexicalHit:
+    chunk: VectorStore
+    coverage: float  # Share of the query's lexemes found in the chunk
+    rank: float
+
+
+def _regconfig():
+    # Constant from the model, inlined so the planner sees the same immutable expression as the column
+    return literal_column(f"'{CONTENT_TSV_CONFIG}'::regconfig")
+
+
+async def search_user_chunks_lexical(
+    db: AsyncSession, user_id: UUID, query: str, limit: int = HYBRID_CANDIDATES
+) -> List[LexicalHit]:
+    """
+    Full-text search over a user's chunks through the content_tsv GIN index.
+    Any query term may match (OR); hits are ordered by term coverage, then ts_rank_cd.
+    """
+    query_vector = func.to_tsvector(_regconfig(), query)
+    # plainto_tsquery ANDs the terms; an exact-match question rarely repeats every word, so OR them
+    any_term = cast(func.replace(cast(func.plainto_tsquery(_regconfig(), query), Text), " & ", " | "), TSQUERY)
+
+    lexeme = func.unnest(func.tsvector_to_array(query_vector)).table_valued("lexeme").alias("query_lexeme")
+    matched = (
+        select(func.count())
+        .select_from(lexeme)
+        .where(VectorStore.content_tsv.op("@@")(cast(func.quote_literal(lexeme.c.lexeme), TSQUERY)))
+        .scalar_subquery()
+    )
+    total = func.greatest(func.array_length(func.tsvector_to_array(query_vector), 1), 1)
+    coverage = (cast(matched, Float) / cast(total, Float)).label("coverage")
+    rank = func.ts_rank_cd(VectorStore.content_tsv, any_term, 32).label("rank")
+
+    stmt = (
+        select(VectorStore, coverage, rank)
+        .where(VectorStore.user_id == user_id, VectorStore.content_tsv.op("@@")(any_term))
+        .order_by(coverage.desc(), rank.desc())
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return [LexicalHit(chunk, float(cov), float(rnk)) for chunk, cov, rnk in result.all()]
+
+
+def is_decisive(hits: Sequence[LexicalHit]) -> bool:
+    """
+    True when the top lexical hit clearly answers the query on its own.
+    """
+    if not hits or hits[0].coverage < HYBRID_LEXICAL_MIN_COVERAGE:
+        return False
+    return len(hits) == 1 or hits[0].coverage - hits[1].coverage >= HYBRID_LEXICAL_MARGIN
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[VectorStore]], limit: int, k: int = HYBRID_RRF_K) -> List[VectorStore]:
+    """
+    Merges ranked chunk lists by summing 1 / (k + rank) per chunk; ties keep first-seen order.
+    """
+    scores: Dict[UUID, float] = {}
+    chunks: Dict[UUID, VectorStore] = {}
+    for ranking in rankings:
+        for position, chunk in enumerate(ranking, start=1):
+            chunks.setdefault(chunk.id, chunk)
+            scores[chunk.id] = scores.get(chunk.id, 0.0) + 1.0 / (k + position)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [chunks[chunk_id] for chunk_id in ordered[:limit]]
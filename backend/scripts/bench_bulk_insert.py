@@ -0,0 +1,97 @@
+"""
+Compares VectorStore write throughput for per-row ORM add(), executemany and binary COPY.
+
+Every run happens inside a transaction that is rolled back, so the table is left untouched.
+
+    python scripts/bench_bulk_insert.py --sizes 100 1000 10000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.logger import get_logger
+from app.db.vector_repository import bulk_insert_chunks, register_vector_codec
+from app.models.models import VectorStore
+
+load_dotenv()
+
+logger = get_logger()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+DIMENSIONS = 768
+
+
+def make_rows(count: int):
+    return [
+        {
+            "user_id": None,
+            "content": f"Course {i}: Data Structures - Grade: A " * 20,
+            "content_hash": f"{i:064x}",
+            "embedding": [random.uniform(-1, 1) for _ in range(DIMENSIONS)],
+            "metadata": {"source": "bench.pdf", "type": "transcript"},
+        }
+        for i in range(count)
+    ]
+
+
+async def orm_add(db: AsyncSession, rows):
+    for row in rows:
+        db.add(VectorStore(
+            user_id=row["user_id"],
+            content=row["content"],
+            content_hash=row["content_hash"],
+            embedding=row["embedding"],
+            metadata_=row["metadata"],
+        ))
+    await db.flush()
+
+
+async def executemany(db: AsyncSession, rows):
+    await bulk_insert_chunks(db, rows, method="executemany")
+
+
+async def copy(db: AsyncSession, rows):
+    await bulk_insert_chunks(db, rows, method="copy")
+
+
+async def bench_bulk_insert(sizes, repeats: int):
+    if not DATABASE_URL:
+        logger.error("DATABASE_URL not found in environment variables")
+        return
+
+    engine = create_async_engine(DATABASE_URL, connect_args={"ssl": "require"})
+    register_vector_codec(engine)
+    SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    print(f"{'rows':>8} {'method':>12} {'seconds':>9} {'rows/sec':>10}")
+    for size in sizes:
+        rows = make_rows(size)
+        for label, fn in (("orm add", orm_add), ("executemany", executemany), ("copy", copy)):
+            best = None
+            for _ in range(repeats):
+                async with SessionLocal() as db:
+                    start = time.perf_counter()
+                    await fn(db, rows)
+                    elapsed = time.perf_counter() - start
+                    await db.rollback()
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{size:>8} {label:>12} {best:>9.3f} {size / best:>10.0f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeats", type=int, default=3, help="Best of N runs per method")
+    args = parser.parse_args()
+    asyncio.run(bench_bulk_insert(args.sizes, args.repeats))
@@ -0,0 +1,58 @@
+"""
+Offline throughput benchmark for the embedding client using the fake provider.
+
+Compares one-request-per-chunk sequential embedding (roughly the old behaviour when
+batches are tiny) with batched, concurrent, rate-limited embedding.
+
+    python scripts/bench_embeddings.py --chunks 1000 --latency 0.1 --failure-rate 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Ensure we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.ai_service import EmbeddingClient, FakeEmbeddingProvider, TokenBucket
+
+CONFIGS = [
+    # (label, batch_size, max_concurrency)
+    ("sequential, batch=1", 1, 1),
+    ("batch=20, conc=1", 20, 1),
+    ("batch=20, conc=4", 20, 4),
+    ("batch=100, conc=4", 100, 4),
+]
+
+
+async def run(chunks: int, latency: float, failure_rate: float, rate: float, burst: int):
+    texts = [f"Course {i}: Data Structures - Grade: A" for i in range(chunks)]
+
+    print(f"{'config':>22} {'seconds':>9} {'chunks/s':>10} {'requests':>9} {'retries':>8}")
+    for label, batch_size, concurrency in CONFIGS:
+        provider = FakeEmbeddingProvider(latency=latency, failure_rate=failure_rate)
+        client = EmbeddingClient(
+            provider,
+            batch_size=batch_size,
+            max_concurrency=concurrency,
+            rate_limiter=TokenBucket(rate, burst),
+            backoff_base=0.05,
+            backoff_max=1.0,
+        )
+        start = time.perf_counter()
+        vectors = await client.embed_documents(texts)
+        elapsed = time.perf_counter() - start
+        assert len(vectors) == len(texts)
+        print(f"{label:>22} {elapsed:>9.2f} {chunks / elapsed:>10.1f} {provider.calls:>9} {client.retries:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per provider request")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests failing with 429")
+    parser.add_argument("--rate", type=float, default=50, help="Token bucket requests per second")
+    parser.add_argument("--burst", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.chunks, args.latency, args.failure_rate, args.rate, args.burst))
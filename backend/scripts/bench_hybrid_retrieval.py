@@ -0,0 +1,200 @@
+"""
+Recall and latency of /chat context retrieval: vector-only vs. lexical-only vs. hybrid (RRF).
+
+Builds a synthetic transcript corpus (course lines such as "Fall 2023  CS 201  Data Structures  A-",
+chunked like uploads) in a scratch `hybrid_bench` schema, then asks per-user questions whose answer
+lives in exactly one chunk: course-code lookups ("What grade did I get in CS 201?") and course-title
+lookups ("How did I do in Data Structures?"). Retrieval runs through app.services.ai_service.retrieve_context,
+so the numbers include the embedding call the lexical path can skip.
+
+Embeddings default to the offline fake provider (hash-derived vectors, simulated latency), which makes
+vector-only recall a floor; use --provider google for real embeddings.
+
+    python scripts/bench_hybrid_retrieval.py --users 50 --queries 200 --k 3
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+# Ensure we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from dotenv import load_dotenv
+from app.core.logger import get_logger
+from app.db.base import Base
+from app.models.models import Asset, User, VectorStore
+from app.services import ai_service
+from app.services.ai_service import get_embedding_client, retrieve_context
+from app.services.vector_search import ann_index_ddl, search_user_chunks_lexical
+
+load_dotenv()
+
+logger = get_logger()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+SCHEMA = "hybrid_bench"
+
+SUBJECTS = {
+    "CS": ["Data Structures", "Algorithms", "Operating Systems", "Databases", "Computer Networks", "Machine Learning", "Compilers"],
+    "MATH": ["Linear Algebra", "Calculus II", "Probability", "Discrete Mathematics", "Real Analysis"],
+    "PHYS": ["Mechanics", "Electromagnetism", "Quantum Physics"],
+    "ECON": ["Microeconomics", "Macroeconomics", "Econometrics"],
+    "ENGL": ["Academic Writing", "Technical Communication"],
+}
+TERMS = ["Fall 2022", "Spring 2023", "Fall 2023", "Spring 2024", "Fall 2024", "Spring 2025"]
+GRADES = ["A", "A-", "B+", "B", "B-", "C+", "C"]
+
+
+def make_transcript(courses: int):
+    seen = set()
+    lines = []
+    while len(lines) < courses:
+        dept = random.choice(list(SUBJECTS))
+        code = f"{dept} {random.randint(1, 4)}{random.randint(0, 9)}{random.randint(0, 9)}"
+        if code in seen:
+            continue
+        seen.add(code)
+        lines.append((code, random.choice(SUBJECTS[dept]), random.choice(TERMS), random.choice(GRADES)))
+    return lines
+
+
+def make_chunks(lines, per_chunk: int):
+    chunks = []
+    for i in range(0, len(lines), per_chunk):
+        group = lines[i:i + per_chunk]
+        body = "\n".join(f"{term}  {code}  {title}  {grade}  3.0 credits" for code, title, term, grade in group)
+        chunks.append((f"OFFICIAL TRANSCRIPT (continued)\n{body}", group))
+    return chunks
+
+
+def make_query(group_line):
+    code, title, _, _ = group_line
+    if random.random() < 0.5:
+        return f"What grade did I get in {code}?"
+    return f"How did I do in {title}?"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+async def load_corpus(session_factory, users: int, courses: int, per_chunk: int):
+    corpus = {}
+    client = get_embedding_client()
+    for u in range(users):
+        user_id = uuid.uuid4()
+        chunks = make_chunks(make_transcript(courses), per_chunk)
+        vectors = await client.embed_documents([content for content, _ in chunks])
+        async with session_factory() as session:
+            session.add(User(id=user_id, email=f"bench-{u}-{user_id.hex[:8]}@example.com", hashed_password="x"))
+            await session.flush()
+            rows = []
+            for (content, group), vector in zip(chunks, vectors):
+                row = VectorStore(id=uuid.uuid4(), user_id=user_id, content=content, embedding=vector, metadata_={})
+                rows.append((row, group))
+                session.add(row)
+            await session.commit()
+        corpus[user_id] = [(row.id, group) for row, group in rows]
+    return corpus
+
+
+def sample_queries(corpus, count: int):
+    queries = []
+    users = list(corpus)
+    for _ in range(count):
+        user_id = random.choice(users)
+        chunk_id, group = random.choice(corpus[user_id])
+        line = random.choice(group)
+        query = make_query(line)
+        # Titles can repeat within a transcript; ask by course code when the title is ambiguous
+        title_chunks = [cid for cid, g in corpus[user_id] if any(other[1] == line[1] for other in g)]
+        if query.startswith("How") and len(title_chunks) > 1:
+            query = f"What grade did I get in {line[0]}?"
+        queries.append((user_id, query, chunk_id))
+    return queries
+
+
+async def run_mode(session_factory, queries, mode: str, k: int):
+    hits = 0
+    latencies = []
+    skipped_before = ai_service.RETRIEVAL_QUERIES.labels("lexical").value
+    ai_service.HYBRID_RETRIEVAL = mode == "hybrid"
+    for user_id, query, expected in queries:
+        async with session_factory() as session:
+            start = time.perf_counter()
+            if mode == "lexical":
+                results = [hit.chunk for hit in await search_user_chunks_lexical(session, user_id, query, limit=k)]
+            else:
+                results = await retrieve_context(query, session, user_id, limit=k)
+            latencies.append(time.perf_counter() - start)
+            await session.rollback()
+        hits += any(chunk.id == expected for chunk in results)
+    skipped = ai_service.RETRIEVAL_QUERIES.labels("lexical").value - skipped_before
+    return hits / len(queries), latencies, skipped
+
+
+async def bench(args):
+    if not DATABASE_URL:
+        logger.error("DATABASE_URL not found in environment variables")
+        return
+
+    engine = create_async_engine(DATABASE_URL, connect_args={"ssl": "require"})
+    bench_engine = engine.execution_options(schema_translate_map={None: SCHEMA})
+    session_factory = lambda: AsyncSession(bench_engine, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all, tables=[Asset.__table__, User.__table__, VectorStore.__table__]
+        )
+        await conn.execute(text(ann_index_ddl(f"{SCHEMA}.vector_store", "ix_hybrid_bench_ann")))
+
+    try:
+        logger.info(f"Loading {args.users} synthetic transcripts...")
+        corpus = await load_corpus(session_factory, args.users, args.courses, args.courses_per_chunk)
+        async with engine.begin() as conn:
+            await conn.execute(text(f"ANALYZE {SCHEMA}.vector_store"))
+        queries = sample_queries(corpus, args.queries)
+
+        print(f"\n{'mode':>8} {'recall@' + str(args.k):>10} {'p50 ms':>9} {'p95 ms':>9} {'embed skipped':>14}")
+        for mode in ("vector", "lexical", "hybrid"):
+            recall, latencies, skipped = await run_mode(session_factory, queries, mode, args.k)
+            print(
+                f"{mode:>8} {recall:>10.3f} {percentile(latencies, 50) * 1000:>9.2f} "
+                f"{percentile(latencies, 95) * 1000:>9.2f} {skipped / len(queries):>13.0%}"
+            )
+        print(f"\nmean chunks per user: {statistics.mean(len(c) for c in corpus.values()):.1f}")
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--courses", type=int, default=40, help="Courses per transcript")
+    parser.add_argument("--courses-per-chunk", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3, help="Chunks retrieved per query (recall@k)")
+    parser.add_argument("--provider", choices=["fake", "google"], default="fake")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema afterwards")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Read when the shared embedding client is first built
+    ai_service.EMBEDDING_PROVIDER = args.provider
+    random.seed(args.seed)
+    asyncio.run(bench(args))
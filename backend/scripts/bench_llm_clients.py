@@ -0,0 +1,106 @@
+"""
+Per-request overhead of building Gemini clients vs. reusing the shared model registry.
+
+Offline mode (default) only measures client construction, i.e. what every request paid before:
+one ChatGoogleGenerativeAI or GoogleGenerativeAIEmbeddings (and its google-genai client) per call.
+No network access is needed; a placeholder API key is used when GOOGLE_API_KEY is unset.
+
+    python scripts/bench_llm_clients.py --iterations 200
+
+Live mode additionally times --requests sequential embed_query calls with a fresh client per call
+(new HTTP session, TCP + TLS handshake each time) vs. the shared client (kept-alive connection):
+
+    GOOGLE_API_KEY=... python scripts/bench_llm_clients.py --live --requests 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Ensure we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark-key")
+
+from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from app.services import model_registry as registry_module
+from app.services.model_registry import ModelRegistry
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+def report(label, samples):
+    print(
+        f"{label:<38} mean {statistics.mean(samples) * 1000:8.3f} ms   "
+        f"p50 {percentile(samples, 50) * 1000:8.3f} ms   p95 {percentile(samples, 95) * 1000:8.3f} ms"
+    )
+
+
+def time_calls(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_construction(iterations):
+    key = os.environ["GOOGLE_API_KEY"]
+    registry = ModelRegistry()
+    registry_module.GOOGLE_API_KEY = key
+
+    report("new ChatGoogleGenerativeAI per call", time_calls(
+        lambda: ChatGoogleGenerativeAI(model=registry_module.LLM_MODEL, google_api_key=key), iterations
+    ))
+    report("new embeddings model per call", time_calls(
+        lambda: GoogleGenerativeAIEmbeddings(model=registry_module.EMBEDDING_MODEL, google_api_key=key), iterations
+    ))
+    report("registry.chat_model()", time_calls(registry.chat_model, iterations))
+    report("registry.embeddings_model()", time_calls(registry.embeddings_model, iterations))
+
+
+async def bench_live(requests):
+    key = os.environ["GOOGLE_API_KEY"]
+
+    fresh = []
+    for i in range(requests):
+        start = time.perf_counter()
+        model = GoogleGenerativeAIEmbeddings(model=registry_module.EMBEDDING_MODEL, google_api_key=key)
+        await model.aembed_query(f"benchmark query {i}")
+        fresh.append(time.perf_counter() - start)
+        await model.client.aio.aclose()
+
+    registry = ModelRegistry()
+    registry_module.GOOGLE_API_KEY = key
+    await registry.start(warm_up=True)
+    shared = []
+    for i in range(requests):
+        start = time.perf_counter()
+        await registry.embeddings_model().aembed_query(f"benchmark query {i}")
+        shared.append(time.perf_counter() - start)
+    await registry.shutdown()
+
+    report("embed_query, fresh client", fresh)
+    report("embed_query, shared warm client", shared)
+    print(f"saved per request: {(statistics.mean(fresh) - statistics.mean(shared)) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200, help="Constructions per variant")
+    parser.add_argument("--live", action="store_true", help="Also time real embedding calls (needs GOOGLE_API_KEY)")
+    parser.add_argument("--requests", type=int, default=20, help="Live calls per variant")
+    args = parser.parse_args()
+
+    bench_construction(args.iterations)
+    if args.live:
+        asyncio.run(bench_live(args.requests))
@@ -0,0 +1,121 @@
+"""
+Login throughput with bcrypt inline on the event loop vs. offloaded to the password hashing pool.
+
+Offline mode (default) runs the verify step of the login handler for --requests concurrent logins
+and reports throughput plus how late a 10ms event-loop heartbeat fires, which is what every other
+request on the worker experiences while logins are in flight.
+
+    python scripts/bench_login.py --requests 64 --concurrency 16 --rounds 12
+
+HTTP mode drives a running server instead:
+
+    python scripts/bench_login.py --url http://localhost:8000 --email alex@example.com --password secret
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Ensure we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core import security
+from app.core.security import PasswordHasher
+
+HEARTBEAT_SECONDS = 0.01
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+async def heartbeat(lags, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        lags.append(time.perf_counter() - start - HEARTBEAT_SECONDS)
+
+
+async def run_logins(verify, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, rejected = [], 0
+
+    async def one():
+        nonlocal rejected
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await verify()
+            except Exception:
+                rejected += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    lags, stop = [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(requests)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return elapsed, latencies, rejected, lags
+
+
+def report(label, requests, elapsed, latencies, rejected, lags):
+    print(
+        f"{label:>10} {requests / elapsed:>9.1f} {percentile(latencies, 50) * 1000:>9.0f} "
+        f"{percentile(latencies, 99) * 1000:>9.0f} {rejected:>8} "
+        f"{(statistics.mean(lags) if lags else 0) * 1000:>9.1f} {(max(lags) if lags else 0) * 1000:>9.1f}"
+    )
+
+
+async def bench_offline(requests: int, concurrency: int, rounds: int, workers: int):
+    password = "correct horse battery staple"
+    hashed = security.get_password_hash(password, rounds)
+    hasher = PasswordHasher(workers=workers, max_pending=max(requests, 1))
+
+    async def inline():
+        # What the handler did before: bcrypt on the event loop thread
+        return security.verify_password(password, hashed)
+
+    async def offloaded():
+        return await hasher.verify(password, hashed)
+
+    print(f"bcrypt rounds={rounds}, workers={workers}, requests={requests}, concurrency={concurrency}")
+    print(f"{'mode':>10} {'logins/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'rejected':>8} {'lag avg':>9} {'lag max':>9}")
+    for label, verify in (("inline", inline), ("offloaded", offloaded)):
+        report(label, requests, *await run_logins(verify, requests, concurrency))
+    hasher.shutdown()
+
+
+async def bench_http(url: str, email: str, password: str, requests: int, concurrency: int):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        async def login():
+            response = await client.post("/api/v1/auth/login", data={"username": email, "password": password})
+            response.raise_for_status()
+
+        print(f"{url}: requests={requests}, concurrency={concurrency}")
+        print(f"{'mode':>10} {'logins/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'rejected':>8} {'lag avg':>9} {'lag max':>9}")
+        report("http", requests, *await run_logins(login, requests, concurrency))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=security.BCRYPT_ROUNDS)
+    parser.add_argument("--workers", type=int, default=security.PASSWORD_HASH_WORKERS)
+    parser.add_argument("--url", help="Benchmark a running server instead of the offline comparison")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(bench_http(args.url, args.email, args.password, args.requests, args.concurrency))
+    else:
+        asyncio.run(bench_offline(args.requests, args.concurrency, args.rounds, args.workers))
@@ -0,0 +1,146 @@
+"""
+Write latency of a generated roadmap against its milestone count: the previous ORM flow
+(add -> flush -> per-milestone add -> commit -> refresh -> re-SELECT milestones) vs.
+app.db.roadmap_repository.insert_roadmap (client-side ids, roadmap INSERT + one multi-row
+INSERT ... RETURNING, then commit).
+
+Runs in a scratch `persist_bench` schema. "statements" counts the SQL statements sent per write
+(BEGIN/COMMIT excluded); each one is a round trip to the database.
+
+    python scripts/bench_roadmap_persist.py --milestones 1 5 10 25 50 --repeats 30
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+# Ensure we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from dotenv import load_dotenv
+from app.core.logger import get_logger
+from app.db.base import Base
+from app.db.roadmap_repository import insert_roadmap, milestone_row
+from app.models.models import Asset, Roadmap, RoadmapMilestone, User
+
+load_dotenv()
+
+logger = get_logger()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+SCHEMA = "persist_bench"
+
+
+def make_roadmap(milestones: int):
+    return {
+        "title": "Machine Learning Engineer",
+        "summary": "From core CS coursework to production ML systems. " * 4,
+        "milestones": [
+            {
+                "title": f"Milestone {i + 1}",
+                "description": "Build depth in the fundamentals and ship a project that shows it. " * 3,
+                "semester": f"Semester {i + 1}",
+                "skills": ["Python", "PyTorch", "SQL", "Statistics"],
+                "projects": [{"title": "Recommender system", "description": "Collaborative filtering on MovieLens."}],
+            }
+            for i in range(milestones)
+        ],
+    }
+
+
+async def orm_persist(db: AsyncSession, user_id, roadmap_json):
+    roadmap = Roadmap(
+        user_id=user_id,
+        title=roadmap_json.get("title"),
+        description=roadmap_json.get("summary", ""),
+        content=roadmap_json,
+    )
+    db.add(roadmap)
+    await db.flush()
+    for ms in roadmap_json.get("milestones", []):
+        db.add(RoadmapMilestone(**milestone_row(roadmap.id, ms)))
+    await db.commit()
+    await db.refresh(roadmap)
+    result = await db.execute(select(RoadmapMilestone).where(RoadmapMilestone.roadmap_id == roadmap.id))
+    return [str(m.id) for m in result.scalars().all()]
+
+
+async def bulk_persist(db: AsyncSession, user_id, roadmap_json):
+    _, content = await insert_roadmap(db, user_id, roadmap_json)
+    await db.commit()
+    return [ms["id"] for ms in content["milestones"]]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+async def bench(args):
+    if not DATABASE_URL:
+        logger.error("DATABASE_URL not found in environment variables")
+        return
+
+    engine = create_async_engine(DATABASE_URL, connect_args={"ssl": "require"})
+    bench_engine = engine.execution_options(schema_translate_map={None: SCHEMA})
+    session_factory = lambda: AsyncSession(bench_engine, expire_on_commit=False)
+
+    statements = 0
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        statements += 1
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[Asset.__table__, User.__table__, Roadmap.__table__, RoadmapMilestone.__table__],
+        )
+
+    try:
+        user_id = uuid.uuid4()
+        async with session_factory() as session:
+            session.add(User(id=user_id, email=f"bench-{user_id.hex[:8]}@example.com", hashed_password="x"))
+            await session.commit()
+
+        print(f"{'milestones':>10} {'method':>6} {'p50 ms':>9} {'p95 ms':>9} {'statements':>11}")
+        for count in args.milestones:
+            roadmap_json = make_roadmap(count)
+            for label, fn in (("orm", orm_persist), ("bulk", bulk_persist)):
+                latencies = []
+                for _ in range(args.warmup + args.repeats):
+                    async with session_factory() as session:
+                        before = statements
+                        start = time.perf_counter()
+                        ids = await fn(session, user_id, roadmap_json)
+                        latencies.append(time.perf_counter() - start)
+                        per_write = statements - before
+                    assert len(ids) == count
+                latencies = latencies[args.warmup:]
+                print(
+                    f"{count:>10} {label:>6} {percentile(latencies, 50) * 1000:>9.2f} "
+                    f"{percentile(latencies, 95) * 1000:>9.2f} {per_write:>11}"
+                )
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--milestones", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed writes per method and size")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema afterwards")
+    args = parser.parse_args()
+    asyncio.run(bench(args))
@@ -0,0 +1,186 @@
+"""
+Benchmarks filtered ANN retrieval on the production query path.
+
+Grows the vector_store table of a scratch `vector_bench` schema to each requested size (random
+768-d vectors spread across synthetic users), builds the same indexes as production and reports
+p50/p99 latency of app.services.vector_search.search_user_chunks, the per-user query used by /chat
+(configure_ann_session settings included: iterative scans on pgvector >= 0.8, filter-scaled
+ef_search/probes before), next to an unfiltered global query. "full" is the share of per-user
+queries that returned all `limit` rows.
+
+    python scripts/bench_vector_search.py --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import sys
+import time
+import uuid
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import select, text
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.logger import get_logger
+from app.db.base import Base
+from app.models.models import Asset, User, VectorStore
+from app.services import vector_search
+from app.services.vector_search import (
+    ANN_INDEX_NAME,
+    HNSW_EF_SEARCH,
+    IVFFLAT_PROBES,
+    ann_index_ddl,
+    configure_ann_session,
+    search_user_chunks,
+)
+
+load_dotenv()
+
+logger = get_logger()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+# Bench connections resolve vector_store (ORM and raw SQL alike) to the scratch schema first
+SCHEMA = "vector_bench"
+DIMENSIONS = 768
+LIMIT = 3
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def random_vector():
+    return [random.random() for _ in range(DIMENSIONS)]
+
+
+def bench_user_id(i: int) -> uuid.UUID:
+    # Same ids as md5(i::text)::uuid on the server
+    return uuid.UUID(hashlib.md5(str(i).encode()).hexdigest())
+
+
+async def grow_table(conn, current: int, target: int, users: int, batch: int = 10000):
+    # Vectors are generated server-side; referencing g keeps the subquery correlated per row
+    while current < target:
+        upto = min(target, current + batch)
+        await conn.execute(text(f"""
+            INSERT INTO vector_store (id, user_id, content, embedding)
+            SELECT gen_random_uuid(), md5((g % {users})::text)::uuid, 'chunk ' || g,
+                   (SELECT array_agg(random() + g * 0)::vector FROM generate_series(1, {DIMENSIONS}))
+            FROM generate_series({current + 1}, {upto}) AS g
+        """))
+        current = upto
+    return current
+
+
+async def time_user_queries(session_factory, users: int, queries: int, ef_search: int, probes: int):
+    latencies = []
+    full = 0
+    for _ in range(queries):
+        user_id = bench_user_id(random.randrange(users))
+        query_vector = random_vector()
+        async with session_factory() as session:
+            start = time.perf_counter()
+            chunks = await search_user_chunks(
+                session, user_id, query_vector, limit=LIMIT, ef_search=ef_search, probes=probes
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            await session.rollback()
+        full += len(chunks) == LIMIT
+    return latencies, full / queries
+
+
+async def time_global_queries(session_factory, queries: int, ef_search: int, probes: int):
+    latencies = []
+    for _ in range(queries):
+        distance = VectorStore.embedding.l2_distance(random_vector())
+        async with session_factory() as session:
+            start = time.perf_counter()
+            await configure_ann_session(session, ef_search=ef_search, probes=probes)
+            await session.execute(select(VectorStore.id).order_by(distance).limit(LIMIT))
+            latencies.append((time.perf_counter() - start) * 1000)
+            await session.rollback()
+    return latencies
+
+
+async def bench_vector_search(sizes, users: int, queries: int, ef_search: int, probes: int):
+    if not DATABASE_URL:
+        logger.error("DATABASE_URL not found in environment variables")
+        return
+
+    engine = create_async_engine(DATABASE_URL, connect_args={"ssl": "require"})
+    bench_engine = create_async_engine(
+        DATABASE_URL, connect_args={"ssl": "require", "server_settings": {"search_path": f"{SCHEMA}, public"}}
+    )
+    session_factory = lambda: AsyncSession(bench_engine, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        version = (await conn.execute(
+            text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        )).scalar_one()
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all, tables=[Asset.__table__, User.__table__, VectorStore.__table__]
+        )
+        await conn.execute(text(f"""
+            INSERT INTO users (id, email, hashed_password)
+            SELECT md5(g::text)::uuid, 'bench-' || g || '@example.com', 'x'
+            FROM generate_series(0, {users - 1}) AS g
+        """))
+    logger.info(f"pgvector {version}, VECTOR_ITERATIVE_SCAN={vector_search.ITERATIVE_SCAN}")
+
+    results = []
+    rows = 0
+    try:
+        for size in sorted(sizes):
+            logger.info(f"Growing vector_store to {size} rows...")
+            async with bench_engine.begin() as conn:
+                rows = await grow_table(conn, rows, size, users)
+
+            logger.info("Rebuilding ANN index...")
+            async with bench_engine.begin() as conn:
+                # Qualified: an unqualified name could resolve to the production index through search_path
+                await conn.execute(text(f"DROP INDEX IF EXISTS {SCHEMA}.{ANN_INDEX_NAME}"))
+                await conn.execute(text(ann_index_ddl(f"{SCHEMA}.vector_store")))
+                await conn.execute(text("ANALYZE vector_store"))
+            # Row estimates behind filter-scaled ef_search/probes are cached; start each size fresh
+            vector_search._table_rows = (0.0, 0.0)
+            vector_search._user_rows.clear()
+
+            latencies, full = await time_user_queries(session_factory, users, queries, ef_search, probes)
+            results.append((size, "per-user", percentile(latencies, 50), percentile(latencies, 99), f"{full:.0%}"))
+            latencies = await time_global_queries(session_factory, queries, ef_search, probes)
+            results.append((size, "global", percentile(latencies, 50), percentile(latencies, 99), "-"))
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await bench_engine.dispose()
+        await engine.dispose()
+
+    print(f"\n{'rows':>10} {'query':>10} {'p50 ms':>10} {'p99 ms':>10} {'full':>6}")
+    for size, label, p50, p99, full in results:
+        print(f"{size:>10} {label:>10} {p50:>10.2f} {p99:>10.2f} {full:>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--ef-search", type=int, default=HNSW_EF_SEARCH)
+    parser.add_argument("--probes", type=int, default=IVFFLAT_PROBES)
+    parser.add_argument(
+        "--iterative-scan", choices=["off", "relaxed_order", "strict_order"], default=vector_search.ITERATIVE_SCAN,
+        help="Overrides VECTOR_ITERATIVE_SCAN (read by configure_ann_session on each query)",
+    )
+    args = parser.parse_args()
+    vector_search.ITERATIVE_SCAN = args.iterative_scan
+    asyncio.run(bench_vector_search(args.sizes, args.users, args.queries, args.ef_search, args.probes))
@@ -0,0 +1,100 @@
+"""
+Deduplicates the vector_store table left behind by append-only uploads.
+
+1. Backfills user_id (from metadata) and content_hash (same normalization as ingestion).
+2. Deletes every row that repeats an earlier (user_id, content_hash) pair.
+3. Optionally runs VACUUM ANALYZE to reclaim the space.
+
+    python scripts/compact_vector_store.py [--dry-run] [--vacuum]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import text
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.logger import get_logger
+from app.services.embedding_cache import chunk_hash
+
+load_dotenv()
+
+logger = get_logger()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+BATCH_SIZE = 1000
+
+DUPLICATES_SQL = """
+    FROM vector_store a
+    USING vector_store b
+    WHERE a.user_id IS NOT DISTINCT FROM b.user_id
+      AND a.content_hash = b.content_hash
+      AND a.id > b.id
+"""
+
+async def backfill_hashes(conn) -> int:
+    updated = 0
+    while True:
+        result = await conn.execute(text(
+            "SELECT id, content FROM vector_store WHERE content_hash IS NULL LIMIT :limit"
+        ), {"limit": BATCH_SIZE})
+        rows = result.all()
+        if not rows:
+            return updated
+        await conn.execute(
+            text("UPDATE vector_store SET content_hash = :hash WHERE id = :id"),
+            [{"id": row_id, "hash": chunk_hash(content)} for row_id, content in rows]
+        )
+        updated += len(rows)
+        logger.info(f"Backfilled content_hash for {updated} rows...")
+
+async def compact_vector_store(dry_run: bool, vacuum: bool):
+    if not DATABASE_URL:
+        logger.error("DATABASE_URL not found in environment variables")
+        return
+
+    logger.info(f"Connecting to database to compact vector_store...")
+
+    # Create engine
+    engine = create_async_engine(DATABASE_URL, connect_args={"ssl": "require"})
+
+    async with engine.connect() as conn:
+        await conn.execute(text("ALTER TABLE vector_store ADD COLUMN IF NOT EXISTS user_id UUID REFERENCES users(id)"))
+        await conn.execute(text("ALTER TABLE vector_store ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"))
+        await conn.execute(text(
+            "UPDATE vector_store SET user_id = (metadata->>'user_id')::uuid "
+            "WHERE user_id IS NULL AND metadata ? 'user_id'"
+        ))
+        backfilled = await backfill_hashes(conn)
+
+        total = (await conn.execute(text("SELECT count(*) FROM vector_store"))).scalar()
+        duplicates = (await conn.execute(text(f"SELECT count(DISTINCT a.id) {DUPLICATES_SQL}"))).scalar()
+        logger.info(f"{total} rows, {backfilled} hashes backfilled, {duplicates} duplicate rows")
+
+        if dry_run:
+            logger.info("Dry run: rolling back.")
+            await conn.rollback()
+        else:
+            await conn.execute(text(f"DELETE {DUPLICATES_SQL}"))
+            await conn.commit()
+            logger.info(f"Deleted {duplicates} duplicate rows.")
+
+    if vacuum and not dry_run:
+        # VACUUM cannot run inside a transaction block
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            logger.info("Running VACUUM ANALYZE vector_store...")
+            await conn.execute(text("VACUUM ANALYZE vector_store"))
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Report duplicates without deleting them")
+    parser.add_argument("--vacuum", action="store_true", help="Run VACUUM ANALYZE afterwards")
+    args = parser.parse_args()
+    asyncio.run(compact_vector_store(args.dry_run, args.vacuum))
@@ -0,0 +1,60 @@
+"""
+Standalone transcript ingestion worker for INGEST_QUEUE_BACKEND=database.
+
+Claims queued rows from ingest_jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any
+number of these processes can run next to the API. Jobs left Running by a crashed
+process are queued again after INGEST_JOB_TIMEOUT_SECONDS.
+
+    python scripts/ingest_worker.py
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.logger import get_logger
+from app.db.session import AsyncSessionLocal
+from app.models.models import IngestJob, IngestJobStatus
+from app.services.ingest_jobs import claim_next_job, requeue_stale_jobs, run_ingest_job, INGEST_JOB_TIMEOUT_SECONDS
+from app.services.pdf_extraction import pdf_extractor
+
+load_dotenv()
+
+logger = get_logger()
+
+POLL_INTERVAL = float(os.getenv("INGEST_WORKER_POLL_SECONDS", "1.0"))
+
+async def ingest_worker():
+    logger.info("Ingest worker started, polling for queued jobs...")
+    pdf_extractor.start()
+    last_stale_check = None
+    try:
+        while True:
+            async with AsyncSessionLocal() as db:
+                if last_stale_check is None or time.monotonic() - last_stale_check > INGEST_JOB_TIMEOUT_SECONDS / 2:
+                    await requeue_stale_jobs(db)
+                    last_stale_check = time.monotonic()
+                job_id = await claim_next_job(db)
+                if job_id is not None:
+                    # Mark as running before releasing the row lock so no other worker takes it
+                    job = await db.get(IngestJob, job_id)
+                    job.status = IngestJobStatus.RUNNING
+                    job.started_at = datetime.utcnow()
+                await db.commit()
+
+            if job_id is None:
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
+
+            logger.info(f"Running ingest job {job_id}")
+            await run_ingest_job(job_id, claimed=True)
+    finally:
+        pdf_extractor.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(ingest_worker())
@@ -9,6 +9,7 @@ from dotenv import load_dotenv
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 from app.models.models import Base, User, AcademicLevel
+from app.services.vector_search import ann_index_ddl
 from app.core.logger import get_logger
 
 load_dotenv()
@@ -44,6 +45,10 @@ async def init_db():
         
         logger.info("Tables created successfully.")
 
+        # 2.5 ANN index for similarity search (the user_id B-tree comes from the model)
+        logger.info("Creating ANN index on vector_store.embedding...")
+        await conn.execute(text(ann_index_ddl()))
+
     # 3. Create Dummy User
     from sqlalchemy.orm import sessionmaker
     from sqlalchemy.ext.asyncio import AsyncSession
@@ -0,0 +1,113 @@
+"""
+Moves inline users.avatar_base64 images into the content-addressed assets table.
+
+1. Creates the assets table and the users.avatar_hash / avatar_thumbnail_hash columns.
+2. Resizes every inline avatar, stores it with its thumbnail and points the user at the hashes.
+3. Clears avatar_base64 for migrated rows; --drop-column removes the column once everything moved.
+
+Images that cannot be decoded are logged and left in place.
+
+    python scripts/migrate_avatars.py [--drop-column]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.logger import get_logger
+from app.services.assets import store_avatar
+
+load_dotenv()
+
+logger = get_logger()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+BATCH_SIZE = 50
+
+async def migrate_avatars(drop_column: bool):
+    if not DATABASE_URL:
+        logger.error("DATABASE_URL not found in environment variables")
+        return
+
+    logger.info(f"Connecting to database to migrate avatars...")
+
+    # Create engine
+    engine = create_async_engine(DATABASE_URL, connect_args={"ssl": "require"})
+
+    async with engine.begin() as conn:
+        commands = [
+            """
+            CREATE TABLE IF NOT EXISTS assets (
+                hash VARCHAR(64) PRIMARY KEY,
+                content_type VARCHAR NOT NULL,
+                data BYTEA NOT NULL,
+                size INTEGER NOT NULL,
+                width INTEGER,
+                height INTEGER,
+                created_at TIMESTAMP DEFAULT now()
+            );
+            """,
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS avatar_hash VARCHAR(64) REFERENCES assets(hash);",
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS avatar_thumbnail_hash VARCHAR(64) REFERENCES assets(hash);",
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS avatar_base64 TEXT;",
+        ]
+        for cmd in commands:
+            logger.info(f"Executing: {cmd.strip().splitlines()[0]}")
+            await conn.execute(text(cmd))
+
+    SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    migrated, failed = 0, []
+
+    while True:
+        async with SessionLocal() as db:
+            # Rows that failed stay populated, so skip them instead of looping forever
+            result = await db.execute(text(
+                "SELECT id, avatar_base64 FROM users "
+                "WHERE avatar_base64 IS NOT NULL AND avatar_base64 <> '' AND NOT (id = ANY(:failed)) "
+                "LIMIT :limit"
+            ), {"failed": failed, "limit": BATCH_SIZE})
+            rows = result.all()
+            if not rows:
+                break
+
+            for user_id, avatar_base64 in rows:
+                try:
+                    avatar_hash, thumbnail_hash = await store_avatar(db, avatar_base64)
+                except HTTPException as e:
+                    logger.warning(f"Skipping avatar of user {user_id}: {e.detail}")
+                    failed.append(user_id)
+                    continue
+                await db.execute(text(
+                    "UPDATE users SET avatar_hash = :avatar, avatar_thumbnail_hash = :thumbnail, avatar_base64 = NULL "
+                    "WHERE id = :id"
+                ), {"avatar": avatar_hash, "thumbnail": thumbnail_hash, "id": user_id})
+                migrated += 1
+
+            await db.commit()
+            logger.info(f"Migrated {migrated} avatars...")
+
+    logger.info(f"Avatar migration finished: {migrated} migrated, {len(failed)} skipped.")
+
+    if drop_column:
+        if failed:
+            logger.error("Not dropping users.avatar_base64: some avatars could not be migrated.")
+        else:
+            async with engine.begin() as conn:
+                logger.info("Dropping users.avatar_base64...")
+                await conn.execute(text("ALTER TABLE users DROP COLUMN IF EXISTS avatar_base64"))
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drop-column", action="store_true", help="Drop users.avatar_base64 after a clean migration")
+    args = parser.parse_args()
+    asyncio.run(migrate_avatars(args.drop_column))
@@ -0,0 +1,56 @@
+"""
+Creates the idempotency_keys table behind the Idempotency-Key header of POST /roadmaps/generate.
+
+Rows are kept for IDEMPOTENCY_KEY_TTL_HOURS; run with --purge-expired (e.g. daily) to delete older ones.
+
+    python scripts/migrate_idempotency_keys.py [--purge-expired]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.logger import get_logger
+from app.models.models import IdempotencyKey
+from app.db.idempotency_repository import purge_expired_keys
+
+load_dotenv()
+
+logger = get_logger()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+async def migrate_idempotency_keys(purge: bool):
+    if not DATABASE_URL:
+        logger.error("DATABASE_URL not found in environment variables")
+        return
+
+    logger.info(f"Connecting to database to migrate idempotency keys...")
+
+    # Create engine
+    engine = create_async_engine(DATABASE_URL, connect_args={"ssl": "require"})
+
+    async with engine.begin() as conn:
+        logger.info("Creating idempotency_keys...")
+        await conn.run_sync(IdempotencyKey.__table__.create, checkfirst=True)
+
+    if purge:
+        SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with SessionLocal() as db:
+            deleted = await purge_expired_keys(db)
+            await db.commit()
+        logger.info(f"Deleted {deleted} expired idempotency keys.")
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--purge-expired", action="store_true", help="Delete keys older than IDEMPOTENCY_KEY_TTL_HOURS")
+    args = parser.parse_args()
+    asyncio.run(migrate_idempotency_keys(args.purge_expired))
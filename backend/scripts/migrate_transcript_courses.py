@@ -0,0 +1,98 @@
+"""
+Adds structured transcript storage and backfills it from the stored transcript text.
+
+1. Creates the transcript_courses table (and its indexes) and profiles.derived_gpa / derived_major.
+2. Parses profiles.transcript_summary of every profile without parsed courses (text lines only:
+   the original PDFs, and therefore their tables, are not kept) and stores courses, GPA and major.
+
+Profiles whose transcript does not parse reliably (see parse_succeeded) keep using the raw text for roadmap context.
+
+    python scripts/migrate_transcript_courses.py [--skip-backfill]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.logger import get_logger
+from app.models.models import TranscriptCourse
+from app.db.transcript_repository import replace_user_courses
+from app.services.transcript_parser import parse_transcript, parse_succeeded, compute_gpa, derive_major
+
+load_dotenv()
+
+logger = get_logger()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+BATCH_SIZE = 50
+
+async def migrate_transcript_courses(backfill: bool):
+    if not DATABASE_URL:
+        logger.error("DATABASE_URL not found in environment variables")
+        return
+
+    logger.info(f"Connecting to database to migrate transcript courses...")
+
+    # Create engine
+    engine = create_async_engine(DATABASE_URL, connect_args={"ssl": "require"})
+
+    async with engine.begin() as conn:
+        logger.info("Creating transcript_courses...")
+        await conn.run_sync(TranscriptCourse.__table__.create, checkfirst=True)
+        commands = [
+            "ALTER TABLE profiles ADD COLUMN IF NOT EXISTS derived_gpa FLOAT;",
+            "ALTER TABLE profiles ADD COLUMN IF NOT EXISTS derived_major VARCHAR;",
+        ]
+        for cmd in commands:
+            logger.info(f"Executing: {cmd}")
+            await conn.execute(text(cmd))
+
+    if not backfill:
+        await engine.dispose()
+        return
+
+    SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    parsed, unparsed = 0, []
+
+    while True:
+        async with SessionLocal() as db:
+            # Profiles without course rows; ones that did not parse are skipped on later batches
+            result = await db.execute(text(
+                "SELECT p.id, p.transcript_summary FROM profiles p "
+                "WHERE p.transcript_summary IS NOT NULL AND NOT (p.id = ANY(:unparsed)) "
+                "AND NOT EXISTS (SELECT 1 FROM transcript_courses c WHERE c.user_id = p.id) "
+                "LIMIT :limit"
+            ), {"unparsed": unparsed, "limit": BATCH_SIZE})
+            rows = result.all()
+            if not rows:
+                break
+
+            for user_id, transcript in rows:
+                courses = parse_transcript(transcript)
+                if not parse_succeeded(courses, transcript):
+                    unparsed.append(user_id)
+                    continue
+                await replace_user_courses(db, user_id, courses)
+                await db.execute(text(
+                    "UPDATE profiles SET derived_gpa = :gpa, derived_major = :major WHERE id = :id"
+                ), {"gpa": compute_gpa(courses), "major": derive_major(transcript, courses), "id": user_id})
+                parsed += 1
+
+            await db.commit()
+            logger.info(f"Parsed {parsed} transcripts...")
+
+    logger.info(f"Transcript course backfill finished: {parsed} parsed, {len(unparsed)} kept as raw text.")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skip-backfill", action="store_true", help="Only create the table and columns")
+    args = parser.parse_args()
+    asyncio.run(migrate_transcript_courses(not args.skip_backfill))
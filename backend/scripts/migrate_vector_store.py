@@ -0,0 +1,59 @@
+import asyncio
+import os
+import sys
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import text
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.logger import get_logger
+from app.services.vector_search import ann_index_ddl
+from app.models.models import CONTENT_TSV_CONFIG
+
+load_dotenv()
+
+logger = get_logger()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+async def migrate_vector_store():
+    if not DATABASE_URL:
+        logger.error("DATABASE_URL not found in environment variables")
+        return
+
+    logger.info(f"Connecting to database to migrate VectorStore table...")
+    
+    # Create engine
+    engine = create_async_engine(DATABASE_URL, echo=True, connect_args={"ssl": "require"})
+
+    async with engine.begin() as conn:
+        logger.info("Running ALTER TABLE commands for 'vector_store'...")
+        
+        commands = [
+            "ALTER TABLE vector_store ADD COLUMN IF NOT EXISTS user_id UUID REFERENCES users(id);",
+            # Backfill from the JSONB metadata written by older uploads
+            "UPDATE vector_store SET user_id = (metadata->>'user_id')::uuid "
+            "WHERE user_id IS NULL AND metadata ? 'user_id';",
+            "CREATE INDEX IF NOT EXISTS ix_vector_store_user_id ON vector_store (user_id);",
+            "ALTER TABLE vector_store ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);",
+            "CREATE INDEX IF NOT EXISTS ix_vector_store_user_id_content_hash ON vector_store (user_id, content_hash);",
+            ann_index_ddl() + ";",
+            # Full-text half of hybrid retrieval; STORED columns are backfilled by the ALTER itself
+            "ALTER TABLE vector_store ADD COLUMN IF NOT EXISTS content_tsv tsvector "
+            f"GENERATED ALWAYS AS (to_tsvector('{CONTENT_TSV_CONFIG}'::regconfig, content)) STORED;",
+            "CREATE INDEX IF NOT EXISTS ix_vector_store_content_tsv ON vector_store USING gin (content_tsv);",
+            "ANALYZE vector_store;"
+        ]
+
+        for cmd in commands:
+            logger.info(f"Executing: {cmd}")
+            await conn.execute(text(cmd))
+            
+        logger.info("VectorStore migration completed successfully.")
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(migrate_vector_store())
@@ -0,0 +1,123 @@
+import json
+import random
+
+import pytest
+
+from app.core.json_utils import JsonScanner, StreamingArrayParser, extract_json, load_json
+
+# Raw roadmap outputs as captured from the model (DEBUG_CAPTURE_DIR), trimmed to a few milestones
+FENCED_CAPTURE = """\
+Here is a personalized roadmap based on your transcript:
+
+```json
+{
+  "title": "Machine Learning Engineer",
+  "summary": "Builds on CS 201 {Data Structures} and MATH 221; see the \\"Projects\\" notes.",
+  "milestones": [
+    {"title": "Strengthen linear algebra", "description": "Take MATH 340.", "semester": "Fall 2025", "skills": ["Linear Algebra"], "projects": []},
+    {"title": "First ML project", "description": "Train a model on MovieLens.\\nShip a demo.", "semester": "Spring 2026", "skills": ["Python", "PyTorch"], "projects": [{"title": "Recommender", "description": "Collaborative filtering."}]}
+  ]
+}
+```
+
+Good luck with your studies!"""
+
+PYTHON_STYLE_CAPTURE = """\
+{'title': 'Data Analyst', 'summary': "Turns the student's statistics courses into a portfolio.",
+ 'milestones': [
+   {'title': 'SQL fundamentals', 'description': 'Finish CS 330.', 'semester': 'Fall 2025', 'skills': ['SQL'], 'remote': True, 'mentor': None,},
+   {'title': 'Dashboard project', 'description': 'Publish a "real" dashboard.', 'semester': 'Spring 2026', 'skills': ['Tableau', 'Python'], 'remote': False, 'mentor': None},
+ ],
+}"""
+
+NESTED_KEY_CAPTURE = """\
+{"meta": {"source": "transcript", "milestones": [{"title": "not a milestone"}]},
+ "title": "Backend Engineer",
+ "milestones": [{"title": "Databases", "info": {"milestones": [{"title": "nested"}]}}, {"title": "Distributed systems"}]}"""
+
+TRUNCATED_CAPTURE = """\
+```json
+{"title": "Security Engineer", "milestones": [{"title": "Networks", "semester": "Fall 2025"}, {"title": "Cryptogra"""
+
+CAPTURES = [FENCED_CAPTURE, PYTHON_STYLE_CAPTURE, NESTED_KEY_CAPTURE, TRUNCATED_CAPTURE]
+
+
+def _random_chunks(text, rng):
+    i = 0
+    while i < len(text):
+        step = rng.randint(1, 40)
+        yield text[i:i + step]
+        i += step
+
+
+def _stream(text, chunks):
+    scanner = JsonScanner()
+    parser = StreamingArrayParser("milestones")
+    items = []
+    for chunk in chunks:
+        scanner.feed(chunk)
+        items.extend(parser.feed(chunk))
+    scanner.close()
+    parser.close()
+    return scanner.text(), items, parser
+
+
+def test_fenced_output_with_prose():
+    document = load_json(FENCED_CAPTURE)
+    assert document["title"] == "Machine Learning Engineer"
+    assert '{Data Structures}' in document["summary"] and '"Projects"' in document["summary"]
+    assert [m["title"] for m in document["milestones"]] == ["Strengthen linear algebra", "First ML project"]
+
+
+def test_python_style_output_is_normalized():
+    document = json.loads(extract_json(PYTHON_STYLE_CAPTURE))
+    assert document == load_json(PYTHON_STYLE_CAPTURE)
+    assert document["summary"] == "Turns the student's statistics courses into a portfolio."
+    first, second = document["milestones"]
+    assert (first["remote"], first["mentor"]) == (True, None)
+    assert second["description"] == 'Publish a "real" dashboard.'
+
+
+def test_streaming_ignores_target_key_in_nested_objects():
+    _, items, parser = _stream(NESTED_KEY_CAPTURE, [NESTED_KEY_CAPTURE])
+    assert not parser.failed
+    assert [item["title"] for item in items] == ["Databases", "Distributed systems"]
+    assert items == load_json(NESTED_KEY_CAPTURE)["milestones"]
+
+
+def test_truncated_output_streams_completed_milestones_only():
+    _, items, _ = _stream(TRUNCATED_CAPTURE, [TRUNCATED_CAPTURE])
+    assert items == [{"title": "Networks", "semester": "Fall 2025"}]
+    with pytest.raises(json.JSONDecodeError):
+        load_json(TRUNCATED_CAPTURE)
+
+
+def test_output_without_object_is_returned_stripped():
+    assert extract_json("  I cannot build a roadmap without a transcript.\n") == (
+        "I cannot build a roadmap without a transcript."
+    )
+
+
+@pytest.mark.parametrize("capture", CAPTURES)
+def test_single_character_chunks_match_single_shot(capture):
+    text, items, _ = _stream(capture, list(capture))
+    assert text == extract_json(capture)
+    assert items == _stream(capture, [capture])[1]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_fuzz_random_chunk_splits(seed):
+    rng = random.Random(seed)
+    for capture in CAPTURES:
+        expected = extract_json(capture)
+        text, items, parser = _stream(capture, _random_chunks(capture, rng))
+        assert text == expected
+        try:
+            document = json.loads(expected, strict=False)
+        except json.JSONDecodeError:
+            # Truncated output: streaming only has to agree with the single-shot scan
+            assert items == _stream(capture, [capture])[1]
+            continue
+        assert load_json(capture) == document
+        assert not parser.failed
+        assert items == document["milestones"]
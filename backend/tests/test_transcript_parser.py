@@ -0,0 +1,130 @@
+from app.services.transcript_parser import (
+    compute_gpa,
+    derive_major,
+    earned_credits,
+    format_compact,
+    parse_succeeded,
+    parse_tables,
+    parse_transcript,
+    transcript_notes,
+)
+
+REGISTRAR_TRANSCRIPT = """\
+STATE UNIVERSITY - OFFICE OF THE REGISTRAR
+UNOFFICIAL ACADEMIC TRANSCRIPT
+Name: Alex Hamilton Student ID: 20231187
+Program: Computer Science, B.S.
+
+Fall 2023
+CS 101 Introduction to Programming 4.0 A
+MATH 221 Calculus I 4
+ENGL 110 Academic Writing 3.0 B+
+Term GPA: 3.71 Credits Earned: 11.0
+
+Spring 2024
+CS 201 Data Structures 4.0 A-
+MATH 222 Calculus II 4.0 B
+PHYS 151 Mechanics 4.0 W
+CS 290 Research Seminar 1.0 P
+Dean's List
+Cumulative GPA: 3.58 Academic Standing: Good Standing
+
+Printed DEC 2024 Page 1 of 1
+"""
+
+
+def _by_code(courses):
+    return {course.code: course for course in courses}
+
+
+def test_roman_numeral_title_is_not_an_incomplete_grade():
+    course = _by_code(parse_transcript(REGISTRAR_TRANSCRIPT))["MATH 221"]
+    assert course.title == "Calculus I"
+    assert course.credits == 4.0
+    assert course.grade == ""
+
+
+def test_grade_after_credits_column_is_a_grade():
+    courses = _by_code(parse_transcript(REGISTRAR_TRANSCRIPT))
+    assert courses["PHYS 151"].grade == "W"
+    assert courses["CS 290"].grade == "P"
+    assert courses["MATH 222"].title == "Calculus II"
+
+
+def test_separated_column_grade_is_accepted():
+    course = parse_transcript("CS 310  Independent Study  I  3.0\nCS 320 Compilers 3.0 A\nCS 330 Networks 3.0 B")[0]
+    assert (course.title, course.grade, course.credits) == ("Independent Study", "I", 3.0)
+
+
+def test_footer_dates_are_not_courses():
+    codes = [course.code for course in parse_transcript(REGISTRAR_TRANSCRIPT)]
+    assert "DEC 2024" not in codes
+    assert codes == ["CS 101", "MATH 221", "ENGL 110", "CS 201", "MATH 222", "PHYS 151", "CS 290"]
+
+
+def test_terms_apply_to_following_lines():
+    courses = _by_code(parse_transcript(REGISTRAR_TRANSCRIPT))
+    assert courses["ENGL 110"].term == "Fall 2023"
+    assert courses["CS 290"].term == "Spring 2024"
+
+
+def test_gpa_and_credits():
+    courses = parse_transcript(REGISTRAR_TRANSCRIPT)
+    # Letter grades only: 4*4.0 + 3*3.3 + 4*3.7 + 4*3.0 over 15 credits
+    assert compute_gpa(courses) == 3.51
+    # W earns no credit; the ungraded MATH 221 row still counts its credits
+    assert earned_credits(courses) == 20.0
+    assert derive_major(REGISTRAR_TRANSCRIPT, courses) == "Computer Science, B.S."
+
+
+def test_notes_keep_standing_honors_and_cumulative_gpa():
+    notes = transcript_notes(REGISTRAR_TRANSCRIPT)
+    assert "Dean's List" in notes
+    assert "Cumulative GPA: 3.58 Academic Standing: Good Standing" in notes
+    assert not any("CS 101" in note for note in notes)
+
+    compact = format_compact(parse_transcript(REGISTRAR_TRANSCRIPT), notes=notes)
+    assert "Dean's List" in compact
+    assert "Fall 2023: CS 101 Introduction to Programming (4, A)" in compact
+
+
+def test_registrar_transcript_parses_reliably():
+    assert parse_succeeded(parse_transcript(REGISTRAR_TRANSCRIPT), REGISTRAR_TRANSCRIPT)
+
+
+def test_unstructured_transcript_falls_back_to_raw_text():
+    text = (
+        "Transcript for Alex H.\n"
+        "Course: Introduction to AI - Grade: A\n"
+        "Course: Data Structures - Grade: A-\n"
+        "Course: Operating Systems - Grade: B+\n"
+    )
+    assert parse_transcript(text) == []
+    assert not parse_succeeded(parse_transcript(text), text)
+
+
+def test_mostly_unparsed_course_lines_fall_back_to_raw_text():
+    text = (
+        "CS 101 Introduction to Programming 4.0 A\n"
+        "CS 201 Data Structures 4.0 A-\n"
+        "MATH 221 Calculus I 4.0 B\n"
+        "CS 301 Algorithms (in progress)\n"
+        "CS 302 Operating Systems (in progress)\n"
+        "CS 303 Databases (in progress)\n"
+    )
+    assert not parse_succeeded(parse_transcript(text), text)
+
+
+def test_tables_with_header_row():
+    table = [
+        ["Term", "Course", "Title", "Credits", "Grade"],
+        ["Fall 2023", "CS 101", "Introduction to Programming", "4.0", "A"],
+        [None, "MATH 221", "Calculus I", "4.0", "I"],
+        ["Spring 2024", "CS 201", "Data Structures", "4.0", "A-"],
+    ]
+    courses = parse_tables([table])
+    assert [(c.code, c.term, c.grade) for c in courses] == [
+        ("CS 101", "Fall 2023", "A"),
+        ("MATH 221", "Fall 2023", "I"),
+        ("CS 201", "Spring 2024", "A-"),
+    ]
@@ -28,7 +28,7 @@ const Sidebar = () => {
     const major = profile?.manual_major || "Computer Science (Default)";
     const gpa = profile?.manual_gpa || "3.8 (Default)";
     const name = profile?.display_name || "Alex H.";
-    const avatar = profile?.avatar_base64;
+    const avatar = profile?.avatar_thumbnail_url;
 
     return (
         <div className="w-64 bg-gray-900 text-white flex flex-col h-full border-r border-gray-800">
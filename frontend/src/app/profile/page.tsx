@@ -25,6 +25,8 @@ export default function ProfilePage() {
         hobbies: [] as string[],
         extracurriculars: [] as string[],
         display_name: "",
+        avatar_url: "",
+        // Only set when a new image was picked; the server stores it and returns avatar_url
         avatar_base64: ""
     });
 
@@ -41,7 +43,8 @@ export default function ProfilePage() {
                         hobbies: data.hobbies || [],
                         extracurriculars: data.extracurriculars || [],
                         display_name: data.display_name || "",
-                        avatar_base64: data.avatar_base64 || ""
+                        avatar_url: data.avatar_url || "",
+                        avatar_base64: ""
                     });
                 }
             } catch (err) {
@@ -59,8 +62,8 @@ export default function ProfilePage() {
         if (!file) return;
 
         // Validation
-        if (file.size > 200 * 1024) { // 200KB
-            toast.error("Image too large! Max 200KB.");
+        if (file.size > 5 * 1024 * 1024) { // 5MB, resized server-side
+            toast.error("Image too large! Max 5MB.");
             return;
         }
         if (!file.type.startsWith("image/")) {
@@ -79,9 +82,12 @@ export default function ProfilePage() {
     const handleSave = async (recalculate: boolean = false) => {
         setSaving(true);
         try {
+            const { avatar_url, avatar_base64, ...fields } = formData;
             const payload = {
-                ...formData,
-                manual_gpa: formData.manual_gpa ? parseFloat(formData.manual_gpa) : null
+                ...fields,
+                manual_gpa: formData.manual_gpa ? parseFloat(formData.manual_gpa) : null,
+                // Leave the stored avatar untouched unless a new one was picked
+                ...(avatar_base64 ? { avatar_base64 } : {})
             };
 
             const res = await fetchClient("/users/profile", {
@@ -91,6 +97,9 @@ export default function ProfilePage() {
 
             if (!res.ok) throw new Error("Failed to save profile");
 
+            const saved = await res.json();
+            setFormData(prev => ({ ...prev, avatar_url: saved.avatar_url || "", avatar_base64: "" }));
+
             toast.success("Profile saved!");
 
             if (recalculate) {
@@ -143,8 +152,8 @@ export default function ProfilePage() {
                         {/* Avatar Card */}
                         <Card className="bg-gray-900 border-gray-800 flex flex-col items-center p-6 text-center">
                             <div className="w-32 h-32 rounded-full overflow-hidden border-4 border-purple-500/30 mb-4 bg-gray-800 items-center justify-center flex">
-                                {formData.avatar_base64 ? (
-                                    <img src={formData.avatar_base64} alt="Avatar" className="w-full h-full object-cover" />
+                                {formData.avatar_base64 || formData.avatar_url ? (
+                                    <img src={formData.avatar_base64 || formData.avatar_url} alt="Avatar" className="w-full h-full object-cover" />
                                 ) : (
                                     <User className="w-12 h-12 text-gray-500" />
                                 )}
@@ -158,7 +167,7 @@ export default function ProfilePage() {
                                     onChange={handleImageUpload}
                                 />
                             </label>
-                            <span className="text-xs text-gray-500 mt-1">Max 200KB</span>
+                            <span className="text-xs text-gray-500 mt-1">Max 5MB</span>
                         </Card>
 
                         <Card className="bg-gray-900 border-gray-800">
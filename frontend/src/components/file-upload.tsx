@@ -6,6 +6,18 @@ import { Upload } from "lucide-react";
 import { toast } from "sonner";
 import { fetchClient } from "@/lib/api";
 
+const POLL_INTERVAL_MS = 1000;
+
+const waitForIngestJob = async (jobId: string) => {
+    while (true) {
+        const res = await fetchClient(`/ingest-jobs/${jobId}`);
+        if (!res.ok) throw new Error("Failed to fetch ingest job status");
+        const job = await res.json();
+        if (job.status === "Succeeded" || job.status === "Failed") return job;
+        await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+    }
+};
+
 export const FileUpload = ({ onUploadSuccess }: { onUploadSuccess: (text: string) => void }) => {
     const [uploading, setUploading] = useState(false);
 
@@ -29,7 +41,12 @@ export const FileUpload = ({ onUploadSuccess }: { onUploadSuccess: (text: string
 
             if (!res.ok) throw new Error("Upload failed");
 
-            const data = await res.json();
+            // Upload returns 202 with a job id; ingestion runs in the background
+            const { job_id } = await res.json();
+            const job = await waitForIngestJob(job_id);
+            if (job.status !== "Succeeded") throw new Error(job.error || "Processing failed");
+
+            const data = job.result;
             toast.success(`Transcript processed! (${data.transcript_length} chars)`);
             onUploadSuccess(data.transcript_length > 0 ? "Transcript available" : "");
 